@@ -1,9 +1,13 @@
+import os
 from datetime import datetime
-import base64
 import pandas as pd
 import streamlit as st
 from core.history_manager import HistoryManager
 
+# Numarul implicit de intrari afisate pe o pagina
+PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "10"))
+PAGE_SIZE_OPTIONS = sorted({10, 25, 50, 100, PAGE_SIZE})
+
 
 class HistoryPage:
     def __init__(self, history_manager: HistoryManager):
@@ -14,35 +18,14 @@ class HistoryPage:
         # Titlul principal al paginii
         st.title("Istoricul tau")
 
-        # Preluam istoricul utilizatorului curent
-        user_history = self.history.get_user_history()
+        # Prima si ultima zi cu intrari, citite din index fara a incarca istoricul
+        first_date, last_date = self.history.date_bounds()
 
         # Daca nu exista istoric, afisam un mesaj si oprim executia
-        if not user_history:
+        if first_date is None:
             st.info("Nu ai inca istoric.")
             return
 
-        # Construim o lista de randuri pentru DataFrame
-        rows = []
-        for entry in reversed(user_history):  # reversed = cele mai noi intrari apar primele
-            rows.append(
-                {
-                    "Data": entry.get("timestamp", ""),
-                    "Preparat": entry.get("dish_name", "unknown"),
-                    "Calorii": entry.get("total_calories", 0),
-                    "Proteine": entry.get("total_protein", 0),
-                    "Carbohidrati": entry.get("total_carbs", 0),
-                    "Grasimi": entry.get("total_fat", 0),
-                    "Image": entry.get("image_b64"),  # imaginea salvata in format Base64
-                }
-            )
-
-        # Convertim lista intr-un DataFrame pentru filtrare si afisare
-        df = pd.DataFrame(rows)
-
-        # Convertim coloana Data in format datetime pentru filtrare corecta
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
-
         # Sectiunea de filtre
         st.subheader("Filtre")
         col1, col2 = st.columns(2)
@@ -53,12 +36,10 @@ class HistoryPage:
 
         # Filtru dupa intervalul de date
         with col2:
-            # Extragem doar date valide pentru a calcula intervalul minim-maxim
-            valid_dates = df["Data"].dropna()
-            if len(valid_dates) > 0:
-                min_date = valid_dates.min().date()
-                max_date = valid_dates.max().date()
-            else:
+            try:
+                min_date = datetime.strptime(first_date, "%Y-%m-%d").date()
+                max_date = datetime.strptime(last_date, "%Y-%m-%d").date()
+            except ValueError:
                 # Daca nu exista date valide, folosim data curenta
                 today = datetime.now().date()
                 min_date = today
@@ -69,30 +50,80 @@ class HistoryPage:
                 "Alege intervalul de date", value=(min_date, max_date)
             )
 
-        # Aplicam filtrul dupa numele preparatului
-        if filter_name:
-            df = df[df["Preparat"].str.contains(filter_name, case=False, na=False)]
-
-        # Aplicam filtrul dupa intervalul de date
+        # Filtrele se aplica direct in baza de date
+        start = end = None
         if isinstance(date_range, tuple) and len(date_range) == 2:
-            start, end = date_range
-            df = df[(df["Data"].dt.date >= start) & (df["Data"].dt.date <= end)]
+            start, end = (d.strftime("%Y-%m-%d") for d in date_range)
+
+        total = self.history.count(filter_name, start, end)
+        if total == 0:
+            st.info("Nicio intrare nu corespunde filtrelor.")
+            return
 
-        # Afisam tabelul filtrat (fara coloana Image)
-        st.subheader("Tabel istoric filtrat")
-        st.dataframe(df.drop(columns=["Image"]), use_container_width=True)
+        # Navigare intre pagini
+        col_size, col_page = st.columns(2)
+        with col_size:
+            page_size = st.selectbox(
+                "Intrari pe pagina",
+                PAGE_SIZE_OPTIONS,
+                index=PAGE_SIZE_OPTIONS.index(PAGE_SIZE),
+            )
+        pages = (total + page_size - 1) // page_size
+        with col_page:
+            page = st.number_input(
+                f"Pagina (din {pages})", min_value=1, max_value=pages, value=1
+            )
+
+        # Citim doar intrarile paginii curente (cele mai noi primele)
+        entries = self.history.get_page(page - 1, page_size, filter_name, start, end)
+
+        # Construim o lista de randuri pentru DataFrame
+        rows = []
+        for entry in entries:
+            rows.append(
+                {
+                    "Id": entry.get("id"),
+                    "Data": entry.get("timestamp", ""),
+                    "Preparat": entry.get("dish_name", "unknown"),
+                    "Calorii": entry.get("total_calories", 0),
+                    "Proteine": entry.get("total_protein", 0),
+                    "Carbohidrati": entry.get("total_carbs", 0),
+                    "Grasimi": entry.get("total_fat", 0),
+                    "Image": entry.get("image_hash"),  # hash-ul imaginii din depozitul de blob-uri
+                }
+            )
 
-        # Sectiune pentru vizualizarea imaginilor asociate fiecarei intrari
+        # Convertim lista intr-un DataFrame pentru afisare
+        df = pd.DataFrame(rows)
+
+        # Convertim coloana Data in format datetime pentru afisare corecta
+        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+
+        # Afisam tabelul paginii curente (fara coloanele interne)
+        st.subheader(f"Tabel istoric filtrat ({total} intrari)")
+        st.dataframe(df.drop(columns=["Id", "Image"]), use_container_width=True)
+
+        # Sectiune pentru vizualizarea imaginilor asociate intrarilor din pagina
         st.subheader("Vizualizare imagini")
         for _, row in df.iterrows():
-            # Expander pentru fiecare preparat
-            with st.expander(f"📸 Vezi imaginea pentru: {row['Preparat']}"):
-                if row["Image"]:
-                    # Afisam imaginea decodata din Base64
+            # Imaginile se trimit catre browser doar cand utilizatorul deschide intrarea
+            if not st.toggle(
+                f"📸 Vezi imaginea pentru: {row['Preparat']}",
+                key=f"show_image_{row['Id']}",
+            ):
+                continue
+
+            thumb = self.history.thumbnail_path(row["Image"])
+            if thumb:
+                # Implicit trimitem doar miniatura, care are cativa KB
+                st.image(thumb, caption=row["Preparat"])
+
+                # Imaginea completa se incarca doar la cerere
+                if st.checkbox("Afiseaza imaginea completa", key=f"full_image_{row['Id']}"):
                     st.image(
-                        f"data:image/png;base64,{row['Image']}",
+                        self.history.image_path(row["Image"]),
                         caption=row["Preparat"],
                         use_container_width=True,
                     )
-                else:
-                    st.info("Nu exista imagine salvata pentru aceasta intrare.")
\ No newline at end of file
+            else:
+                st.info("Nu exista imagine salvata pentru aceasta intrare.")
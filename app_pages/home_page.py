@@ -1,13 +1,16 @@
-import io
-import ast
-import json
-import base64
+import time
+from datetime import datetime
 import pandas as pd
 import streamlit as st
-from PIL import Image
+from PIL import Image, ImageOps
+from core.analysis_cache import image_key
+from core.analysis_jobs import DONE, FAILED, QueueFullError, get_job_queue
 from core.history_manager import HistoryManager
 from core.vision import VisionAnalyzer
 
+# La cate secunde verificam starea analizei care ruleaza in fundal
+POLL_INTERVAL = 1.0
+
 
 class HomePage:
     def __init__(self, vision: VisionAnalyzer, history_manager: HistoryManager):
@@ -15,43 +18,177 @@ class HomePage:
         self.vision = vision
         self.history = history_manager
 
+    def _run_analysis(self, images, keys, accurate=False):
+        # Rezultatele din cache se afiseaza imediat, fara job de fundal
+        cached = [self.vision.cached(key, accurate) for key in keys]
+        if all(result is not None for result in cached):
+            return cached
+
+        # Fiecare set de poze are un singur job, pastrat intre rerularile paginii
+        jobs = st.session_state.setdefault("analysis_jobs", {})
+        batch_key = "|".join(keys) + (":accurate" if accurate else "")
+
+        # O analiza esuata se afiseaza pana cand utilizatorul cere reincercarea
+        failed = st.session_state.setdefault("failed_analyses", {})
+        if batch_key in failed:
+            return self._show_failed(failed, batch_key)
+
+        queue = get_job_queue()
+        job = queue.get(jobs[batch_key]) if batch_key in jobs else None
+
+        if job is None:
+            try:
+                jobs[batch_key] = queue.submit(
+                    self.history.user,
+                    self.vision.analyze_batch,
+                    [img.copy() for img in images],
+                    keys,
+                    accurate=accurate,
+                )
+            except QueueFullError as e:
+                st.warning(f"Serverul este ocupat, incearca din nou in cateva secunde. ({e})")
+                return None
+            job = queue.get(jobs[batch_key])
+
+        # Jobul terminat cu erori nu mai este refolosit; pastram rezultatul pana la reincercare
+        if job.status == FAILED:
+            del jobs[batch_key]
+            failed[batch_key] = {"error": job.error}
+            return self._show_failed(failed, batch_key)
+
+        if job.status == DONE:
+            if any("error" in result for result in job.result):
+                del jobs[batch_key]
+                failed[batch_key] = {"results": job.result}
+                return self._show_failed(failed, batch_key)
+            return job.result
+
+        # Analiza ruleaza inca: afisam progresul si ce a generat modelul pana acum
+        st.info(job.partial.get("stage", "Analiza este in asteptare..."))
+        for partial in job.partial.get("partials", {}).values():
+            self._render_partial(partial)
+
+        # Verificam din nou peste putin timp
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
+    @staticmethod
+    def _show_failed(failed, batch_key):
+        # Eroarea (sau rezultatele partial reusite) plus un buton pentru o analiza noua
+        entry = failed[batch_key]
+        if "error" in entry:
+            st.error(f"Analiza a esuat: {entry['error']}")
+        else:
+            st.warning("Analiza unora dintre poze a esuat.")
+        if st.button("Reincearca analiza", key=f"retry_{batch_key}"):
+            del failed[batch_key]
+            st.rerun()
+        return entry.get("results")
+
     def render(self):
         # Titlul principal al paginii
         st.title("🍽️ Aplicatia de recunoastere a alimentelor")
 
         # Text explicativ pentru utilizator
         st.write(
-            "Incarca o poza cu mancare si iti dau o estimare detaliata de calorii si macronutrienti."
+            "Incarca una sau mai multe poze cu mancare si iti dau o estimare detaliata "
+            "de calorii si macronutrienti."
         )
 
-        # Uploader pentru imagine (accepta doar formate foto)
-        uploaded = st.file_uploader("Incarca o imagine", type=["jpg", "jpeg", "png"])
+        # Incarcam detectorul in fundal cat timp utilizatorul alege poza
+        self.vision.preload()
+
+        # Uploader pentru imagini (accepta doar formate foto, mai multe farfurii odata)
+        uploaded_files = st.file_uploader(
+            "Incarca imagini",
+            type=["jpg", "jpeg", "png"],
+            accept_multiple_files=True,
+        )
+
+        # Modelul rapid raspunde intai; utilizatorul poate cere direct modelul precis
+        accurate = self.vision.router is not None and st.toggle(
+            "Analiza precisa (model mare, mai lenta)", key="accurate_analysis"
+        )
 
         # Daca nu a fost incarcata nicio imagine, oprim executia
-        if not uploaded:
+        if not uploaded_files:
             return
 
-        # Deschidem imaginea folosind PIL
-        img = Image.open(uploaded)
+        # Deschidem imaginile folosind PIL, rotite corect dupa EXIF (pozele de pe telefon)
+        images = [ImageOps.exif_transpose(Image.open(f)) for f in uploaded_files]
 
-        # Afisam imaginea incarcata in aplicatie
-        st.image(img, caption="Imagine incarcata", use_container_width=True)
+        # Afisam imaginile incarcate in aplicatie
+        cols = st.columns(min(len(images), 3))
+        for i, img in enumerate(images):
+            cols[i % len(cols)].image(img, caption="Imagine incarcata", use_container_width=True)
 
-        # Trimitem imaginea catre modelul AI pentru analiza
-        result = self.vision.analyze(img)
+        # Cheia fiecarei imagini identifica aceeasi poza intre rerulari si reincarcari
+        keys = [image_key(img) for img in images]
 
-        # Incercam sa convertim raspunsul AI in format JSON
-        try:
-            data = json.loads(result)
-        except Exception:
-            # Daca nu este JSON valid, incercam sa il interpretam ca dictionar Python
-            try:
-                data = ast.literal_eval(result)
-            except Exception:
-                # Daca nici asa nu merge, afisam eroarea si oprim executia
-                st.error("AI a returnat un format invalid.")
-                st.write(result)
+        # Pentru mesele aproape identice cu una analizata deja, oferim rezultatul anterior
+        # (nu si cand utilizatorul a cerut explicit analiza precisa)
+        results = {} if accurate else self._offer_similar(images, keys)
+        if results is None:
+            return
+
+        # Trimitem restul imaginilor catre modelul AI intr-o singura analiza (sau din cache)
+        todo = [i for i, key in enumerate(keys) if key not in results]
+        if todo:
+            fresh = self._run_analysis(
+                [images[i] for i in todo], [keys[i] for i in todo], accurate
+            )
+            if fresh is None:
                 return
+            results.update({keys[i]: result for i, result in zip(todo, fresh)})
+
+        for img, key in zip(images, keys):
+            if len(images) > 1:
+                st.markdown("---")
+            self._render_result(img, key, results[key], accurate)
+
+    def _offer_similar(self, images, keys):
+        # Cautam o singura data per poza; alegerea utilizatorului se pastreaza intre rerulari
+        matches = st.session_state.setdefault("similar_matches", {})
+        choices = st.session_state.setdefault("similar_choices", {})
+
+        reused = {}
+        waiting = False
+        for n, (img, key) in enumerate(zip(images, keys)):
+            if key not in matches:
+                # Pozele deja analizate exact la fel nu au nevoie de oferta
+                cached = self.vision.cached(key) is not None
+                matches[key] = None if cached else self.vision.find_similar(self.history.user, img)
+            match = matches[key]
+            if match is None or choices.get(key) == "analyze":
+                continue
+            if choices.get(key) == "reuse":
+                reused[key] = match["result"]
+                continue
+
+            # Utilizatorul decide: rezultatul anterior (imediat) sau o analiza noua
+            waiting = True
+            when = datetime.fromtimestamp(match["analyzed_at"]).strftime("%Y-%m-%d %H:%M")
+            st.info(
+                f"Poza {n + 1} seamana cu o masa analizata la {when}: "
+                f"{match['result'].get('dish_name', 'unknown dish')}."
+            )
+            col_reuse, col_new = st.columns(2)
+            if col_reuse.button("Foloseste rezultatul anterior", key=f"reuse_{key}"):
+                choices[key] = "reuse"
+                st.rerun()
+            if col_new.button("Analizeaza din nou", key=f"analyze_{key}"):
+                choices[key] = "analyze"
+                st.rerun()
+
+        return None if waiting else reused
+
+    def _render_result(self, img, key, data, accurate=False):
+        # Rezultatul este deja parsat si validat de VisionAnalyzer; aici tratam doar erorile
+        if "error" in data:
+            st.error(data["error"])
+            if data.get("raw"):
+                st.write(data["raw"])
+            return
 
         # Extragem informatiile principale din raspunsul AI
         ingredients = data.get("ingredients", [])
@@ -61,21 +198,43 @@ class HomePage:
         total_carbs = data.get("total_carbs", 0)
         total_fat = data.get("total_fat", 0)
 
-        # Convertim imaginea in Base64 pentru a o salva in istoric
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        img_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-
-        # Salvam intrarea in istoricul utilizatorului
-        self.history.add(
-            dish_name,
-            total_cal,
-            total_protein,
-            total_carbs,
-            total_fat,
-            img_b64,
-            ingredients,
-        )
+        # Salvam intrarea in istoricul utilizatorului o singura data per poza,
+        # nu la fiecare rerulare a paginii; tinem minte id-ul mesei si modelul care a dat-o
+        saved = st.session_state.setdefault("saved_analyses", {})
+        entry = saved.get(key)
+        if entry is None:
+            # Salvam imaginea comprimata o singura data; istoricul retine doar hash-ul
+            image_hash = self.history.save_image(img)
+
+            # Masa intra si in indexul pozelor aproape identice ale utilizatorului;
+            # dHash-ul se salveaza cu masa, ca indexul sa fie refacut dupa o repornire
+            image_dhash = self.vision.remember_similar(self.history.user, img, data)
+
+            meal_id = self.history.add(
+                dish_name,
+                total_cal,
+                total_protein,
+                total_carbs,
+                total_fat,
+                image_hash,
+                ingredients,
+                image_dhash=image_dhash,
+            )
+            saved[key] = {"id": meal_id, "accurate": accurate}
+        elif accurate and not entry["accurate"]:
+            # Rezultatul modelului precis inlocuieste masa salvata dupa modelul rapid,
+            # ca istoricul si statisticile sa foloseasca valorile mai bune
+            self.vision.remember_similar(self.history.user, img, data)
+            self.history.replace(
+                entry["id"],
+                dish_name,
+                total_cal,
+                total_protein,
+                total_carbs,
+                total_fat,
+                ingredients,
+            )
+            entry["accurate"] = True
 
         # Afisam numele preparatului detectat
         st.subheader(f"Preparat detectat: {dish_name}")
@@ -88,9 +247,29 @@ class HomePage:
         st.write(f"Proteine: {total_protein} g")
         st.write(f"Carbohidrati: {total_carbs} g")
         st.write(f"Grasimi: {total_fat} g")
+        if data.get("macros_incomplete"):
+            unknown = [ing.get("name", "unknown") for ing in ingredients if ing.get("macros_unknown")]
+            st.warning(
+                "Macronutrientii nu includ ingredientele negasite in tabelul nutritional: "
+                + ", ".join(unknown)
+            )
 
         # Afisam tabelul cu ingredientele detectate
         st.subheader("Ingrediente detectate (tabel):")
+        self._render_ingredients(ingredients)
+
+    def _render_partial(self, partial):
+        # Rezultat partial primit in timp ce modelul inca genereaza raspunsul
+        if not partial:
+            return
+        if "dish_name" in partial:
+            st.subheader(f"Preparat detectat: {partial['dish_name']}")
+        if partial.get("ingredients"):
+            st.caption("Ingrediente identificate pana acum:")
+            self._render_ingredients(partial["ingredients"])
+
+    @staticmethod
+    def _render_ingredients(ingredients):
         if ingredients:
             # Construim DataFrame cu ingredientele si valorile lor nutritionale
             df_ing = pd.DataFrame(
@@ -98,9 +277,10 @@ class HomePage:
                     {
                         "Ingredient": ing.get("name", "unknown"),
                         "Calorii (kcal)": ing.get("calories", 0),
-                        "Proteine (g)": ing.get("protein", 0),
-                        "Carbohidrati (g)": ing.get("carbs", 0),
-                        "Grasimi (g)": ing.get("fat", 0),
+                        # Macronutrientii necunoscuti (ingredient negasit in tabel) apar ca "?"
+                        "Proteine (g)": "?" if ing.get("macros_unknown") else ing.get("protein", 0),
+                        "Carbohidrati (g)": "?" if ing.get("macros_unknown") else ing.get("carbs", 0),
+                        "Grasimi (g)": "?" if ing.get("macros_unknown") else ing.get("fat", 0),
                     }
                     for ing in ingredients
                 ]
@@ -109,4 +289,4 @@ class HomePage:
             st.table(df_ing)
         else:
             # Daca AI nu a detectat ingrediente clare
-            st.info("Nu au fost detectate ingrediente in mod clar.")
\ No newline at end of file
+            st.info("Nu au fost detectate ingrediente in mod clar.")
@@ -30,7 +30,7 @@ class ProfilePage:
         )
 
         # Input pentru limita minima zilnica de calorii
-        self.settings.min_daily = st.number_input(
+        min_daily = st.number_input(
             "Limita minima (kcal/zi)",
             min_value=0,
             max_value=5000,
@@ -38,7 +38,7 @@ class ProfilePage:
         )
 
         # Input pentru limita maxima zilnica de calorii
-        self.settings.max_daily = st.number_input(
+        max_daily = st.number_input(
             "Limita maxima (kcal/zi)",
             min_value=0,
             max_value=5000,
@@ -46,7 +46,7 @@ class ProfilePage:
         )
 
         # Input pentru limita minima saptamanala de calorii
-        self.settings.min_weekly = st.number_input(
+        min_weekly = st.number_input(
             "Limita minima (kcal/saptamana)",
             min_value=0,
             max_value=50000,
@@ -54,12 +54,19 @@ class ProfilePage:
         )
 
         # Input pentru limita maxima saptamanala de calorii
-        self.settings.max_weekly = st.number_input(
+        max_weekly = st.number_input(
             "Limita maxima (kcal/saptamana)",
             min_value=0,
             max_value=50000,
             value=self.settings.max_weekly,
         )
 
-        # Mesaj de confirmare ca setarile au fost actualizate
-        st.success("Setarile au fost salvate.")
\ No newline at end of file
+        # Salvam doar valorile schimbate; un rerun fara modificari nu scrie nimic
+        if self.settings.update(
+            min_daily=min_daily,
+            max_daily=max_daily,
+            min_weekly=min_weekly,
+            max_weekly=max_weekly,
+        ):
+            # Mesaj de confirmare ca setarile au fost actualizate
+            st.success("Setarile au fost salvate.")
\ No newline at end of file
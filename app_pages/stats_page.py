@@ -5,6 +5,7 @@ import plotly.express as px
 import streamlit as st
 from core.history_manager import HistoryManager
 from core.calorie_settings import CalorieSettings
+from core.stats_frame import build_daily_frame, days_range, week_summary
 
 
 class StatsPage:
@@ -26,64 +27,61 @@ class StatsPage:
         show_macros_bar = st.checkbox("Bar chart — evolutia macronutrientilor")
         show_table = st.checkbox("Afiseaza tabelul cu date brute")
 
-        # Preluam istoricul utilizatorului
-        user_history = self.history.get_user_history()
-        if not user_history:
+        # Preluam totalurile zilnice precalculate (un rand per zi, nu per masa)
+        daily_totals = self.history.get_daily_totals()
+        if not daily_totals:
             st.info("Nu exista date pentru grafice.")
             return
 
-        # Construim un dictionar cu totalul de calorii pe fiecare zi
-        calories_per_day = {}
-        for entry in user_history:
-            date = entry["date"]
-            cal = entry.get("total_calories", 0) or 0
-            calories_per_day[date] = calories_per_day.get(date, 0) + cal
-
-        # Sortam datele pentru afisare corecta
-        sorted_dates = sorted(calories_per_day.keys())
-        values = [calories_per_day[d] for d in sorted_dates]
+        # Construim o singura data cadrul coloanar (index datetime64, coloane float32);
+        # toate graficele de mai jos sunt derivate din el
+        frame = build_daily_frame(daily_totals)
+        if frame.empty:
+            st.info("Nu exista date pentru grafice.")
+            return
 
         # Sectiune de rezumat rapid
         st.markdown("---")
         st.subheader("📌 Rezumat rapid")
 
-        total_all = sum(values)  # total calorii inregistrate
-        avg_all = total_all / len(values)  # media zilnica
-        max_day = max(calories_per_day, key=calories_per_day.get)  # ziua cu cele mai multe calorii
+        calories = frame["calories"]
+        total_all = calories.sum()  # total calorii inregistrate
+        avg_all = calories.mean()  # media zilnica
+        max_day = calories.idxmax()  # ziua cu cele mai multe calorii
 
         # Afisam 3 metrici rapide
         colA, colB, colC = st.columns(3)
-        colA.metric("Total inregistrat", f"{total_all} kcal")
+        colA.metric("Total inregistrat", f"{total_all:.0f} kcal")
         colB.metric("Media zilnica", f"{avg_all:.1f} kcal")
-        colC.metric("Zi maxima", f"{calories_per_day[max_day]} kcal", max_day)
+        colC.metric("Zi maxima", f"{calories[max_day]:.0f} kcal", max_day.strftime("%Y-%m-%d"))
 
         # Afisam calendarul saptamanal si raportul saptamanal
-        self._render_week_calendar(calories_per_day)
-        self._render_week_report(calories_per_day)
+        self._render_week_calendar(frame)
+        self._render_week_report()
 
         # Afisam graficele selectate de utilizator
         if show_daily:
-            self._render_daily_bar(sorted_dates, values)
+            self._render_daily_bar(frame)
 
         if show_last_30:
-            self._render_last_30(calories_per_day)
+            self._render_last_30(frame)
 
         if show_trend:
-            self._render_trend(sorted_dates, values)
+            self._render_trend(frame)
 
         if show_pie_month:
-            self._render_pie_month(calories_per_day, sorted_dates)
+            self._render_pie_month(frame)
 
         if show_macros_bar:
-            self._render_macros_bar(user_history, sorted_dates)
+            self._render_macros_bar(frame)
 
         # Afisam tabelul brut daca utilizatorul a bifat optiunea
         if show_table:
             st.markdown("---")
             st.subheader("📄 Date brute")
-            st.write(calories_per_day)
+            st.dataframe(frame, use_container_width=True)
 
-    def _render_week_calendar(self, calories_per_day):
+    def _render_week_calendar(self, frame):
         # Sectiune pentru calendarul saptamanal
         st.markdown("---")
         st.subheader("📅 Calendar saptamanal calorii")
@@ -105,27 +103,23 @@ class StatsPage:
             days=7 * self.settings.week_offset
         )
 
-        # Generam lista celor 7 zile ale saptamanii
-        week_days = [start_of_week + timedelta(days=i) for i in range(7)]
-        week_days_str = [d.strftime("%Y-%m-%d") for d in week_days]
-        week_days_pretty = [d.strftime("%d %b") for d in week_days]
-
-        # Preluam caloriile pentru fiecare zi
-        week_values = [calories_per_day.get(day, 0) for day in week_days_str]
+        # Cele 7 zile ale saptamanii, cu 0 pentru zilele fara mese
+        week = days_range(frame, start_of_week, start_of_week + timedelta(days=6))
+        week_values = week["calories"].to_numpy()
+        week_days_pretty = week.index.strftime("%d %b").tolist()
 
         # Numele scurte ale zilelor
         day_names = ["L", "M", "M", "J", "V", "S", "D"]
-        today_str = today.strftime("%Y-%m-%d")
+        today_index = (today - start_of_week).days
 
         # Afisam fiecare zi in cate o coloana
         cols = st.columns(7)
         for i, c in enumerate(cols):
-            day = week_days_str[i]
-            kcal = week_values[i]
+            kcal = round(float(week_values[i]))
             date_pretty = week_days_pretty[i]
 
             # Stilizare in functie de situatie
-            if day == today_str:
+            if i == today_index:
                 bg = "#FFFDF5"
                 border = "2px solid #E0C080"
                 star = "⭐"
@@ -168,30 +162,22 @@ class StatsPage:
             )
 
         # Salvam contextul saptamanii pentru raportul saptamanal
-        self._week_context = (week_values, week_days, day_names, week_days_pretty)
+        self._week_context = (week, day_names, week_days_pretty)
 
-    def _render_week_report(self, calories_per_day):
+    def _render_week_report(self):
         # Preluam datele generate in calendar
-        week_values, week_days, day_names, week_days_pretty = self._week_context
+        week, day_names, week_days_pretty = self._week_context
 
         st.markdown("---")
         st.subheader("📊 Raport automat saptamanal")
 
-        # Calculam statistici saptamanale
-        week_total = sum(week_values)
-        week_avg = week_total / 7
-
-        days_under = sum(
-            1 for v in week_values if v < self.settings.min_daily and v > 0
-        )
-        days_over = sum(1 for v in week_values if v > self.settings.max_daily)
-        days_zero = sum(1 for v in week_values if v == 0)
-
-        # Cautam ziua cu cele mai multe calorii
-        max_value = max(week_values)
-        max_index = week_values.index(max_value)
-        max_day_name = day_names[max_index]
-        max_day_date = week_days_pretty[max_index]
+        # Calculam statistici saptamanale, vectorizat pe cele 7 zile
+        summary = week_summary(week, self.settings.min_daily, self.settings.max_daily)
+        week_total = summary["total"]
+        week_avg = summary["avg"]
+        days_under = summary["days_under"]
+        days_over = summary["days_over"]
+        days_zero = summary["days_zero"]
 
         # Generam verdictul saptamanii
         if week_total == 0:
@@ -212,7 +198,7 @@ class StatsPage:
 
         # Afisam metricile saptamanii
         col_r1, col_r2, col_r3 = st.columns(3)
-        col_r1.metric("Total saptamana", f"{week_total} kcal")
+        col_r1.metric("Total saptamana", f"{week_total:.0f} kcal")
         col_r2.metric("Media zilnica", f"{week_avg:.1f} kcal")
         col_r3.metric("Zile fara date", f"{days_zero}")
 
@@ -241,21 +227,19 @@ class StatsPage:
             unsafe_allow_html=True,
         )
 
-    def _render_daily_bar(self, sorted_dates, values):
+    def _render_daily_bar(self, frame):
         # Sectiune pentru graficul de calorii pe zile
         st.subheader("📅 Calorii pe zile")
 
-        # Construim DataFrame cu datele sortate
+        # Etichete scurte pentru zilele saptamanii, alese vectorizat dupa dayofweek
+        day_labels = np.array(["lun", "mar", "mie", "joi", "vin", "sam", "dum"])
         df_daily = pd.DataFrame(
             {
-                "date": [pd.to_datetime(d).date() for d in sorted_dates],
-                "calories": values,
+                "date": frame.index,
+                "calories": frame["calories"].to_numpy(),
+                "day": day_labels[frame.index.dayofweek],
             }
-        ).sort_values("date")
-
-        # Etichete scurte pentru zilele saptamanii
-        day_labels = ["lun", "mar", "mie", "joi", "vin", "sam", "dum"]
-        df_daily["day"] = [day_labels[d.weekday()] for d in df_daily["date"]]
+        )
 
         # Grafic bar pentru calorii pe zile
         fig_daily = px.bar(
@@ -325,22 +309,16 @@ class StatsPage:
         # Afisam graficul
         st.plotly_chart(fig_daily, use_container_width=True)
 
-    def _render_last_30(self, calories_per_day):
+    def _render_last_30(self, frame):
         # Sectiune pentru ultimele 30 de zile
         st.subheader("📆 Calorii pe ultimele 30 de zile")
 
         today = datetime.now().date()
-        last_30_days = [today - timedelta(days=i) for i in range(29, -1, -1)]
 
-        # Construim DataFrame cu datele ultimei luni
+        # Reindexam pe ultimele 30 de zile; zilele fara mese primesc 0
+        last_30 = days_range(frame, today - timedelta(days=29), today)
         df_30 = pd.DataFrame(
-            {
-                "date": last_30_days,
-                "calories": [
-                    calories_per_day.get(d.strftime("%Y-%m-%d"), 0)
-                    for d in last_30_days
-                ],
-            }
+            {"date": last_30.index, "calories": last_30["calories"].to_numpy()}
         )
 
         # Grafic linie pentru ultimele 30 de zile
@@ -416,18 +394,18 @@ class StatsPage:
 
         st.plotly_chart(fig30, use_container_width=True)
 
-    def _render_trend(self, sorted_dates, values):
+    def _render_trend(self, frame):
         # Sectiune pentru linia de trend
         st.subheader("📉 Linie de trend")
 
         # Avem nevoie de cel putin 2 valori pentru a calcula trendul
-        if len(values) < 2:
+        if len(frame) < 2:
             st.info("Nu exista suficiente date pentru trend.")
             return
 
         # Pregatim datele pentru regresie liniara
-        x = np.arange(len(values))
-        y = np.array(values)
+        y = frame["calories"].to_numpy(dtype="float64")
+        x = np.arange(len(y))
 
         # Calculam panta (m) si intersectia (b)
         m, b = np.polyfit(x, y, 1)
@@ -435,11 +413,7 @@ class StatsPage:
 
         # Construim DataFrame pentru grafic
         df_trend = pd.DataFrame(
-            {
-                "date": [pd.to_datetime(d).date() for d in sorted_dates],
-                "calories": values,
-                "trend": trendline,
-            }
+            {"date": frame.index, "calories": y, "trend": trendline}
         )
 
         # Afisam graficul
@@ -454,55 +428,37 @@ class StatsPage:
         else:
             st.info("Trend stabil")
 
-    def _render_pie_month(self, calories_per_day, sorted_dates):
+    def _render_pie_month(self, frame):
         # Sectiune pentru raportul lunar
         st.markdown("---")
         st.subheader("📆 Raport lunar")
 
         today = datetime.now().date()
-        last_month = today - timedelta(days=30)
+        last_month = pd.Timestamp(today - timedelta(days=30))
 
-        # Filtram doar datele din ultimele 30 de zile
-        monthly_data = {
-            d: calories_per_day[d]
-            for d in sorted_dates
-            if datetime.strptime(d, "%Y-%m-%d").date() >= last_month
-        }
+        # Filtram doar datele din ultimele 30 de zile (felie pe indexul sortat)
+        monthly = frame.loc[last_month:, "calories"]
 
         # Daca exista date, afisam pie chart
-        if monthly_data:
+        if not monthly.empty:
             df_month = pd.DataFrame(
-                {"Zi": list(monthly_data.keys()), "Calorii": list(monthly_data.values())}
+                {"Zi": monthly.index.strftime("%Y-%m-%d"), "Calorii": monthly.to_numpy()}
             )
             st.plotly_chart(px.pie(df_month, names="Zi", values="Calorii"))
         else:
             st.info("Nu exista date pentru ultimele 30 de zile.")
 
-    def _render_macros_bar(self, user_history, sorted_dates):
+    def _render_macros_bar(self, frame):
         # Sectiune pentru evolutia macronutrientilor
         st.markdown("---")
         st.subheader("💪 Evolutia macronutrientilor")
 
-        # Dictionare pentru macronutrienti pe zi
-        protein_per_day = {}
-        carbs_per_day = {}
-        fat_per_day = {}
-
-        # Agregam macronutrientii pentru fiecare zi
-        for entry in user_history:
-            date = entry["date"]
-            protein_per_day[date] = protein_per_day.get(date, 0) + entry.get("total_protein", 0)
-            carbs_per_day[date] = carbs_per_day.get(date, 0) + entry.get("total_carbs", 0)
-            fat_per_day[date] = fat_per_day.get(date, 0) + entry.get("total_fat", 0)
-
-        # Construim DataFrame pentru grafic
-        df_macros = pd.DataFrame(
-            {
-                "date": sorted_dates,
-                "Proteine": [protein_per_day.get(d, 0) for d in sorted_dates],
-                "Carbohidrati": [carbs_per_day.get(d, 0) for d in sorted_dates],
-                "Grasimi": [fat_per_day.get(d, 0) for d in sorted_dates],
-            }
+        # Macronutrientii sunt deja agregati pe zile, sortati dupa data
+        df_macros = (
+            frame[["protein", "carbs", "fat"]]
+            .rename(columns={"protein": "Proteine", "carbs": "Carbohidrati", "fat": "Grasimi"})
+            .rename_axis("date")
+            .reset_index()
         )
 
         # Afisam bar chart grupat
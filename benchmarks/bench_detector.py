@@ -0,0 +1,104 @@
+"""Compara backend-urile detectorului (latenta si memoria RSS) pe CPU.
+
+Fiecare backend ruleaza intr-un proces separat, ca memoria sa fie masurata corect.
+Modelele ONNX / OpenVINO se obtin cu `python -m core.detectors onnx|onnx-int8|openvino`.
+
+Rulare din radacina proiectului:
+
+    python -m benchmarks.bench_detector \\
+        ultralytics:yolov8s.pt onnx:yolov8s.onnx onnx:yolov8s.int8.onnx \\
+        openvino:yolov8s_int8_openvino_model --threads 4
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+
+def rss_mb() -> float:
+    # RSS curent al procesului (Linux); ru_maxrss este doar varful
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(spec: str, threads: int, runs: int, batch: int) -> dict:
+    import numpy as np
+    from PIL import Image
+
+    from core.detectors import create_detector
+
+    backend, model = spec.split(":", 1)
+    before = rss_mb()
+
+    start = time.perf_counter()
+    detector = create_detector(backend, model, threads)
+    load_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (960, 1280, 3), dtype=np.uint8))
+        for _ in range(batch)
+    ]
+    detector(images)  # incalzire
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        detector(images)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "spec": spec,
+        "load_s": load_s,
+        "median_ms": statistics.median(timings),
+        "p90_ms": sorted(timings)[int(0.9 * (len(timings) - 1))],
+        "rss_mb": rss_mb(),
+        "rss_model_mb": rss_mb() - before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("specs", nargs="*", default=["ultralytics:yolov8s.pt"])
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.specs[0], args.threads, args.runs, args.batch)))
+        return
+
+    print(f"{'backend:model':45s} {'incarcare':>10s} {'median':>9s} {'p90':>9s} {'RSS':>9s}")
+    for spec in args.specs:
+        out = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.bench_detector", spec, "--child",
+                "--threads", str(args.threads), "--runs", str(args.runs),
+                "--batch", str(args.batch),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if out.returncode != 0:
+            print(f"{spec:45s} eroare: {out.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{spec:45s} {r['load_s']:9.2f}s {r['median_ms']:7.1f}ms "
+            f"{r['p90_ms']:7.1f}ms {r['rss_mb']:7.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
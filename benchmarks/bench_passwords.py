@@ -0,0 +1,87 @@
+"""Masoara costul hash-urilor de parola: parametrii calibrati, timpul unei
+verificari si cate login-uri pe secunda (total si per nucleu) suporta procesul.
+
+Login-urile trec prin AuthManager, pe o baza SQLite temporara, din mai multe
+thread-uri simultan (ca sesiunile Streamlit).
+
+Rulare din radacina proiectului:
+
+    python -m benchmarks.bench_passwords --budget-ms 100 --threads 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.auth_manager import AuthManager
+from core.passwords import PasswordHasher, legacy_hash
+from core.user_store import SqliteUserRepository
+
+
+def login_rate(auth: AuthManager, users, threads: int, seconds: float) -> float:
+    # Fiecare thread face login-uri in bucla pana expira timpul
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset: int) -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            name = users[(offset + done) % len(users)]
+            assert auth.login(name, "parola-" + name) == name
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(worker, range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scheme", choices=["scrypt", "pbkdf2"], default="scrypt")
+    parser.add_argument("--budget-ms", type=float, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    start = time.perf_counter()
+    hasher = PasswordHasher(args.scheme, args.budget_ms)
+    params = hasher.params
+    print(f"{args.scheme}: {params} (calibrat in {time.perf_counter() - start:.2f}s)")
+
+    stored = hasher.hash("parola")
+    timings = []
+    for _ in range(10):
+        t = time.perf_counter()
+        hasher.verify("parola", stored)
+        timings.append(time.perf_counter() - t)
+    print(f"o verificare: {statistics.median(timings) * 1000:.1f} ms (buget {args.budget_ms:.0f} ms)")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        users = SqliteUserRepository(os.path.join(workdir, "users.db"))
+        auth = AuthManager(users, hasher)
+        names = [f"user{i}" for i in range(args.users)]
+
+        # Jumatate din conturi pornesc cu hash-ul vechi, ca sa masuram si refacerea lui
+        for i, name in enumerate(names):
+            password = "parola-" + name
+            users.create(name, legacy_hash(password) if i % 2 else hasher.hash(password))
+
+        start = time.perf_counter()
+        for name in names[1::2]:
+            auth.login(name, "parola-" + name)
+        print(f"primul login cu rehash SHA-256 -> {args.scheme}: "
+              f"{(time.perf_counter() - start) / len(names[1::2]) * 1000:.1f} ms")
+        legacy_left = sum(not users.get(n)["password_hash"].startswith(("scrypt$", "pbkdf2")) for n in names)
+        print(f"hash-uri vechi ramase: {legacy_left}")
+
+        rate = login_rate(auth, names, args.threads, args.seconds)
+        print(f"\n{args.threads} thread-uri, {cores} nuclee: {rate:.1f} login/s, {rate / cores:.1f} login/s per nucleu")
+
+
+if __name__ == "__main__":
+    main()
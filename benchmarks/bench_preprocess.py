@@ -0,0 +1,98 @@
+"""Masoara costul pregatirii imaginii pentru Ollama: vechiul PNG la rezolutie completa
+fata de preprocesarea din core.preprocess (micsorare + JPEG/WebP).
+
+Rulare din radacina proiectului:
+
+    python -m benchmarks.bench_preprocess --width 4032 --height 3024
+    python -m benchmarks.bench_preprocess --image poza.jpg --ollama
+
+Cu --ollama se trimite fiecare variant si la serverul Ollama configurat
+(OLLAMA_URLS), pentru a masura si latenta de la un capat la altul.
+"""
+import argparse
+import base64
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from core.preprocess import ImagePreprocessor
+
+
+def synthetic_photo(width: int, height: int) -> Image.Image:
+    # Gradient + zgomot: se comprima asemanator cu o fotografie reala
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))],
+        axis=-1,
+    )
+    noise = rng.integers(-20, 20, size=base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype("uint8"), "RGB")
+
+
+def legacy_encode(image: Image.Image) -> str:
+    # Vechiul drum: PNG la rezolutie completa, apoi Base64
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def ask_ollama(img_b64: str) -> float:
+    from core.ollama_client import OllamaClient
+    from core.vision import VisionAnalyzer
+
+    payload = {
+        "model": "qwen3-vl:8b",
+        "stream": False,
+        "messages": [
+            {"role": "user", "content": VisionAnalyzer._prompt(), "images": [img_b64]}
+        ],
+        "options": {"temperature": 0.2, "num_predict": 150},
+    }
+    start = time.perf_counter()
+    OllamaClient().chat(payload).json()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", help="fotografie reala (implicit: imagine sintetica)")
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ollama", action="store_true", help="masoara si latenta Ollama")
+    args = parser.parse_args()
+
+    image = Image.open(args.image) if args.image else synthetic_photo(args.width, args.height)
+    image.load()
+    pre = ImagePreprocessor()
+
+    variants = {
+        "PNG complet (vechi)": lambda: legacy_encode(image),
+        f"{pre.llm_format} {pre.llm_long_edge}px q{pre.llm_quality}": (
+            lambda: pre.encode_for_llm(pre.prepare(image))
+        ),
+    }
+
+    print(f"imagine: {image.width}x{image.height}")
+    for name, fn in variants.items():
+        seconds, payload = timed(fn, args.repeat)
+        line = f"{name:24s} encode {seconds * 1000:8.1f} ms   payload {len(payload) / 1024:9.1f} KiB"
+        if args.ollama:
+            line += f"   ollama {ask_ollama(payload):6.1f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
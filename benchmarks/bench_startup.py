@@ -0,0 +1,118 @@
+"""Masoara pornirea aplicatiei: timpul de import al lui `main` (stil `-X importtime`)
+si cat dureaza, de la pornirea procesului, afisarea paginilor Login si Istoric.
+
+Fiecare masuratoare ruleaza intr-un proces nou, ca nimic sa nu fie deja importat.
+Ca reper, masuram si o aplicatie Streamlit goala: importul lui Streamlit (care aduce
+deja PIL si plotly) si AppTest costa singure peste 1 s, deci sub pragul acesta nu se
+poate cobori din codul aplicatiei. Masurat pe masina de dezvoltare (cel mai bun din 3):
+aplicatia goala 1.41 s, Login 1.45 s, Istoric 2.18 s. Login este deci la ~50 ms de
+reper; Istoric importa in plus pandas pentru tabel (~0.7 s), deci nu este sub o secunda.
+
+Rulare din radacina proiectului:
+
+    python -m benchmarks.bench_startup --top 15
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module grele care nu ar trebui importate inainte de pagina care le foloseste
+HEAVY = ("numpy", "pandas", "plotly", "PIL", "requests", "openai", "torch", "ultralytics", "onnxruntime")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Aplicatia goala folosita ca reper
+_EMPTY_APP = "import streamlit as st\nst.write('reper')\n"
+
+# Scriptul copil: ruleaza main.py cu AppTest pe pagina ceruta, fara server
+_RENDER = """
+import sys
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({main!r}, default_timeout=60)
+if {page!r}:
+    at.session_state["user"] = "bench"
+    at.session_state["page"] = {page!r}
+at.run()
+assert not at.exception, at.exception
+print("MODULE:", ",".join(sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy!r}))))
+"""
+
+
+def import_profile():
+    # -X importtime scrie pe stderr: timp propriu | timp cumulat | modul (indentat dupa adancime)
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, total, indent, name = match.groups()
+            rows.append((name, int(own), int(total), len(indent) // 2))
+    return rows
+
+
+def render_time(page: str, workdir: str, app: str = os.path.join(ROOT, "main.py")):
+    # Timpul total al unui proces nou care importa si afiseaza pagina
+    script = _RENDER.format(root=ROOT, main=app, page=page, heavy=HEAVY)
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=workdir, capture_output=True, text=True
+    )
+    seconds = time.perf_counter() - start
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    modules = [line for line in out.stdout.splitlines() if line.startswith("MODULE:")]
+    return seconds, modules[-1].split(":", 1)[1].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = import_profile()
+    total = next((total for name, _, total, depth in rows if name == "main" and depth == 0), 0)
+    print(f"import main: {total / 1000:.0f} ms")
+
+    # Importurile facute direct de main (depth 1), cu tot ce aduc dupa ele
+    print(f"\nCele mai scumpe {args.top} importuri directe ale lui main (timp cumulat):")
+    direct = [row for row in rows if row[3] == 1]
+    for name, own, cumulative, depth in sorted(direct, key=lambda r: -r[2])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    loaded = sorted({name.split(".")[0] for name, *_ in rows} & set(HEAVY))
+    print(f"\nModule grele importate de main: {', '.join(loaded) or 'niciunul'}")
+
+    # Baza de date si blob-urile se creeaza intr-un director temporar, nu in proiect
+    with tempfile.TemporaryDirectory() as workdir:
+        empty = os.path.join(workdir, "empty_app.py")
+        with open(empty, "w", encoding="utf-8") as f:
+            f.write(_EMPTY_APP)
+
+        for label, page, app in (
+            ("Aplicatie Streamlit goala (reper)", "", empty),
+            ("Login", "", os.path.join(ROOT, "main.py")),
+            ("Istoric", "Istoric", os.path.join(ROOT, "main.py")),
+        ):
+            timings = []
+            for _ in range(args.runs):
+                seconds, modules = render_time(page, workdir, app)
+                timings.append(seconds)
+            print(f"\n{label}: {min(timings) * 1000:.0f} ms de la pornirea procesului (cel mai bun din {args.runs})")
+            print(f"  module grele incarcate: {modules}")
+
+
+if __name__ == "__main__":
+    main()
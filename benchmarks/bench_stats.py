@@ -0,0 +1,113 @@
+"""Compara agregarea veche (bucle pe dictionare) cu cadrul vectorizat din core.stats_frame.
+
+Rulare din radacina proiectului:
+
+    python -m benchmarks.bench_stats --meals 100000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.stats_frame import daily_frame_from_meals, days_range, week_summary
+
+
+def make_meals(count: int, days: int = 1095):
+    # Mese sintetice raspandite pe ultimii ~3 ani
+    rng = random.Random(42)
+    today = datetime.now().date()
+    meals = []
+    for _ in range(count):
+        day = today - timedelta(days=rng.randrange(days))
+        meals.append(
+            {
+                "date": day.strftime("%Y-%m-%d"),
+                "total_calories": rng.uniform(100, 1200),
+                "total_protein": rng.uniform(0, 60),
+                "total_carbs": rng.uniform(0, 120),
+                "total_fat": rng.uniform(0, 50),
+            }
+        )
+    return meals
+
+
+def legacy_stats(meals, min_daily=1800, max_daily=2500):
+    # Reproducerea fidela a calculelor din StatsPage inainte de vectorizare
+    calories_per_day = {}
+    for entry in meals:
+        date = entry["date"]
+        calories_per_day[date] = calories_per_day.get(date, 0) + entry.get("total_calories", 0)
+    sorted_dates = sorted(calories_per_day.keys())
+    values = [calories_per_day[d] for d in sorted_dates]
+
+    today = datetime.now().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    week_days = [start_of_week + timedelta(days=i) for i in range(7)]
+    week_values = [calories_per_day.get(d.strftime("%Y-%m-%d"), 0) for d in week_days]
+    sum(1 for v in week_values if v < min_daily and v > 0)
+    sum(1 for v in week_values if v > max_daily)
+
+    [pd.to_datetime(d).date() for d in sorted_dates]
+    last_30 = [today - timedelta(days=i) for i in range(29, -1, -1)]
+    [calories_per_day.get(d.strftime("%Y-%m-%d"), 0) for d in last_30]
+    np.polyfit(np.arange(len(values)), np.array(values), 1)
+    last_month = today - timedelta(days=30)
+    {
+        d: calories_per_day[d]
+        for d in sorted_dates
+        if datetime.strptime(d, "%Y-%m-%d").date() >= last_month
+    }
+
+    protein, carbs, fat = {}, {}, {}
+    for entry in meals:
+        date = entry["date"]
+        protein[date] = protein.get(date, 0) + entry.get("total_protein", 0)
+        carbs[date] = carbs.get(date, 0) + entry.get("total_carbs", 0)
+        fat[date] = fat.get(date, 0) + entry.get("total_fat", 0)
+
+
+def vectorized_stats(meals, min_daily=1800, max_daily=2500):
+    # Acelasi set de rezultate, derivat dintr-un singur cadru coloanar
+    frame = daily_frame_from_meals(meals)
+    today = datetime.now().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    week = days_range(frame, start_of_week, start_of_week + timedelta(days=6))
+    week_summary(week, min_daily, max_daily)
+    frame.index.dayofweek
+    days_range(frame, today - timedelta(days=29), today)
+    y = frame["calories"].to_numpy(dtype="float64")
+    np.polyfit(np.arange(len(y)), y, 1)
+    frame.loc[pd.Timestamp(today - timedelta(days=30)):, "calories"]
+    frame[["protein", "carbs", "fat"]]
+
+
+def best_of(fn, meals, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(meals)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meals", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    meals = make_meals(args.meals)
+    legacy = best_of(legacy_stats, meals, args.repeat)
+    vectorized = best_of(vectorized_stats, meals, args.repeat)
+
+    print(f"mese: {args.meals}")
+    print(f"bucle (vechi):  {legacy * 1000:8.1f} ms")
+    print(f"vectorizat:     {vectorized * 1000:8.1f} ms")
+    print(f"accelerare:     {legacy / vectorized:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
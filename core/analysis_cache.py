@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+# Directorul unde sunt salvate rezultatele analizelor
+CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", os.path.join("cache", "analysis"))
+
+# Cate rezultate tinem in memorie (LRU)
+MEMORY_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MEMORY_ENTRIES", "256"))
+
+# Dimensiunea maxima a cache-ului de pe disc, in bytes
+DISK_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_DISK_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Marimea cache-ului de pe disc este tinuta incremental; o recalculam din director
+# (si evacuam) doar cand depaseste limita sau, periodic, la atatea scrieri
+DISK_RESCAN_EVERY = int(os.environ.get("ANALYSIS_CACHE_DISK_RESCAN_EVERY", "100"))
+
+
+def image_key(image: Image.Image) -> str:
+    """Cheie stabila pentru o imagine, calculata din pixeli, mod si dimensiune."""
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.width}x{image.height}:".encode("utf-8"))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """Cache pe doua niveluri (memorie LRU + disc) pentru rezultatele analizelor.
+
+    Erorile de disc (spatiu plin, permisiuni) nu opresc analiza: rezultatul
+    ramane doar in memorie.
+    """
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIR,
+        memory_entries: int = MEMORY_ENTRIES,
+        disk_max_bytes: int = DISK_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Marimea estimata a fisierelor de pe disc (None pana la prima scanare)
+        self._disk_bytes: Optional[int] = None
+        self._puts = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        # 1. Cautam in memorie
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        # 2. Cautam pe disc
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Actualizam timpul de acces, folosit la evacuarea de pe disc
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        self._remember(key, data)
+
+        # Scriem atomic: fisier temporar + redenumire
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Analiza a reusit; doar cache-ul de pe disc lipseste
+            print(f"⚠️ Nu am putut salva rezultatul in cache-ul de pe disc: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._puts += 1
+            if self._disk_bytes is None or self._puts % DISK_RESCAN_EVERY == 0:
+                rescan = True
+            else:
+                self._disk_bytes += size - old_size
+                rescan = self._disk_bytes > self.disk_max_bytes
+        if rescan:
+            self._evict_disk()
+
+    def _remember(self, key: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        # Stergem cele mai vechi fisiere pana cand incapem in limita de spatiu
+        entries = []
+        total = 0
+        try:
+            scan = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in scan:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total > self.disk_max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.disk_max_bytes:
+                    break
+
+        # Marimea reala, de la care continuam numaratoarea incrementala
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Cate analize ruleaza in paralel in tot procesul
+MAX_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+
+# Cate analize pot fi in asteptare + in lucru inainte sa refuzam cereri noi
+MAX_PENDING = int(os.environ.get("ANALYSIS_MAX_PENDING", "16"))
+
+# Cate analize active poate avea un singur utilizator
+PER_USER_LIMIT = int(os.environ.get("ANALYSIS_PER_USER_LIMIT", "2"))
+
+# Dupa cate secunde uitam joburile terminate
+JOB_TTL = int(os.environ.get("ANALYSIS_JOB_TTL", "600"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+
+
+class QueueFullError(Exception):
+    """Coada este plina sau utilizatorul are deja prea multe analize active."""
+
+
+class Job:
+    def __init__(self, job_id: str, user: str):
+        self.id = job_id
+        self.user = user
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        # Rezultate partiale raportate de analiza in timp ce ruleaza
+        self.partial: Dict[str, Any] = {}
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (PENDING, RUNNING)
+
+
+class JobQueue:
+    """Pool de fundal pentru analize, cu limita globala si per utilizator."""
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        max_pending: int = MAX_PENDING,
+        per_user_limit: int = PER_USER_LIMIT,
+        ttl: int = JOB_TTL,
+    ):
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """Pune analiza in coada si intoarce id-ul jobului.
+
+        Functia primeste in plus argumentul `on_progress`, prin care poate
+        raporta rezultate partiale.
+        """
+        with self._lock:
+            self._forget_expired()
+
+            active = [j for j in self._jobs.values() if j.active]
+            if len(active) >= self.max_pending:
+                raise QueueFullError("Prea multe analize in asteptare.")
+            if sum(1 for j in active if j.user == user) >= self.per_user_limit:
+                raise QueueFullError("Ai deja analize in curs.")
+
+            job = Job(uuid.uuid4().hex, user)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        job.status = RUNNING
+
+        def on_progress(partial: Dict[str, Any]) -> None:
+            # Inlocuim dictionarul intreg, ca pagina sa citeasca mereu o stare consistenta
+            job.partial = {**job.partial, **partial}
+
+        try:
+            job.result = fn(*args, on_progress=on_progress, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+
+    def _forget_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished is not None and now - job.finished > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Coada unica de analize a procesului."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
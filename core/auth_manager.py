@@ -1,19 +1,43 @@
-from auth import authenticate, create_account
+from typing import Optional
+
+from core.passwords import PasswordHasher, get_password_hasher
+from core.user_store import UserRepository, get_user_repository
 
 
 class AuthManager:
+    def __init__(
+        self,
+        users: Optional[UserRepository] = None,
+        hasher: Optional[PasswordHasher] = None,
+    ):
+        # Depozitul de utilizatori (SQLite implicit, vezi core.user_store)
+        self.users = users or get_user_repository()
+        # Hash-urile de parola (scrypt/PBKDF2 calibrate, vezi core.passwords)
+        self.hasher = hasher or get_password_hasher()
+
     def login(self, username: str, password: str):
         # Daca lipseste username sau parola, intoarcem None (login esuat)
         if not username or not password:
             return None
 
-        # Apelam functia authenticate din modulul auth
-        return authenticate(username, password)
+        # Cautam utilizatorul dupa cheia primara, fara sa citim toti utilizatorii
+        user = self.users.get(username)
+
+        # Verificam parola in pool-ul de hashing, nu direct pe thread-ul sesiunii; pentru
+        # un username inexistent verificam un hash fals, ca raspunsul sa dureze la fel
+        stored = user["password_hash"] if user is not None else self.hasher.dummy_hash
+        if not self.hasher.verify(password, stored) or user is None:
+            return None
+
+        # Hash-urile vechi (SHA-256) sau mai slabe sunt refacute (tot in pool) cat timp avem parola
+        if self.hasher.needs_rehash(stored):
+            self.users.update_hash(username, self.hasher.hash(password))
+        return username
 
     def register(self, username: str, password: str) -> bool:
         # Daca lipseste username sau parola, nu putem crea cont
         if not username or not password:
             return False
 
-        # Apelam functia create_account din modulul auth
-        return create_account(username, password)
\ No newline at end of file
+        # Hash-ul se calculeaza in pool; inserarea este atomica: doua inregistrari simultane nu pot lua acelasi username
+        return self.users.create(username, self.hasher.hash(password))
@@ -0,0 +1,122 @@
+import base64
+import io
+import os
+import threading
+from typing import Optional
+
+from PIL import Image, features
+
+from core.analysis_cache import image_key
+
+# Directorul unde sunt salvate imaginile meselor
+BLOB_DIR = os.environ.get("BLOB_DIR", "blobs")
+
+# Formatul si calitatea imaginilor salvate (WEBP sau JPEG)
+IMAGE_FORMAT = os.environ.get("BLOB_IMAGE_FORMAT", "WEBP").upper()
+IMAGE_QUALITY = int(os.environ.get("BLOB_IMAGE_QUALITY", "85"))
+
+# Latura maxima si calitatea miniaturilor afisate in istoric
+THUMB_SIZE = int(os.environ.get("BLOB_THUMB_SIZE", "256"))
+THUMB_QUALITY = int(os.environ.get("BLOB_THUMB_QUALITY", "70"))
+
+_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+class BlobStore:
+    """Imagini salvate pe disc o singura data, adresate prin hash-ul continutului."""
+
+    def __init__(
+        self,
+        directory: str = BLOB_DIR,
+        image_format: str = IMAGE_FORMAT,
+        quality: int = IMAGE_QUALITY,
+        thumb_size: int = THUMB_SIZE,
+        thumb_quality: int = THUMB_QUALITY,
+    ):
+        # Daca Pillow nu are suport WEBP, folosim JPEG
+        if image_format == "WEBP" and not features.check("webp"):
+            image_format = "JPEG"
+        if image_format not in _EXTENSIONS:
+            raise ValueError(f"Format de imagine nesuportat: {image_format}")
+
+        self.directory = directory
+        self.image_format = image_format
+        self.quality = quality
+        self.thumb_size = thumb_size
+        self.thumb_quality = thumb_quality
+        self.ext = _EXTENSIONS[image_format]
+
+    def _dir(self, image_hash: str) -> str:
+        # Impartim fisierele in subdirectoare dupa primele 2 caractere ale hash-ului
+        return os.path.join(self.directory, image_hash[:2])
+
+    def image_path(self, image_hash: str) -> str:
+        return os.path.join(self._dir(image_hash), f"{image_hash}.{self.ext}")
+
+    def thumbnail_path(self, image_hash: str) -> str:
+        return os.path.join(self._dir(image_hash), f"{image_hash}_thumb.{self.ext}")
+
+    def exists(self, image_hash: str) -> bool:
+        return os.path.exists(self.image_path(image_hash))
+
+    def _write(self, image: Image.Image, path: str, quality: int) -> None:
+        # Scriem atomic, ca o imagine pe jumatate scrisa sa nu fie niciodata citita
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, format=self.image_format, quality=quality)
+        os.replace(tmp_path, path)
+
+    def _make_thumbnail(self, image: Image.Image, image_hash: str) -> None:
+        thumb = image.copy()
+        thumb.thumbnail((self.thumb_size, self.thumb_size))
+        self._write(thumb, self.thumbnail_path(image_hash), self.thumb_quality)
+
+    def thumbnail(self, image_hash: str) -> Optional[str]:
+        """Calea miniaturii; daca lipseste (ex. dupa schimbarea marimii), o generam acum."""
+        path = self.thumbnail_path(image_hash)
+        if os.path.exists(path):
+            return path
+        if not self.exists(image_hash):
+            return None
+        with Image.open(self.image_path(image_hash)) as image:
+            self._make_thumbnail(image.convert("RGB"), image_hash)
+        return path
+
+    def put(self, image: Image.Image) -> str:
+        """Salveaza imaginea (si miniatura) si intoarce hash-ul ei."""
+        rgb = image.convert("RGB")
+        image_hash = image_key(rgb)
+
+        # Aceeasi poza incarcata de mai multe ori se salveaza o singura data
+        if self.exists(image_hash):
+            return image_hash
+
+        os.makedirs(self._dir(image_hash), exist_ok=True)
+
+        self._make_thumbnail(rgb, image_hash)
+
+        # Imaginea completa se scrie ultima: existenta ei marcheaza blob-ul ca fiind complet
+        self._write(rgb, self.image_path(image_hash), self.quality)
+        return image_hash
+
+    def put_b64(self, img_b64: str) -> Optional[str]:
+        """Converteste o imagine Base64 veche intr-un blob."""
+        try:
+            image = Image.open(io.BytesIO(base64.b64decode(img_b64)))
+            image.load()
+        except Exception:
+            return None
+        return self.put(image)
+
+
+_blobs: Optional[BlobStore] = None
+_blobs_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Instanta unica a depozitului de imagini."""
+    global _blobs
+    if _blobs is None:
+        with _blobs_lock:
+            if _blobs is None:
+                _blobs = BlobStore()
+    return _blobs
@@ -1,19 +1,164 @@
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.history_store import HistoryStore, get_store
+
+# Dupa cate secunde fara alte modificari scriem setarile in baza de date
+SETTINGS_DEBOUNCE = float(os.environ.get("SETTINGS_DEBOUNCE", "2"))
+
+# Limitele calorice salvate per utilizator si valorile lor implicite
+DEFAULTS = {
+    "min_daily": 1800,      # limita minima zilnica
+    "max_daily": 2500,      # limita maxima zilnica
+    "min_weekly": 12000,    # limita minima saptamanala
+    "max_weekly": 17500,    # limita maxima saptamanala
+}
+
+
+class SettingsWriter:
+    """Scrie setarile in fundal (write-behind), cu debounce.
+
+    Modificarile unui utilizator se aduna in memorie; dupa `debounce` secunde
+    fara alte modificari sunt scrise toate intr-o singura tranzactie.
+    """
+
+    def __init__(self, store: Optional[HistoryStore] = None, debounce: float = SETTINGS_DEBOUNCE):
+        self.store = store or get_store()
+        self.debounce = debounce
+        # Valorile schimbate per utilizator si momentul la care le scriem
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._due: Dict[str, float] = {}
+        self._writes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+
+    def schedule(self, user: str, values: Dict[str, int]) -> None:
+        """Programeaza scrierea valorilor; fiecare modificare noua amana scrierea."""
+        with self._cond:
+            self._pending.setdefault(user, {}).update(values)
+            self._due[user] = time.monotonic() + self.debounce
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, user: str) -> Dict[str, int]:
+        """Valorile inca nescrise ale utilizatorului (vazute si de sesiunile noi)."""
+        with self._cond:
+            return dict(self._pending.get(user, {}))
+
+    def _take(self, users) -> Dict[str, Dict[str, int]]:
+        # Scoatem din coada (sub lock) valorile de scris
+        batch = {}
+        for user in users:
+            batch[user] = self._pending.pop(user)
+            del self._due[user]
+        return batch
+
+    def _write(self, batch: Dict[str, Dict[str, int]]) -> None:
+        for user, values in batch.items():
+            try:
+                self.store.save_settings(user, values)
+                self._writes += 1
+            except Exception as e:
+                print(f"⚠️ Nu am putut salva setarile pentru {user}: {e}")
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due:
+                    self._cond.wait()
+                now = time.monotonic()
+                ready = [user for user, due in self._due.items() if due <= now]
+                if not ready:
+                    self._cond.wait(min(self._due.values()) - now)
+                    continue
+                batch = self._take(ready)
+            self._write(batch)
+
+    def flush(self) -> None:
+        """Scrie imediat tot ce este in asteptare (apelat si la oprirea procesului)."""
+        with self._cond:
+            batch = self._take(list(self._pending))
+        self._write(batch)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"pending": len(self._pending), "writes": self._writes}
+
+
+_writer: Optional[SettingsWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_settings_writer() -> SettingsWriter:
+    """Scriitorul de setari comun pentru tot procesul."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SettingsWriter()
+                atexit.register(_writer.flush)
+    return _writer
+
+
 class CalorieSettings:
-    def __init__(self, session_state):
+    def __init__(
+        self,
+        session_state,
+        user: Optional[str] = None,
+        writer: Optional[SettingsWriter] = None,
+    ):
         # Salvam obiectul session_state pentru a pastra setarile intre pagini
         self.session = session_state
 
+        # Fara utilizator (sau fara writer), setarile raman doar in sesiune
+        self.user = user
+        self.writer = writer or (get_settings_writer() if user else None)
+
         # Initializam valorile implicite daca nu exista deja in sesiune
         self._init_defaults()
 
+        # Incarcam setarile salvate o singura data per sesiune (si per utilizator)
+        if self.writer is not None and self.session.get("settings_user") != user:
+            self._load()
+
     def _init_defaults(self):
         # Setam valori default doar daca nu exista deja in session_state
-        self.session.setdefault("min_daily", 1800)      # limita minima zilnica
-        self.session.setdefault("max_daily", 2500)      # limita maxima zilnica
-        self.session.setdefault("min_weekly", 12000)    # limita minima saptamanala
-        self.session.setdefault("max_weekly", 17500)    # limita maxima saptamanala
+        for key, value in DEFAULTS.items():
+            self.session.setdefault(key, value)
         self.session.setdefault("week_offset", 0)       # offset pentru navigarea intre saptamani
 
+    def _load(self):
+        # Valorile din baza, peste care punem modificarile inca nescrise de alte sesiuni
+        saved = {
+            **DEFAULTS,
+            **self.writer.store.get_settings(self.user),
+            **self.writer.pending(self.user),
+        }
+        for key in DEFAULTS:
+            self.session[key] = saved[key]
+        self.session["settings_user"] = self.user
+
+    def _set(self, key: str, value: int) -> bool:
+        # Scriem doar cand valoarea chiar se schimba, nu la fiecare rerun
+        if self.session[key] == value:
+            return False
+        self.session[key] = value
+        if self.writer is not None:
+            self.writer.schedule(self.user, {key: value})
+        return True
+
+    def update(self, **values: int) -> bool:
+        """Actualizeaza mai multe limite; True daca cel putin una s-a schimbat."""
+        changed = False
+        for key, value in values.items():
+            changed |= self._set(key, value)
+        return changed
+
     # Getter si setter pentru limita minima zilnica
     @property
     def min_daily(self) -> int:
@@ -21,7 +166,7 @@ class CalorieSettings:
 
     @min_daily.setter
     def min_daily(self, value: int):
-        self.session["min_daily"] = value
+        self._set("min_daily", value)
 
     # Getter si setter pentru limita maxima zilnica
     @property
@@ -30,7 +175,7 @@ class CalorieSettings:
 
     @max_daily.setter
     def max_daily(self, value: int):
-        self.session["max_daily"] = value
+        self._set("max_daily", value)
 
     # Getter si setter pentru limita minima saptamanala
     @property
@@ -39,7 +184,7 @@ class CalorieSettings:
 
     @min_weekly.setter
     def min_weekly(self, value: int):
-        self.session["min_weekly"] = value
+        self._set("min_weekly", value)
 
     # Getter si setter pentru limita maxima saptamanala
     @property
@@ -48,7 +193,7 @@ class CalorieSettings:
 
     @max_weekly.setter
     def max_weekly(self, value: int):
-        self.session["max_weekly"] = value
+        self._set("max_weekly", value)
 
     # Getter si setter pentru offset-ul saptamanii (folosit la calendar)
     @property
@@ -57,4 +202,4 @@ class CalorieSettings:
 
     @week_offset.setter
     def week_offset(self, value: int):
-        self.session["week_offset"] = value
\ No newline at end of file
+        self.session["week_offset"] = value
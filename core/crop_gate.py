@@ -0,0 +1,139 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Poarta poate fi oprita (detectie completa pentru fiecare poza)
+GATE_ENABLED = os.environ.get("VISION_CROP_GATE", "1") != "0"
+
+# Pozele mai mici de atat sunt deja un prim-plan; decupajul nu ar ajuta
+GATE_MIN_EDGE = int(os.environ.get("VISION_GATE_MIN_EDGE", "512"))
+
+# Pozele foarte alungite (panorame, mese intregi) merg direct la detectia completa
+GATE_MAX_ASPECT = float(os.environ.get("VISION_GATE_MAX_ASPECT", "2.5"))
+
+# Rezolutia trecerii rapide de detectie
+GATE_PROBE_SIZE = int(os.environ.get("VISION_GATE_PROBE_SIZE", "320"))
+
+# O singura farfurie care acopera cel putin atat din poza este un prim-plan
+GATE_CLOSEUP_AREA = float(os.environ.get("VISION_GATE_CLOSEUP_AREA", "0.5"))
+
+# Marginea adaugata in jurul farfuriei gasite la rezolutie mica (fata de latura ei)
+GATE_PROBE_MARGIN = float(os.environ.get("VISION_GATE_PROBE_MARGIN", "0.05"))
+
+# Poza este considerata goala doar daca cea mai sigura detectie de farfurie din
+# trecerea rapida (chiar si una prea mica pentru a fi aleasa) are incredere sub acest prag
+GATE_EMPTY_MAX_SCORE = float(os.environ.get("VISION_GATE_EMPTY_MAX_SCORE", "0.35"))
+
+# Ce fractiune din pozele goale la trecerea rapida primeste totusi detectia completa,
+# ca sa masuram cate farfurii mici sau indepartate scapa trecerii rapide
+GATE_EMPTY_SAMPLE = float(os.environ.get("VISION_GATE_EMPTY_SAMPLE", "0.05"))
+
+# Decizii inainte de detectie
+SMALL = "small"
+WIDE = "wide"
+PROBE = "probe"
+FULL = "full"
+
+# Decizii dupa trecerea rapida
+PROBE_EMPTY = "probe_empty"
+PROBE_UNSURE = "probe_unsure"
+PROBE_SAMPLED = "probe_sampled"
+PROBE_CLOSEUP = "probe_closeup"
+PROBE_FULL = "probe_full"
+
+PATHS = (SMALL, WIDE, FULL, PROBE_EMPTY, PROBE_UNSURE, PROBE_SAMPLED, PROBE_CLOSEUP, PROBE_FULL)
+
+# Poze din PROBE_SAMPLED in care detectia completa a gasit totusi farfurii
+EMPTY_MISSED = "probe_empty_missed"
+
+
+class CropGate:
+    """Decide daca o poza are nevoie de detectia YOLO la rezolutie completa.
+
+    Pozele mici sunt trimise intregi. Celelalte trec mai intai printr-o
+    detectie rapida la rezolutie mica: daca nu apare sigur nicio farfurie sau
+    apare una singura care umple poza, rezultatul ei este suficient; altfel se
+    ruleaza detectia completa. Contoarele arata cat de des este ales fiecare drum;
+    o parte din pozele goale trec oricum prin detectia completa, iar
+    `probe_empty_missed` / `probe_sampled` este rata farfuriilor ratate.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = GATE_ENABLED,
+        min_edge: int = GATE_MIN_EDGE,
+        max_aspect: float = GATE_MAX_ASPECT,
+        probe_size: int = GATE_PROBE_SIZE,
+        closeup_area: float = GATE_CLOSEUP_AREA,
+        probe_margin: float = GATE_PROBE_MARGIN,
+        empty_max_score: float = GATE_EMPTY_MAX_SCORE,
+        empty_sample: float = GATE_EMPTY_SAMPLE,
+    ):
+        self.enabled = enabled
+        self.min_edge = min_edge
+        self.max_aspect = max_aspect
+        self.probe_size = probe_size
+        self.closeup_area = closeup_area
+        self.probe_margin = probe_margin
+        self.empty_max_score = empty_max_score
+        self.empty_sample = empty_sample
+        self._counts: Dict[str, int] = {path: 0 for path in (*PATHS, EMPTY_MISSED)}
+        self._empty_seen = 0
+        self._lock = threading.Lock()
+
+    def classify(self, image: Image.Image) -> str:
+        """Decizia luata doar din dimensiunile pozei: SMALL, WIDE, PROBE sau FULL."""
+        if not self.enabled:
+            return FULL
+        if max(image.size) <= self.min_edge:
+            return SMALL
+        if max(image.size) / max(1, min(image.size)) >= self.max_aspect:
+            return WIDE
+        return PROBE
+
+    def after_probe(
+        self, image: Image.Image, plates: np.ndarray, top_score: float = 0.0
+    ) -> Tuple[str, Optional[Tuple[int, int, int, int]]]:
+        """Decizia dupa trecerea rapida si, pentru prim-plan, zona de decupat.
+
+        `top_score` este increderea celei mai sigure detectii de farfurie din
+        trecerea rapida, inclusiv a celor nealese (prea mici)."""
+        if len(plates) == 0:
+            # O detectie slaba sau prea mica poate fi o farfurie indepartata
+            if top_score >= self.empty_max_score:
+                return PROBE_UNSURE, None
+            return (PROBE_SAMPLED if self._sample_empty() else PROBE_EMPTY), None
+
+        if len(plates) == 1:
+            x1, y1, x2, y2 = plates[0].tolist()
+            if (x2 - x1) * (y2 - y1) >= self.closeup_area * image.width * image.height:
+                # Box-ul de la rezolutie mica este aproximativ, asa ca il largim putin
+                dx, dy = (x2 - x1) * self.probe_margin, (y2 - y1) * self.probe_margin
+                box = (
+                    max(0, int(x1 - dx)),
+                    max(0, int(y1 - dy)),
+                    min(image.width, int(x2 + dx + 1)),
+                    min(image.height, int(y2 + dy + 1)),
+                )
+                return PROBE_CLOSEUP, box
+
+        return PROBE_FULL, None
+
+    def _sample_empty(self) -> bool:
+        # Esantion determinist: fiecare a 1/empty_sample-a poza goala
+        with self._lock:
+            self._empty_seen += 1
+            seen = self._empty_seen
+        return int(seen * self.empty_sample) != int((seen - 1) * self.empty_sample)
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self._counts[path] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Cate poze au trecut pe fiecare drum de la pornirea procesului."""
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,254 @@
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+# Backend-ul detectorului: "ultralytics" (PyTorch), "onnx" (ONNX Runtime) sau "openvino"
+DETECTOR_BACKEND = os.environ.get("VISION_DETECTOR_BACKEND", "ultralytics")
+
+# Modelul folosit de backend; implicit, modelul standard al fiecarui backend
+DETECTOR_MODEL = os.environ.get("VISION_DETECTOR_MODEL", "")
+DEFAULT_MODELS = {
+    "ultralytics": "yolov8s.pt",
+    "onnx": "yolov8s.onnx",
+    "openvino": "yolov8s_int8_openvino_model",
+}
+
+# Cate thread-uri CPU foloseste inferenta (0 = alegerea bibliotecii)
+DETECTOR_THREADS = int(os.environ.get("VISION_DETECTOR_THREADS", "0"))
+
+# Rezolutia de inferenta si pragurile de detectie
+DETECTOR_IMGSZ = int(os.environ.get("VISION_DETECTOR_IMGSZ", "640"))
+DETECTOR_CONF = float(os.environ.get("VISION_DETECTOR_CONF", "0.25"))
+DETECTOR_IOU = float(os.environ.get("VISION_DETECTOR_IOU", "0.45"))
+
+# Cate detectii (cele mai sigure) intra in NMS; limiteaza costul cand modelul e nesigur
+MAX_DETECTIONS = 300
+
+
+class PlateDetector(ABC):
+    """Interfata comuna a detectoarelor.
+
+    `detect` primeste o lista de imagini RGB si intoarce, pentru fiecare,
+    un tablou (N, 6): x1, y1, x2, y2, incredere, clasa COCO.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def detect(self, images: List[Image.Image], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        """Detectiile pentru fiecare imagine, la rezolutia `imgsz` (implicit cea configurata)."""
+
+    def __call__(self, images: List[Image.Image], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        # `imgsz` permite o trecere rapida la rezolutie mai mica decat cea configurata
+        return self.detect(images, imgsz)
+
+
+class UltralyticsDetector(PlateDetector):
+    """YOLO prin ultralytics: modele PyTorch (.pt) sau exportate OpenVINO (director)."""
+
+    name = "ultralytics"
+
+    def __init__(
+        self,
+        model: str,
+        threads: int = DETECTOR_THREADS,
+        imgsz: int = DETECTOR_IMGSZ,
+        conf: float = DETECTOR_CONF,
+    ):
+        # Importul este greu (torch), deci il facem doar cand backend-ul este folosit
+        from ultralytics import YOLO
+
+        if threads > 0:
+            import torch
+
+            torch.set_num_threads(threads)
+
+        self.model = YOLO(model, task="detect")
+        self.imgsz = imgsz
+        self.conf = conf
+
+    def detect(self, images: List[Image.Image], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        results = self.model(images, imgsz=imgsz or self.imgsz, conf=self.conf, verbose=False)
+        detections = []
+        for result in results:
+            boxes = result.boxes
+            detections.append(
+                np.column_stack(
+                    [
+                        boxes.xyxy.cpu().numpy(),
+                        boxes.conf.cpu().numpy(),
+                        boxes.cls.cpu().numpy(),
+                    ]
+                ).reshape(-1, 6)
+            )
+        return detections
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou: float) -> np.ndarray:
+    # Non-maximum suppression clasic, pe tablouri NumPy
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-scores)
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.minimum(boxes[rest, 2], boxes[i, 2]) - np.maximum(boxes[rest, 0], boxes[i, 0])
+        h = np.minimum(boxes[rest, 3], boxes[i, 3]) - np.maximum(boxes[rest, 1], boxes[i, 1])
+        inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+        overlap = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=int)
+
+
+class OnnxDetector(PlateDetector):
+    """YOLOv8 exportat in ONNX (optional cuantizat int8), rulat cu ONNX Runtime pe CPU."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model: str,
+        threads: int = DETECTOR_THREADS,
+        imgsz: int = DETECTOR_IMGSZ,
+        conf: float = DETECTOR_CONF,
+        iou: float = DETECTOR_IOU,
+    ):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Modelele exportate cu dynamic=True accepta un batch (si o rezolutie) de orice marime
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.dynamic_size = not isinstance(model_input.shape[2], int)
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+
+    def _letterbox(self, image: Image.Image, imgsz: int):
+        # Redimensionam pastrand proportiile si completam cu gri pana la imgsz x imgsz
+        ratio = imgsz / max(image.size)
+        w, h = round(image.width * ratio), round(image.height * ratio)
+        canvas = Image.new("RGB", (imgsz, imgsz), (114, 114, 114))
+        pad_x, pad_y = (imgsz - w) // 2, (imgsz - h) // 2
+        canvas.paste(image.convert("RGB").resize((w, h), Image.Resampling.BILINEAR), (pad_x, pad_y))
+        tensor = np.asarray(canvas, dtype=np.float32).transpose(2, 0, 1) / 255.0
+        return tensor, ratio, pad_x, pad_y
+
+    def _decode(self, output: np.ndarray, ratio: float, pad_x: int, pad_y: int) -> np.ndarray:
+        # Iesirea YOLOv8: (4 + clase, ancore) -> (ancore, 4 + clase)
+        pred = output.T
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), cls]
+        mask = conf >= self.conf
+        if not mask.any():
+            return np.zeros((0, 6), dtype=np.float32)
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > MAX_DETECTIONS:
+            top = np.argpartition(-conf[candidates], MAX_DETECTIONS)[:MAX_DETECTIONS]
+            candidates = candidates[top]
+
+        cx, cy, w, h = pred[candidates, :4].T
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        conf, cls = conf[candidates], cls[candidates]
+
+        # NMS separat pe clase: decalam box-urile fiecarei clase ca sa nu se suprapuna
+        keep = _nms(boxes + cls[:, None] * 4096.0, conf, self.iou)
+        boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+        # Revenim la coordonatele imaginii originale
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / ratio
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / ratio
+        return np.column_stack([boxes, conf, cls]).astype(np.float32)
+
+    def detect(self, images: List[Image.Image], imgsz: Optional[int] = None) -> List[np.ndarray]:
+        # Un model cu rezolutie fixa ruleaza mereu la rezolutia lui
+        if not imgsz or not self.dynamic_size:
+            imgsz = self.imgsz
+        # YOLO lucreaza cu laturi multiplu de 32
+        imgsz = max(32, imgsz // 32 * 32)
+
+        prepared = [self._letterbox(img, imgsz) for img in images]
+        batch = np.stack([p[0] for p in prepared])
+
+        # Un singur pas pentru tot batch-ul, daca modelul permite
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            outputs = np.concatenate(
+                [self.session.run(None, {self.input_name: t[None]})[0] for t in batch]
+            )
+
+        detections = []
+        for output, (_, ratio, pad_x, pad_y), img in zip(outputs, prepared, images):
+            det = self._decode(output, ratio, pad_x, pad_y)
+            det[:, [0, 2]] = det[:, [0, 2]].clip(0, img.width)
+            det[:, [1, 3]] = det[:, [1, 3]].clip(0, img.height)
+            detections.append(det)
+        return detections
+
+
+def create_detector(
+    backend: str = DETECTOR_BACKEND,
+    model: Optional[str] = None,
+    threads: int = DETECTOR_THREADS,
+) -> PlateDetector:
+    """Construieste detectorul configurat."""
+    model = model or DETECTOR_MODEL or DEFAULT_MODELS.get(backend, "")
+    if backend == "onnx":
+        return OnnxDetector(model, threads=threads)
+    if backend in ("ultralytics", "openvino"):
+        # ultralytics incarca direct si directoarele exportate OpenVINO
+        return UltralyticsDetector(model, threads=threads)
+    raise ValueError(f"Backend de detectie necunoscut: {backend}")
+
+
+def export_onnx(weights: str = "yolov8s.pt", int8: bool = False) -> str:
+    """Exporta modelul PyTorch in ONNX (batch dinamic) si, optional, il cuantizeaza int8.
+
+    Cuantizarea dinamica reduce memoria, dar pe CPU-uri fara instructiuni VNNI
+    convolutiile int8 pot fi mai lente decat float32; verificati cu
+    benchmarks/bench_detector.py inainte de a o folosi in productie.
+    """
+    from ultralytics import YOLO
+
+    path = YOLO(weights).export(format="onnx", dynamic=True, imgsz=DETECTOR_IMGSZ)
+    if not int8:
+        return path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = path.replace(".onnx", ".int8.onnx")
+    quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+    return quantized
+
+
+def export_openvino(weights: str = "yolov8s.pt", int8: bool = True) -> str:
+    """Exporta modelul in format OpenVINO (int8 cu calibrare ultralytics)."""
+    from ultralytics import YOLO
+
+    return YOLO(weights).export(format="openvino", int8=int8, imgsz=DETECTOR_IMGSZ)
+
+
+if __name__ == "__main__":
+    # python -m core.detectors onnx|onnx-int8|openvino  -> exporta modelul pentru backend
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "onnx"
+    if target == "openvino":
+        print(export_openvino())
+    else:
+        print(export_onnx(int8=target == "onnx-int8"))
@@ -0,0 +1,498 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.blob_store import BlobStore
+from core.history_store import LEGACY_JSON, _number
+
+try:
+    import fcntl
+except ImportError:  # Windows: fara lock intre procese
+    fcntl = None
+
+# Directorul jurnalului: snapshot-N.json (starea compactata) + journal-N.jsonl (ce a urmat)
+JOURNAL_DIR = os.environ.get("HISTORY_JOURNAL_DIR", "history_journal")
+
+# Dupa cate inregistrari in jurnal facem un snapshot nou si incepem alt jurnal
+COMPACT_EVERY = int(os.environ.get("HISTORY_COMPACT_EVERY", "10000"))
+
+_GENERATION = re.compile(r"^(snapshot|journal)-(\d+)\.jsonl?$")
+
+_TOTAL_FIELDS = ("calories", "protein", "carbs", "fat")
+
+
+def _fsync_dir(path: str) -> None:
+    # Redenumirile si fisierele noi sunt durabile doar dupa fsync pe director
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JournalHistoryStore:
+    """Istoricul meselor ca jurnal append-only (o linie JSON per masa), alternativa la SQLite.
+
+    Fiecare `add` scrie o singura linie la sfarsitul jurnalului, deci costul
+    nu depinde de marimea istoricului. Scrierile concurente sunt grupate:
+    un singur fsync acopera toate liniile scrise intre timp (group commit).
+    Periodic scrierile trec la un jurnal nou, iar starea de pana atunci este
+    scrisa intr-un snapshot pe un thread de fundal. La pornire se citeste
+    ultimul snapshot si se reiau jurnalele de dupa el; o linie scrisa pe
+    jumatate la o cadere este ignorata si taiata.
+
+    Toate citirile se fac din memorie. Un singur proces poate folosi directorul.
+    """
+
+    def __init__(self, directory: str = JOURNAL_DIR, compact_every: int = COMPACT_EVERY):
+        self.directory = directory
+        self.compact_every = compact_every
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # O singura compactare odata
+        self._compact_lock = threading.Lock()
+        self._owner = self._lock_directory()
+
+        # Starea in memorie, reconstruita din snapshot + jurnal
+        self._meals: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._daily: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        self._settings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._meta: Dict[str, str] = {}
+        self._next_id = 1
+
+        # Inregistrarile din jurnalul curent (de la ultimul snapshot)
+        self._records = 0
+        self._generation = self._load()
+        self._file = self._open_journal()
+        self._written = 0
+        self._synced = 0
+
+    def _open_journal(self):
+        # Fisierul nou trebuie sa existe si in director inainte ca vreo scriere din el
+        # sa fie confirmata ca durabila; fsync-ul pe fisier nu acopera intrarea din director
+        journal = open(self._path("journal"), "a", encoding="utf-8")
+        _fsync_dir(self.directory)
+        return journal
+
+    def _path(self, kind: str, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        extension = "json" if kind == "snapshot" else "jsonl"
+        return os.path.join(self.directory, f"{kind}-{generation}.{extension}")
+
+    def _lock_directory(self):
+        # Doua procese care ar scrie acelasi jurnal si-ar strica starea una alteia
+        if fcntl is None:
+            return None
+        owner = open(os.path.join(self.directory, "LOCK"), "w")
+        try:
+            fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            owner.close()
+            raise RuntimeError(f"Jurnalul {self.directory} este folosit de alt proces.")
+        return owner
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        # Aplica o inregistrare din jurnal (masa noua, setari sau marcaj de migrare)
+        if record["op"] == "settings":
+            self._settings[record["user"]].update(record["values"])
+            return
+        if record["op"] == "meta":
+            self._meta[record["key"]] = record["value"]
+            return
+        if record["op"] == "update":
+            self._apply_update(record)
+            return
+
+        user = record["user"]
+        entry = {key: value for key, value in record.items() if key not in ("op", "user")}
+        self._meals[user].append(entry)
+        self._next_id = max(self._next_id, entry["id"] + 1)
+
+        day = self._daily[user].setdefault(
+            entry["date"], {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "meals": 0}
+        )
+        day["calories"] += entry["total_calories"]
+        day["protein"] += entry["total_protein"]
+        day["carbs"] += entry["total_carbs"]
+        day["fat"] += entry["total_fat"]
+        day["meals"] += 1
+
+    def _apply_update(self, record: Dict[str, Any]) -> None:
+        # Masa inlocuita primeste un dictionar nou (intrarile existente nu se modifica,
+        # pot fi serializate chiar acum de un snapshot), iar ziua ei se corecteaza cu diferenta
+        entries = self._meals.get(record["user"], [])
+        for n in range(len(entries) - 1, -1, -1):
+            if entries[n]["id"] == record["id"]:
+                break
+        else:
+            return
+        old = entries[n]
+        new = {**old, **record["fields"]}
+        entries[n] = new
+
+        day = self._daily[record["user"]][old["date"]]
+        for field in _TOTAL_FIELDS:
+            day[field] += new[f"total_{field}"] - old[f"total_{field}"]
+
+    def _load(self) -> int:
+        # Ultimul snapshot complet (sau niciunul), apoi toate jurnalele de la generatia lui incolo
+        snapshots, journals = {0}, set()
+        for name in os.listdir(self.directory):
+            match = _GENERATION.match(name)
+            if match:
+                (snapshots if match.group(1) == "snapshot" else journals).add(int(match.group(2)))
+            elif name.endswith(".tmp"):
+                # Snapshot neterminat la o cadere
+                os.remove(os.path.join(self.directory, name))
+        base = max(snapshots)
+
+        snapshot = self._path("snapshot", base)
+        if os.path.exists(snapshot):
+            with open(snapshot, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._meta = state["meta"]
+            self._next_id = state["next_id"]
+            for user, values in state["settings"].items():
+                self._settings[user] = values
+            for user, entries in state["meals"].items():
+                for entry in entries:
+                    self._apply({"op": "meal", "user": user, **entry})
+
+        # Daca snapshot-ul urmator nu a apucat sa fie scris, jurnalul vechi si cel nou se reiau impreuna
+        generations = sorted(g for g in journals if g >= base) or [base]
+        for generation in generations:
+            self._replay(self._path("journal", generation))
+
+        self._cleanup(base)
+        return generations[-1]
+
+    def _replay(self, journal: str) -> None:
+        # La prima linie incompleta (scrisa pe jumatate la o cadere) ne oprim si taiem restul
+        if not os.path.exists(journal):
+            return
+        good = 0
+        with open(journal, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(record)
+                self._records += 1
+                good += len(line)
+        if good < os.path.getsize(journal):
+            with open(journal, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+
+    def _cleanup(self, generation: int) -> None:
+        # Stergem generatiile acoperite de snapshot-ul `generation`
+        for name in os.listdir(self.directory):
+            match = _GENERATION.match(name)
+            if match and int(match.group(2)) < generation:
+                os.remove(os.path.join(self.directory, name))
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        # Scriem liniile sub lock, apoi asteptam fsync-ul care le acopera
+        with self._lock:
+            for record in records:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._apply(record)
+            self._written += len(records)
+            self._records += len(records)
+            target = self._written
+            compact = self._records >= self.compact_every
+
+        self._sync(target)
+        if compact and self._compact_lock.acquire(blocking=False):
+            # Snapshot-ul se scrie pe un thread separat; cererea curenta nu il asteapta
+            threading.Thread(
+                target=self._compact_locked, args=(self.compact_every,), daemon=True
+            ).start()
+
+    def _sync(self, target: int) -> None:
+        # Group commit: cine ajunge primul face fsync pentru toate liniile scrise pana atunci;
+        # ceilalti gasesc liniile lor deja sincronizate si nu mai fac nimic
+        with self._sync_lock:
+            if self._synced >= target:
+                return
+            with self._lock:
+                self._file.flush()
+                written = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = written
+
+    def _rotate(self, min_records: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        # Sub lock doar copiem starea (referinte, nu serializare) si trecem la un jurnal nou;
+        # intrarile meselor nu se modifica dupa adaugare, deci copiile listelor sunt suficiente
+        with self._sync_lock, self._lock:
+            # Alt thread poate sa fi compactat intre timp; nu facem un snapshot pentru cateva linii
+            if self._records < min_records:
+                return None
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._synced = self._written
+
+            state = {
+                "next_id": self._next_id,
+                "meta": dict(self._meta),
+                "settings": {user: dict(values) for user, values in self._settings.items()},
+                "meals": {user: list(entries) for user, entries in self._meals.items()},
+            }
+            self._generation += 1
+            self._file = self._open_journal()
+            self._records = 0
+            return self._generation, state
+
+    def _compact_locked(self, min_records: int = 1) -> None:
+        try:
+            rotated = self._rotate(min_records)
+            if rotated is None:
+                return
+            generation, state = rotated
+
+            # Snapshot-ul devine vizibil doar dupa ce este complet pe disc; pana atunci,
+            # la o cadere, se reiau snapshot-ul vechi si ambele jurnale
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path("snapshot", generation))
+            _fsync_dir(self.directory)
+            self._cleanup(generation)
+        finally:
+            self._compact_lock.release()
+
+    def compact(self) -> None:
+        """Scrie starea curenta intr-un snapshot nou si incepe un jurnal gol.
+
+        Scrierile si citirile sunt blocate doar cat se copiaza starea in memorie;
+        serializarea si fsync-ul snapshot-ului se fac fara lock.
+        """
+        self._compact_lock.acquire()
+        self._compact_locked()
+
+    def add(
+        self,
+        user: str,
+        dish_name: str,
+        total_cal: float,
+        total_protein: float,
+        total_carbs: float,
+        total_fat: float,
+        image_hash: Optional[str],
+        ingredients: list,
+        timestamp: Optional[datetime] = None,
+        image_dhash: Optional[str] = None,
+    ) -> int:
+        ts = timestamp or datetime.now()
+        with self._lock:
+            meal_id = self._next_id
+            self._next_id += 1
+        self._append(
+            [
+                {
+                    "op": "meal",
+                    "user": user,
+                    "id": meal_id,
+                    "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                    "date": ts.strftime("%Y-%m-%d"),
+                    "dish_name": dish_name,
+                    "total_calories": _number(total_cal),
+                    "total_protein": _number(total_protein),
+                    "total_carbs": _number(total_carbs),
+                    "total_fat": _number(total_fat),
+                    "image_hash": image_hash,
+                    "ingredients": ingredients or [],
+                    "image_dhash": image_dhash,
+                }
+            ]
+        )
+        return meal_id
+
+    def update_meal(
+        self,
+        user: str,
+        meal_id: int,
+        dish_name: str,
+        total_cal: float,
+        total_protein: float,
+        total_carbs: float,
+        total_fat: float,
+        ingredients: list,
+    ) -> bool:
+        """Inlocuieste rezultatul unei mese salvate; False daca masa nu exista."""
+        with self._lock:
+            if not any(e["id"] == meal_id for e in self._meals.get(user, ())):
+                return False
+        self._append(
+            [
+                {
+                    "op": "update",
+                    "user": user,
+                    "id": meal_id,
+                    "fields": {
+                        "dish_name": dish_name,
+                        "total_calories": _number(total_cal),
+                        "total_protein": _number(total_protein),
+                        "total_carbs": _number(total_carbs),
+                        "total_fat": _number(total_fat),
+                        "ingredients": ingredients or [],
+                    },
+                }
+            ]
+        )
+        return True
+
+    def recent_with_dhash(self, user: str, limit: int) -> List[Dict[str, Any]]:
+        # Ultimele mese ale utilizatorului care au dHash salvat, cele mai noi primele
+        with self._lock:
+            entries = (e for e in reversed(self._meals.get(user, ())) if e.get("image_dhash"))
+            return [dict(e) for e in islice(entries, limit)]
+
+    def get_settings(self, user: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._settings.get(user, {}))
+
+    def save_settings(self, user: str, values: Dict[str, int]) -> None:
+        values = {key: int(value) for key, value in values.items()}
+        self._append([{"op": "settings", "user": user, "values": values}])
+
+    def get_user_history(self, user: str) -> List[Dict[str, Any]]:
+        # Intrarile utilizatorului, in ordinea adaugarii
+        with self._lock:
+            return [dict(e) for e in self._meals.get(user, ())]
+
+    def _filtered(
+        self,
+        user: str,
+        name: Optional[str],
+        start: Optional[str],
+        end: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        # Aceleasi filtre ca in HistoryStore: nume continut (fara diferente de litere), interval de date
+        needle = name.casefold() if name else None
+        with self._lock:
+            entries = list(self._meals.get(user, ()))
+        return [
+            e
+            for e in entries
+            if (needle is None or needle in e["dish_name"].casefold())
+            and (not start or e["date"] >= start)
+            and (not end or e["date"] <= end)
+        ]
+
+    def query_user_history(
+        self,
+        user: str,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = -1,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        # O pagina din istoric, cele mai noi intrari primele
+        entries = sorted(
+            self._filtered(user, name, start, end),
+            key=lambda e: (e["date"], e["id"]),
+            reverse=True,
+        )
+        stop = None if limit < 0 else offset + limit
+        return [dict(e) for e in entries[offset:stop]]
+
+    def count_user_history(
+        self,
+        user: str,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> int:
+        if not (name or start or end):
+            with self._lock:
+                return len(self._meals.get(user, ()))
+        return len(self._filtered(user, name, start, end))
+
+    def date_bounds(self, user: str) -> Tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            days = list(self._daily.get(user, {}))
+        if not days:
+            return None, None
+        return min(days), max(days)
+
+    def get_daily_totals(
+        self,
+        user: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        # Un rand per zi (calorii, macronutrienti, numar de mese), sortat dupa data
+        with self._lock:
+            days = {date: dict(day) for date, day in self._daily.get(user, {}).items()}
+        return [
+            {"date": date, **days[date]}
+            for date in sorted(days)
+            if (not start or date >= start) and (not end or date <= end)
+        ]
+
+    def migrate_from_json(self, blobs: BlobStore, path: str = LEGACY_JSON) -> int:
+        """Importa o singura data istoricul din fisierul JSON vechi; imaginile merg in blob-uri."""
+        with self._lock:
+            if "json_migrated" in self._meta or not os.path.exists(path):
+                return 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        records = []
+        with self._lock:
+            for user, entries in legacy.items():
+                for entry in entries:
+                    timestamp = entry.get("timestamp") or ""
+                    image = entry.get("image_b64")
+                    records.append(
+                        {
+                            "op": "meal",
+                            "user": user,
+                            "id": self._next_id,
+                            "timestamp": timestamp,
+                            "date": entry.get("date") or timestamp[:10],
+                            "dish_name": entry.get("dish_name", "unknown"),
+                            "total_calories": _number(entry.get("total_calories")),
+                            "total_protein": _number(entry.get("total_protein")),
+                            "total_carbs": _number(entry.get("total_carbs")),
+                            "total_fat": _number(entry.get("total_fat")),
+                            "image_hash": blobs.put_b64(image) if image else None,
+                            "ingredients": entry.get("ingredients") or [],
+                        }
+                    )
+                    self._next_id += 1
+
+        # Mesele si marcajul ajung in jurnal cu un singur fsync
+        records.append(
+            {"op": "meta", "key": "json_migrated", "value": datetime.now().isoformat(timespec="seconds")}
+        )
+        self._append(records)
+        return len(records) - 1
+
+    def close(self) -> None:
+        # Asteptam compactarea in curs, apoi sincronizam ce a ramas
+        with self._compact_lock, self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        if self._owner is not None:
+            self._owner.close()
@@ -1,5 +1,7 @@
-from typing import List, Dict, Any
-from history import load_history, add_entry
+from typing import List, Dict, Any, Optional, Tuple
+from PIL import Image
+from core.blob_store import get_blob_store
+from core.history_store import get_store
 
 
 class HistoryManager:
@@ -7,13 +9,48 @@ class HistoryManager:
         # Salvam username-ul utilizatorului curent pentru a-i gestiona istoricul
         self.user = user
 
-    def get_user_history(self) -> List[Dict[str, Any]]:
-        # Incarcam istoricul complet din fisier/baza de date
-        history = load_history()
+        # Depozitul SQLite partajat de toate sesiunile
+        self.store = get_store()
+
+        # Imaginile se salveaza separat, iar istoricul pastreaza doar hash-ul lor
+        self.blobs = get_blob_store()
 
-        # Returnam doar istoricul utilizatorului curent
+    def get_user_history(self) -> List[Dict[str, Any]]:
+        # Citim doar intrarile utilizatorului curent, folosind indexul pe user
         # Daca nu exista intrari, intoarcem lista goala
-        return history.get(self.user, [])
+        return self.store.get_user_history(self.user)
+
+    def get_page(
+        self,
+        page: int,
+        page_size: int,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        # Citim doar intrarile paginii curente (paginile incep de la 0)
+        return self.store.query_user_history(
+            self.user, name, start, end, limit=page_size, offset=page * page_size
+        )
+
+    def count(
+        self,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> int:
+        # Numarul de intrari care corespund filtrelor
+        return self.store.count_user_history(self.user, name, start, end)
+
+    def date_bounds(self) -> Tuple[Optional[str], Optional[str]]:
+        # Prima si ultima zi din istoricul utilizatorului
+        return self.store.date_bounds(self.user)
+
+    def get_daily_totals(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        # Totalurile precalculate pe zile (calorii, macronutrienti, numar de mese)
+        return self.store.get_daily_totals(self.user, start, end)
 
     def add(
         self,
@@ -22,18 +59,58 @@ class HistoryManager:
         total_protein: float,
         total_carbs: float,
         total_fat: float,
-        img_b64: str,
+        image_hash: Optional[str],
         ingredients: list,
-    ) -> None:
-        # Adaugam o noua intrare in istoricul utilizatorului
-        # Functia add_entry se ocupa de salvarea efectiva
-        add_entry(
+        image_dhash: Optional[str] = None,
+    ) -> int:
+        # Adaugam o noua intrare in istoricul utilizatorului si intoarcem id-ul ei
+        # Depozitul face un singur INSERT si actualizeaza incremental totalul zilei
+        return self.store.add(
             self.user,
             dish_name,
             total_cal,
             total_protein,
             total_carbs,
             total_fat,
-            img_b64,
+            image_hash,
             ingredients,
-        )
\ No newline at end of file
+            image_dhash=image_dhash,
+        )
+
+    def replace(
+        self,
+        meal_id: int,
+        dish_name: str,
+        total_cal: float,
+        total_protein: float,
+        total_carbs: float,
+        total_fat: float,
+        ingredients: list,
+    ) -> bool:
+        # Inlocuim rezultatul unei mese deja salvate (imaginea si data raman aceleasi)
+        return self.store.update_meal(
+            self.user,
+            meal_id,
+            dish_name,
+            total_cal,
+            total_protein,
+            total_carbs,
+            total_fat,
+            ingredients,
+        )
+
+    def save_image(self, image: Image.Image) -> str:
+        # Salvam imaginea comprimata (plus miniatura) si intoarcem hash-ul ei
+        return self.blobs.put(image)
+
+    def image_path(self, image_hash: Optional[str]) -> Optional[str]:
+        # Calea imaginii complete, daca intrarea are imagine salvata
+        if not image_hash or not self.blobs.exists(image_hash):
+            return None
+        return self.blobs.image_path(image_hash)
+
+    def thumbnail_path(self, image_hash: Optional[str]) -> Optional[str]:
+        # Calea miniaturii folosite in lista din istoric, generata pe server la nevoie
+        if not image_hash:
+            return None
+        return self.blobs.thumbnail(image_hash)
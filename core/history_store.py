@@ -0,0 +1,444 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.blob_store import BlobStore, get_blob_store
+
+# Baza de date SQLite cu istoricul tuturor utilizatorilor
+DB_PATH = os.environ.get("HISTORY_DB", "history.db")
+
+# Fisierul JSON vechi, importat o singura data la prima pornire
+LEGACY_JSON = os.environ.get("HISTORY_JSON", "history.json")
+
+# Unde este salvat istoricul: "sqlite" (implicit) sau "journal" (vezi core.history_journal)
+HISTORY_BACKEND = os.environ.get("HISTORY_BACKEND", "sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    date TEXT NOT NULL,
+    dish_name TEXT NOT NULL,
+    total_calories REAL NOT NULL DEFAULT 0,
+    total_protein REAL NOT NULL DEFAULT 0,
+    total_carbs REAL NOT NULL DEFAULT 0,
+    total_fat REAL NOT NULL DEFAULT 0,
+    image_b64 TEXT,
+    ingredients TEXT NOT NULL DEFAULT '[]',
+    image_hash TEXT,
+    image_dhash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_meals_user_date ON meals (user, date);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    meals INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_settings (
+    user TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (user, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+MEAL_COLUMNS = (
+    "id, timestamp, date, dish_name, total_calories, total_protein, "
+    "total_carbs, total_fat, image_hash, ingredients"
+)
+
+
+def _casefold(value: Optional[str]) -> Optional[str]:
+    # Functie SQL inregistrata pe fiecare conexiune
+    return value.casefold() if value is not None else None
+
+
+def _number(value) -> float:
+    # Valorile venite de la AI pot fi None sau text; le convertim sigur la float
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class HistoryStore:
+    """Istoricul meselor in SQLite, indexat dupa utilizator si data."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._upgrade_schema(conn)
+
+    @staticmethod
+    def _upgrade_schema(conn: sqlite3.Connection) -> None:
+        # Bazele create inainte de stocarea imaginilor ca blob-uri nu au coloana image_hash
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(meals)")}
+        if "image_hash" not in columns:
+            conn.execute("ALTER TABLE meals ADD COLUMN image_hash TEXT")
+        # Hash-ul perceptual (dHash, 16 cifre hex) al pozei, pentru cautarea meselor asemanatoare
+        if "image_dhash" not in columns:
+            conn.execute("ALTER TABLE meals ADD COLUMN image_dhash TEXT")
+
+        # Totalurile zilnice se calculeaza o data din mesele existente, apoi incremental
+        built = conn.execute(
+            "SELECT value FROM meta WHERE key = 'daily_totals_built'"
+        ).fetchone()
+        if built is None:
+            HistoryStore._rebuild_daily_totals(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('daily_totals_built', ?)",
+                (datetime.now().isoformat(timespec="seconds"),),
+            )
+
+    @staticmethod
+    def _rebuild_daily_totals(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM daily_totals")
+        conn.execute(
+            "INSERT INTO daily_totals (user, date, calories, protein, carbs, fat, meals) "
+            "SELECT user, date, SUM(total_calories), SUM(total_protein), "
+            "SUM(total_carbs), SUM(total_fat), COUNT(*) FROM meals GROUP BY user, date"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # O conexiune per thread; Streamlit ruleaza fiecare sesiune pe alt thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # WAL permite cititori concurenti in timp ce alt thread scrie
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # LIKE/lower() din SQLite ignora majusculele doar pentru ASCII; cautarea dupa
+            # nume foloseste casefold din Python, ca "Ciorbă" sa gaseasca si "CIORBĂ"
+            conn.create_function("casefold", 1, _casefold, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["ingredients"] = json.loads(entry["ingredients"] or "[]")
+        return entry
+
+    def get_user_history(self, user: str) -> List[Dict[str, Any]]:
+        # Citim doar randurile utilizatorului, in ordinea adaugarii
+        rows = self._connect().execute(
+            f"SELECT {MEAL_COLUMNS} FROM meals WHERE user = ? ORDER BY id",
+            (user,),
+        ).fetchall()
+        return [self._row_to_entry(r) for r in rows]
+
+    @staticmethod
+    def _filters(
+        user: str,
+        name: Optional[str],
+        start: Optional[str],
+        end: Optional[str],
+    ) -> Tuple[str, list]:
+        # Construim clauza WHERE; datele sunt in format YYYY-MM-DD, deci se compara ca text
+        clauses = ["user = ?"]
+        params: list = [user]
+        if name:
+            # Subsir, fara wildcard-uri, la fel ca in jurnal
+            clauses.append("instr(casefold(dish_name), ?) > 0")
+            params.append(name.casefold())
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date <= ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    def query_user_history(
+        self,
+        user: str,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = -1,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        # O pagina din istoric, cele mai noi intrari primele
+        where, params = self._filters(user, name, start, end)
+        rows = self._connect().execute(
+            f"SELECT {MEAL_COLUMNS} FROM meals WHERE {where} "
+            "ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+        return [self._row_to_entry(r) for r in rows]
+
+    def count_user_history(
+        self,
+        user: str,
+        name: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> int:
+        where, params = self._filters(user, name, start, end)
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM meals WHERE {where}", params
+        ).fetchone()[0]
+
+    def date_bounds(self, user: str) -> Tuple[Optional[str], Optional[str]]:
+        # Prima si ultima zi cu intrari, citite direct din indexul (user, date)
+        row = self._connect().execute(
+            "SELECT MIN(date), MAX(date) FROM meals WHERE user = ?", (user,)
+        ).fetchone()
+        return row[0], row[1]
+
+    def get_daily_totals(
+        self,
+        user: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        # Un rand per zi (calorii, macronutrienti, numar de mese), sortat dupa data
+        where = "user = ?"
+        params: list = [user]
+        if start:
+            where += " AND date >= ?"
+            params.append(start)
+        if end:
+            where += " AND date <= ?"
+            params.append(end)
+        rows = self._connect().execute(
+            "SELECT date, calories, protein, carbs, fat, meals FROM daily_totals "
+            f"WHERE {where} ORDER BY date",
+            params,
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def add(
+        self,
+        user: str,
+        dish_name: str,
+        total_cal: float,
+        total_protein: float,
+        total_carbs: float,
+        total_fat: float,
+        image_hash: Optional[str],
+        ingredients: list,
+        timestamp: Optional[datetime] = None,
+        image_dhash: Optional[str] = None,
+    ) -> int:
+        ts = timestamp or datetime.now()
+        conn = self._connect()
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO meals (user, timestamp, date, dish_name, total_calories, "
+                "total_protein, total_carbs, total_fat, image_hash, ingredients, image_dhash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user,
+                    ts.strftime("%Y-%m-%d %H:%M:%S"),
+                    ts.strftime("%Y-%m-%d"),
+                    dish_name,
+                    _number(total_cal),
+                    _number(total_protein),
+                    _number(total_carbs),
+                    _number(total_fat),
+                    image_hash,
+                    json.dumps(ingredients or [], ensure_ascii=False),
+                    image_dhash,
+                ),
+            )
+
+            # Actualizam totalul zilei in aceeasi tranzactie cu masa noua
+            conn.execute(
+                "INSERT INTO daily_totals (user, date, calories, protein, carbs, fat, meals) "
+                "VALUES (?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (user, date) DO UPDATE SET "
+                "calories = calories + excluded.calories, "
+                "protein = protein + excluded.protein, "
+                "carbs = carbs + excluded.carbs, "
+                "fat = fat + excluded.fat, "
+                "meals = meals + 1",
+                (
+                    user,
+                    ts.strftime("%Y-%m-%d"),
+                    _number(total_cal),
+                    _number(total_protein),
+                    _number(total_carbs),
+                    _number(total_fat),
+                ),
+            )
+        return cur.lastrowid
+
+    def update_meal(
+        self,
+        user: str,
+        meal_id: int,
+        dish_name: str,
+        total_cal: float,
+        total_protein: float,
+        total_carbs: float,
+        total_fat: float,
+        ingredients: list,
+    ) -> bool:
+        """Inlocuieste rezultatul unei mese salvate (de ex. cu cel al modelului precis).
+
+        Totalul zilei se corecteaza cu diferenta, in aceeasi tranzactie; False daca masa nu exista."""
+        new = (_number(total_cal), _number(total_protein), _number(total_carbs), _number(total_fat))
+        conn = self._connect()
+        with conn:
+            old = conn.execute(
+                "SELECT date, total_calories, total_protein, total_carbs, total_fat "
+                "FROM meals WHERE id = ? AND user = ?",
+                (meal_id, user),
+            ).fetchone()
+            if old is None:
+                return False
+            conn.execute(
+                "UPDATE meals SET dish_name = ?, total_calories = ?, total_protein = ?, "
+                "total_carbs = ?, total_fat = ?, ingredients = ? WHERE id = ?",
+                (dish_name, *new, json.dumps(ingredients or [], ensure_ascii=False), meal_id),
+            )
+            conn.execute(
+                "UPDATE daily_totals SET calories = calories + ?, protein = protein + ?, "
+                "carbs = carbs + ?, fat = fat + ? WHERE user = ? AND date = ?",
+                (
+                    new[0] - old["total_calories"],
+                    new[1] - old["total_protein"],
+                    new[2] - old["total_carbs"],
+                    new[3] - old["total_fat"],
+                    user,
+                    old["date"],
+                ),
+            )
+        return True
+
+    def recent_with_dhash(self, user: str, limit: int) -> List[Dict[str, Any]]:
+        # Ultimele mese ale utilizatorului care au dHash salvat, cele mai noi primele
+        rows = self._connect().execute(
+            f"SELECT {MEAL_COLUMNS}, image_dhash FROM meals "
+            "WHERE user = ? AND image_dhash IS NOT NULL ORDER BY id DESC LIMIT ?",
+            (user, limit),
+        ).fetchall()
+        return [self._row_to_entry(r) for r in rows]
+
+    def get_settings(self, user: str) -> Dict[str, int]:
+        # Setarile salvate ale utilizatorului (limitele calorice); lipsa = valorile implicite
+        rows = self._connect().execute(
+            "SELECT key, value FROM user_settings WHERE user = ?", (user,)
+        ).fetchall()
+        return {r["key"]: r["value"] for r in rows}
+
+    def save_settings(self, user: str, values: Dict[str, int]) -> None:
+        # Toate valorile schimbate ale utilizatorului intr-o singura tranzactie
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO user_settings (user, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (user, key) DO UPDATE SET value = excluded.value",
+                [(user, key, int(value)) for key, value in values.items()],
+            )
+
+    def migrate_from_json(self, path: str = LEGACY_JSON) -> int:
+        """Importa o singura data istoricul din fisierul JSON vechi."""
+        conn = self._connect()
+        done = conn.execute(
+            "SELECT value FROM meta WHERE key = 'json_migrated'"
+        ).fetchone()
+        if done is not None or not os.path.exists(path):
+            return 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        rows = []
+        for user, entries in legacy.items():
+            for entry in entries:
+                timestamp = entry.get("timestamp") or ""
+                rows.append(
+                    (
+                        user,
+                        timestamp,
+                        entry.get("date") or timestamp[:10],
+                        entry.get("dish_name", "unknown"),
+                        _number(entry.get("total_calories")),
+                        _number(entry.get("total_protein")),
+                        _number(entry.get("total_carbs")),
+                        _number(entry.get("total_fat")),
+                        entry.get("image_b64"),
+                        json.dumps(entry.get("ingredients") or [], ensure_ascii=False),
+                    )
+                )
+
+        # Importul si marcajul se fac in aceeasi tranzactie; daca alt proces
+        # a migrat intre timp, cheia din meta exista deja si totul se anuleaza
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO meals (user, timestamp, date, dish_name, total_calories, "
+                    "total_protein, total_carbs, total_fat, image_b64, ingredients) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._rebuild_daily_totals(conn)
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                    (datetime.now().isoformat(timespec="seconds"),),
+                )
+        except sqlite3.IntegrityError:
+            return 0
+        return len(rows)
+
+    def migrate_inline_images(self, blobs: BlobStore, batch_size: int = 100) -> int:
+        """Muta imaginile Base64 vechi din tabel in depozitul de blob-uri."""
+        conn = self._connect()
+        moved = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, image_b64 FROM meals WHERE image_b64 IS NOT NULL LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                return moved
+
+            # Pastram doar hash-ul; imaginile care nu pot fi decodate sunt renuntate
+            updates = [(blobs.put_b64(r["image_b64"]), r["id"]) for r in rows]
+            with conn:
+                conn.executemany(
+                    "UPDATE meals SET image_hash = ?, image_b64 = NULL WHERE id = ?",
+                    updates,
+                )
+            moved += len(updates)
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> HistoryStore:
+    """Instanta unica a depozitului, creata (si migrata) la prima folosire."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if HISTORY_BACKEND == "journal":
+                    from core.history_journal import JournalHistoryStore
+
+                    store = JournalHistoryStore()
+                    store.migrate_from_json(get_blob_store())
+                else:
+                    store = HistoryStore()
+                    store.migrate_from_json()
+                    store.migrate_inline_images(get_blob_store())
+                _store = store
+    return _store
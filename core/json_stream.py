@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Any, Dict, List
+
+# Campurile simple de pe primul nivel pe care le extragem cat mai devreme
+_STRING_FIELDS = ("dish_name",)
+_NUMBER_FIELDS = ("total_calories", "total_protein", "total_carbs", "total_fat")
+
+# Valoarea completa a fiecarui camp, cautata incepand de la cheia lui; un numar este
+# complet doar cand dupa el urmeaza un separator
+_FIELD_PATTERNS = {
+    **{name: re.compile(rf'"{name}"\s*:\s*"((?:[^"\\]|\\.)*)"') for name in _STRING_FIELDS},
+    **{name: re.compile(rf'"{name}"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}}\n]') for name in _NUMBER_FIELDS},
+}
+
+
+class IncrementalJsonParser:
+    """Parseaza raspunsul modelului pe masura ce soseste, bucata cu bucata.
+
+    Structura (acolade, paranteze, siruri) este scanata o singura data; fiecare
+    obiect complet aflat intr-o lista (de ex. un ingredient) este decodat imediat
+    ce se inchide. Campurile simple (dish_name, totaluri) sunt extrase cand valoarea
+    lor este completa: fiecare camp lipsa este cautat de la pozitia unde a ramas
+    cautarea lui, deci textul deja vazut nu este scanat din nou (doar valoarea
+    inca incompleta a unui camp, de la cheia lui).
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._stack: List[tuple] = []  # (caracter deschis, pozitie)
+        self._in_string = False
+        self._escape = False
+        self.fields: Dict[str, Any] = {}
+        # Pentru fiecare camp lipsa: de unde reluam cautarea (cheia gasita sau capatul textului)
+        self._field_pos: Dict[str, int] = {}
+        self.ingredients: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> bool:
+        """Adauga text nou; intoarce True daca s-a aflat ceva nou."""
+        self.text += chunk
+        changed = False
+
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                # Textul din afara JSON-ului (ex. ```json) nu conteaza
+                self._in_string = bool(self._stack)
+            elif ch in "{[":
+                self._stack.append((ch, i))
+            elif ch in "}]" and self._stack:
+                opened, start = self._stack.pop()
+                # Un obiect inchis direct intr-o lista este un element complet
+                if ch == "}" and opened == "{" and self._stack and self._stack[-1][0] == "[":
+                    changed |= self._add_item(text[start : i + 1])
+        self._pos = len(text)
+
+        changed |= self._scan_fields()
+        return changed
+
+    def _add_item(self, raw: str) -> bool:
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return False
+        if not isinstance(item, dict) or "name" not in item:
+            return False
+        self.ingredients.append(item)
+        return True
+
+    def _find(self, name: str):
+        # Cautam cheia doar in textul nou; valoarea se verifica de la cheie
+        start = self._field_pos.get(name, 0)
+        key = self.text.find(f'"{name}"', start)
+        if key < 0:
+            # Cheia poate fi taiata la capatul bucatii; reluam cautarea putin mai inainte
+            self._field_pos[name] = max(start, len(self.text) - len(name) - 1)
+            return None
+        self._field_pos[name] = key
+        return _FIELD_PATTERNS[name].match(self.text, key)
+
+    def _scan_fields(self) -> bool:
+        changed = False
+        for name in (*_STRING_FIELDS, *_NUMBER_FIELDS):
+            if name in self.fields:
+                continue
+            match = self._find(name)
+            if match is None:
+                continue
+            if name in _STRING_FIELDS:
+                self.fields[name] = json.loads(f'"{match.group(1)}"')
+            else:
+                self.fields[name] = float(match.group(1))
+            changed = True
+        return changed
+
+    def partial(self) -> Dict[str, Any]:
+        """Starea curenta, in acelasi format ca rezultatul final."""
+        return {**self.fields, "ingredients": list(self.ingredients)}
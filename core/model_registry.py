@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+
+class SharedModel:
+    """Model partajat intre sesiuni; inferenta este serializata cu un lock."""
+
+    def __init__(self, model: Any):
+        self.model = model
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        # Modelele YOLO nu sunt thread-safe, asa ca rulam o singura inferenta odata
+        with self._lock:
+            return self.model(*args, **kwargs)
+
+
+class ModelRegistry:
+    """Registru la nivel de proces: fiecare model se incarca o singura data."""
+
+    def __init__(self):
+        self._models: Dict[str, SharedModel] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        # Modelele pentru care ruleaza deja un thread de incarcare in fundal
+        self._preloading: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        # Un lock separat pentru fiecare model, ca incarcarile diferite sa nu se blocheze reciproc
+        with self._lock:
+            return self._loading.setdefault(name, threading.Lock())
+
+    def get(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+    ) -> SharedModel:
+        # Drum rapid: modelul este deja incarcat
+        shared = self._models.get(name)
+        if shared is not None:
+            return shared
+
+        # Doar primul apelant construieste modelul, ceilalti asteapta rezultatul
+        with self._name_lock(name):
+            shared = self._models.get(name)
+            if shared is None:
+                model = factory()
+
+                # Inferenta de incalzire, ca prima cerere reala sa nu plateasca initializarea
+                if warmup is not None:
+                    warmup(model)
+
+                shared = SharedModel(model)
+                self._models[name] = shared
+            return shared
+
+    def preload(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        # Incarcam modelul pe un thread de fundal, fara sa blocam pagina; apelata la
+        # fiecare rerulare, deci pornim cel mult un thread per model
+        with self._lock:
+            if name in self._models or name in self._preloading:
+                return
+            self._preloading.add(name)
+        threading.Thread(
+            target=self._preload, args=(name, factory, warmup), daemon=True
+        ).start()
+
+    def _preload(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]],
+    ) -> None:
+        try:
+            self.get(name, factory, warmup)
+        except Exception as e:
+            print(f"⚠️ Nu am putut incarca modelul {name}: {e}")
+        finally:
+            # Dupa o incarcare esuata, urmatoarea rerulare poate incerca din nou
+            with self._lock:
+                self._preloading.discard(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+
+# Instanta unica folosita de toata aplicatia
+registry = ModelRegistry()
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from core.nutrition_parser import to_number
+from core.ollama_warmup import OLLAMA_MODELS, ModelWarmer
+
+# Rutarea intre modelul rapid si cel precis (0 = un singur model, ales de ModelWarmer)
+ROUTING = os.environ.get("VISION_ROUTING", "1") != "0"
+
+# Modelul incercat intai si modelul la care escaladam
+FAST_MODEL = os.environ.get("VISION_FAST_MODEL", OLLAMA_MODELS[0])
+ACCURATE_MODEL = os.environ.get("VISION_ACCURATE_MODEL", OLLAMA_MODELS[-1])
+
+# Sub aceasta incredere (0..1) rezultatul modelului rapid este verificat cu cel precis
+MIN_CONFIDENCE = float(os.environ.get("VISION_MIN_CONFIDENCE", "0.6"))
+
+# Bugetul de timp (secunde) pentru o farfurie, inclusiv escaladarea; 0 = fara limita.
+# Cu rutarea pornita, VISION_LATENCY_BUDGET (daca este setat) il micsoreaza si decide
+# cand modelul precis este destul de rapid ca sa fie folosit direct (vezi ModelRouter.route)
+REQUEST_BUDGET = float(os.environ.get("VISION_REQUEST_BUDGET", "120"))
+
+# Doua estimari de calorii care difera mai putin de atat sunt considerate in acord
+AGREEMENT_TOLERANCE = 0.2
+
+# Cate latente pastram per nivel
+TIER_SAMPLES = 200
+
+FAST = "fast"
+ACCURATE = "accurate"
+
+# Cererile trimise direct la modelul precis, fiindca incape in bugetul de latenta
+WITHIN_BUDGET = "within_budget"
+
+# Motivele escaladarii
+LOW_CONFIDENCE = "low_confidence"
+PARSE_FAILURE = "parse_failure"
+USER_REQUEST = "user_request"
+
+
+def confidence(result: Dict[str, Any]) -> float:
+    """Increderea (0..1) intr-un rezultat: cea declarata de model si, daca
+    rezultatul a trecut prin tabelul nutritional, proportia ingredientelor gasite complet."""
+    if "error" in result:
+        return 0.0
+
+    scores = []
+    reported = to_number(result.get("confidence"))
+    if reported is not None:
+        # Unele modele raspund in procente
+        scores.append(min(1.0, max(0.0, reported / 100 if reported > 1 else reported)))
+
+    ingredients = result.get("ingredients") or []
+    weighed = [i for i in ingredients if "grams" in i]
+    if weighed:
+        # Doar potrivirile complete din tabel cresc increderea
+        scores.append(
+            sum("match" in i and not i.get("partial") for i in weighed) / len(weighed)
+        )
+    elif not ingredients:
+        # Fara ingrediente, totalurile sunt doar o ghicire
+        scores.append(0.0)
+
+    return min(scores) if scores else 1.0
+
+
+class ModelRouter:
+    """Trimite fiecare farfurie intai la modelul rapid si escaladeaza la cel precis
+    doar cand raspunsul nu poate fi parsat, increderea este mica sau utilizatorul
+    cere analiza precisa, in limita bugetului de timp al cererii."""
+
+    def __init__(
+        self,
+        warmer: ModelWarmer,
+        fast: str = FAST_MODEL,
+        accurate: str = ACCURATE_MODEL,
+        min_confidence: float = MIN_CONFIDENCE,
+        budget: float = REQUEST_BUDGET,
+    ):
+        self.warmer = warmer
+        self.models = {FAST: fast, ACCURATE: accurate}
+        self.min_confidence = min_confidence
+        self.budget = budget
+
+        # Ambele niveluri trebuie sa ramana incarcate in Ollama
+        warmer.keep_loaded([fast, accurate])
+
+        self._latency = {tier: deque(maxlen=TIER_SAMPLES) for tier in self.models}
+        self._counts = {tier: Counter() for tier in self.models}
+        self._escalations: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def accurate_model(self) -> str:
+        return self.models[ACCURATE]
+
+    def _run(self, tier: str, ask: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.monotonic()
+        result = ask(self.models[tier])
+        seconds = time.monotonic() - start
+        with self._lock:
+            self._latency[tier].append(seconds)
+            counts = self._counts[tier]
+            counts["requests"] += 1
+            counts["failed" if "error" in result else "parsed"] += 1
+            if "error" not in result:
+                counts["confident"] += confidence(result) >= self.min_confidence
+        return result
+
+    def _agreement(self, fast: Dict[str, Any], accurate: Dict[str, Any]) -> None:
+        # Cand ambele niveluri au raspuns, comparam caloriile: o masura a acuratetei modelului rapid
+        a = to_number(fast.get("total_calories")) or 0.0
+        b = to_number(accurate.get("total_calories")) or 0.0
+        agree = abs(a - b) <= AGREEMENT_TOLERANCE * max(a, b, 1.0)
+        with self._lock:
+            self._counts[FAST]["compared"] += 1
+            self._counts[FAST]["agreed"] += agree
+
+    def route(
+        self,
+        ask: Callable[[str], Dict[str, Any]],
+        force_accurate: bool = False,
+        budget: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Ruleaza `ask(model)` pe nivelul potrivit si intoarce cel mai bun rezultat.
+
+        Cu un buget de latenta (VISION_LATENCY_BUDGET) pe ModelWarmer, acesta
+        inlocuieste alegerea facuta de `ModelWarmer.choose()`: modelul precis este
+        folosit direct cand latenta lui la cald (p90) incape in buget, iar
+        escaladarea nu depaseste bugetul.
+        """
+        if force_accurate:
+            with self._lock:
+                self._escalations[USER_REQUEST] += 1
+            return self._run(ACCURATE, ask)
+
+        budget = self.budget if budget is None else budget
+        latency_budget = self.warmer.budget
+        if latency_budget > 0:
+            p90 = self.warmer.latency.percentile(self.models[ACCURATE], "warm", 90)
+            if p90 is not None and p90 <= latency_budget:
+                with self._lock:
+                    self._escalations[WITHIN_BUDGET] += 1
+                return self._run(ACCURATE, ask)
+            budget = min(budget, latency_budget) if budget > 0 else latency_budget
+
+        start = time.monotonic()
+        result = self._run(FAST, ask)
+        if "error" in result:
+            reason = PARSE_FAILURE
+        elif confidence(result) < self.min_confidence:
+            reason = LOW_CONFIDENCE
+        else:
+            return result
+
+        # Escaladam doar daca modelul precis (latenta lui tipica) mai incape in buget
+        expected = self.warmer.latency.percentile(self.models[ACCURATE], "warm", 50) or 0.0
+        if budget > 0 and time.monotonic() - start + expected > budget:
+            with self._lock:
+                self._escalations["over_budget"] += 1
+            return result
+
+        with self._lock:
+            self._escalations[reason] += 1
+        better = self._run(ACCURATE, ask)
+        if "error" in better:
+            return result
+        if "error" not in result:
+            self._agreement(result, better)
+        return better
+
+    def stats(self) -> Dict[str, Any]:
+        """Latenta si calitatea raspunsurilor pe fiecare nivel, plus motivele escaladarilor."""
+        with self._lock:
+            latency = {tier: list(values) for tier, values in self._latency.items()}
+            counts = {tier: dict(c) for tier, c in self._counts.items()}
+            escalations = dict(self._escalations)
+
+        tiers = {}
+        for tier, model in self.models.items():
+            c = counts[tier]
+            values = latency[tier]
+            tiers[tier] = {
+                "model": model,
+                **c,
+                "p50": float(np.percentile(values, 50)) if values else None,
+                "p90": float(np.percentile(values, 90)) if values else None,
+                "parse_rate": c.get("parsed", 0) / c["requests"] if c.get("requests") else None,
+            }
+        if counts[FAST].get("compared"):
+            tiers[FAST]["agreement"] = counts[FAST]["agreed"] / counts[FAST]["compared"]
+        return {"tiers": tiers, "escalations": escalations}
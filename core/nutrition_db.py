@@ -0,0 +1,264 @@
+import csv
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.nutrition_parser import INGREDIENT_FIELDS, TOTAL_FIELDS, to_number
+
+# Tabelul nutritional inclus in aplicatie (valori la 100 g); poate fi inlocuit cu unul mai mare
+NUTRITION_CSV = os.environ.get(
+    "NUTRITION_CSV", os.path.join(os.path.dirname(__file__), "data", "nutrition.csv")
+)
+
+# Scorul minim (Dice pe trigrame, 0..1) pentru ca doua cuvinte sa fie considerate acelasi
+# (acopera pluraluri si greseli de scriere: "tomatoes" / "tomato")
+MATCH_THRESHOLD = float(os.environ.get("NUTRITION_MATCH_THRESHOLD", "0.6"))
+
+# Daca valoarea din tabel difera de estimarea modelului de mai mult de atatea ori,
+# potrivirea este probabil gresita si pastram estimarea modelului
+MAX_KCAL_RATIO = float(os.environ.get("NUTRITION_MAX_KCAL_RATIO", "3"))
+
+# Potrivirile partiale ("almond milk" -> "milk") sunt folosite doar daca tabelul
+# confirma estimarea modelului mult mai strans
+PARTIAL_MAX_KCAL_RATIO = float(os.environ.get("NUTRITION_PARTIAL_MAX_KCAL_RATIO", "1.25"))
+
+# Macronutrientii unui ingredient (caloriile sunt tratate separat)
+MACRO_FIELDS = ("protein", "carbs", "fat")
+
+# Cate nume cautate tinem minte (numele venite de la model se repeta des)
+LOOKUP_CACHE_SIZE = 10000
+
+# Modul de preparare nu schimba alimentul cautat ("grilled chicken breast" -> "chicken breast")
+PREPARATION_WORDS = {
+    "grilled", "fried", "boiled", "baked", "roasted", "steamed", "raw", "fresh", "cooked",
+    "sliced", "chopped", "diced", "homemade", "plain", "prajit", "prajita", "fiert", "fiarta",
+    "copt", "coapta", "gratar", "proaspat", "proaspata",
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Nume de aliment fara diacritice, litere mici, doar litere/cifre si spatii."""
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def trigrams(name: str) -> set:
+    # Trigramele fiecarui cuvant, cu margini, ca "rice" sa se potriveasca si in "fried rice"
+    grams = set()
+    for word in name.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NutritionTable:
+    """Tabel nutritional local cu index de trigrame pentru cautari aproximative.
+
+    Valorile (kcal, proteine, carbohidrati, grasimi la 100 g) stau intr-un
+    tablou NumPy. Potrivirea se face pe cuvinte: fiecare cuvant din nume si
+    sinonime are trigramele lui intr-un index inversat, astfel ca o cautare
+    atinge doar cuvintele cu trigrame comune.
+
+    O potrivire este completa cand fiecare cuvant cautat se regaseste in
+    numele din tabel. Altfel acceptam doar un nume din tabel gasit in intregime
+    in cel cautat si care contine ultimul cuvant ("chocolate cake" -> cake);
+    aceste potriviri sunt marcate partiale.
+    """
+
+    def __init__(self, path: str = NUTRITION_CSV, threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.names: List[str] = []
+        rows = []
+
+        # Fiecare nume sau sinonim indica randul alimentului
+        self._exact: Dict[str, int] = {}
+        self._key_rows: List[int] = []
+        self._key_words: List[List[int]] = []
+
+        # Vocabularul: cuvintele din nume si sinonime, cu index de trigrame
+        self._word_ids: Dict[str, int] = {}
+        self._word_grams: List[int] = []
+        self._word_keys: List[List[int]] = []
+        self._index: Dict[str, List[int]] = {}
+
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                row = len(self.names)
+                self.names.append(record["name"])
+                rows.append([float(record[k]) for k in ("kcal", "protein", "carbs", "fat")])
+                aliases = [a for a in (record.get("aliases") or "").split("|") if a]
+                for alias in [record["name"], *aliases]:
+                    self._add_key(normalize_name(alias), row)
+
+        self.per_100g = np.array(rows, dtype=np.float32).reshape(-1, 4)
+        self._lookups: Dict[str, Optional[Tuple[int, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def _word_id(self, word: str) -> int:
+        if word not in self._word_ids:
+            word_id = self._word_ids[word] = len(self._word_grams)
+            grams = trigrams(word)
+            self._word_grams.append(len(grams))
+            self._word_keys.append([])
+            for gram in grams:
+                self._index.setdefault(gram, []).append(word_id)
+        return self._word_ids[word]
+
+    def _add_key(self, key: str, row: int) -> None:
+        if not key or key in self._exact:
+            return
+        self._exact[key] = row
+        key_id = len(self._key_rows)
+        self._key_rows.append(row)
+        words = [self._word_id(word) for word in key.split()]
+        self._key_words.append(words)
+        for word_id in set(words):
+            self._word_keys[word_id].append(key_id)
+
+    def _similar_words(self, word: str) -> Dict[int, float]:
+        # Cuvintele din vocabular cu scor Dice peste prag
+        if word in self._word_ids:
+            return {self._word_ids[word]: 1.0}
+        grams = trigrams(word)
+        shared = Counter(w for gram in grams for w in self._index.get(gram, ()))
+        scores = {}
+        for word_id, common in shared.items():
+            score = 2 * common / (len(grams) + self._word_grams[word_id])
+            if score >= self.threshold:
+                scores[word_id] = score
+        return scores
+
+    def _match(self, key: str) -> Optional[Tuple[int, bool]]:
+        # Potrivire exacta (nume sau sinonim), apoi pe cuvinte; intoarce (rand, partiala)
+        if key in self._exact:
+            return self._exact[key], False
+        words = key.split()
+        core = [w for w in words if w not in PREPARATION_WORDS] or words
+        if " ".join(core) in self._exact:
+            return self._exact[" ".join(core)], False
+
+        similar = [self._similar_words(word) for word in core]
+        candidates = {k for scores in similar for w in scores for k in self._word_keys[w]}
+
+        best_full, best_partial = None, None
+        for key_id in candidates:
+            key_words = self._key_words[key_id]
+            # Cel mai bun scor al fiecarui cuvant cautat in numele din tabel si invers
+            query_scores = [max((scores.get(w, 0.0) for w in key_words), default=0.0) for scores in similar]
+            key_scores = [max(scores.get(w, 0.0) for scores in similar) for w in key_words]
+            row = self._key_rows[key_id]
+            if all(query_scores):
+                # Toate cuvintele cautate sunt acoperite; preferam numele fara cuvinte in plus
+                rank = (all(key_scores), sum(query_scores) / len(query_scores), -len(key_words))
+                if best_full is None or rank > best_full[0]:
+                    best_full = (rank, row)
+            elif all(key_scores) and query_scores[-1]:
+                # Numele din tabel este continut in cel cautat si contine ultimul cuvant
+                rank = (len(key_words), sum(key_scores) / len(key_scores))
+                if best_partial is None or rank > best_partial[0]:
+                    best_partial = (rank, row)
+
+        if best_full is not None:
+            return best_full[1], False
+        if best_partial is not None:
+            return best_partial[1], True
+        return None
+
+    def lookup(self, name: str) -> Optional[Tuple[int, bool]]:
+        """(rand, partiala) pentru alimentul cel mai apropiat de nume, sau None."""
+        key = normalize_name(name)
+        with self._lock:
+            if key in self._lookups:
+                return self._lookups[key]
+        found = self._match(key)
+        with self._lock:
+            if len(self._lookups) >= LOOKUP_CACHE_SIZE:
+                self._lookups.clear()
+            self._lookups[key] = found
+        return found
+
+    def nutrients(self, name: str, grams: float) -> Optional[Dict[str, Any]]:
+        """Valorile nutritionale pentru o portie, calculate din valorile la 100 g.
+
+        "match" este numele gasit in tabel; potrivirile partiale au in plus "partial": True.
+        """
+        found = self.lookup(name)
+        if found is None:
+            return None
+        row, partial = found
+        values = self.per_100g[row] * (grams / 100.0)
+        result = {field: round(float(v), 1) for field, v in zip(INGREDIENT_FIELDS, values)}
+        result["match"] = self.names[row]
+        if partial:
+            result["partial"] = True
+        return result
+
+    @staticmethod
+    def _plausible(values: Dict[str, Any], ingredient: Dict[str, Any]) -> bool:
+        # O potrivire care schimba caloriile de cateva ori fata de model este probabil alt aliment;
+        # o potrivire partiala ("black pepper" -> "pepper") trebuie sa aiba caloriile aproape la fel
+        estimate = to_number(ingredient.get("calories"))
+        ratio = PARTIAL_MAX_KCAL_RATIO if values.get("partial") else MAX_KCAL_RATIO
+        if not estimate or estimate <= 0:
+            return not values.get("partial")
+        table = max(values["calories"], 0.1)
+        return 1 / ratio <= table / estimate <= ratio
+
+    def reconcile(self, meal: Dict[str, Any]) -> Dict[str, Any]:
+        """Recalculeaza ingredientele (nume + grame) din tabel si totalurile mesei.
+
+        Ingredientele negasite in tabel, sau pentru care tabelul difera de
+        estimarea modelului de mai mult de MAX_KCAL_RATIO ori (PARTIAL_MAX_KCAL_RATIO
+        pentru potrivirile partiale), pastreaza estimarea modelului. Daca modelul nu
+        a dat si macronutrientii lor (promptul scurt cere doar caloriile), ingredientul
+        primeste "macros_unknown": True, iar masa "macros_incomplete": True: totalurile
+        de macronutrienti acopera atunci doar ingredientele cunoscute.
+        """
+        ingredients = []
+        incomplete = False
+        for item in meal.get("ingredients") or []:
+            ingredient = dict(item)
+            if to_number(item.get("kcal")) is not None and not to_number(item.get("calories")):
+                ingredient["calories"] = to_number(item.get("kcal"))
+            grams = to_number(item.get("grams"))
+            values = self.nutrients(item.get("name", ""), grams) if grams else None
+            if values is not None and self._plausible(values, ingredient):
+                ingredient.update(values)
+            elif (to_number(ingredient.get("calories")) or 0) > 0 and not any(
+                to_number(item.get(field)) for field in MACRO_FIELDS
+            ):
+                # Caloriile vin de la model, dar macronutrientii nu sunt cunoscuti (nu sunt 0)
+                ingredient["macros_unknown"] = True
+                incomplete = True
+            ingredients.append(ingredient)
+
+        result = dict(meal)
+        result["ingredients"] = ingredients
+        for total, field in zip(TOTAL_FIELDS, INGREDIENT_FIELDS):
+            result[total] = round(sum((to_number(i.get(field)) or 0.0 for i in ingredients), 0.0), 1)
+        if incomplete:
+            result["macros_incomplete"] = True
+        else:
+            result.pop("macros_incomplete", None)
+        return result
+
+
+_table: Optional[NutritionTable] = None
+_table_lock = threading.Lock()
+
+
+def get_nutrition_table() -> NutritionTable:
+    """Tabelul nutritional, incarcat o singura data per proces."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = NutritionTable()
+    return _table
@@ -0,0 +1,170 @@
+import ast
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+# Campurile numerice ale unui ingredient si ale mesei
+INGREDIENT_FIELDS = ("calories", "protein", "carbs", "fat")
+TOTAL_FIELDS = ("total_calories", "total_protein", "total_carbs", "total_fat")
+
+# Primul numar dintr-un text de tipul "250 kcal", "12,5g" sau "1,234 kcal": virgula urmata
+# de grupuri de exact 3 cifre separa miile, iar cu 1-2 cifre este virgula zecimala
+_NUMBER = re.compile(
+    r"(?P<grouped>-?\d{1,3}(?:,\d{3})+(?!\d)(?:\.\d+)?)"
+    r"|(?P<plain>-?\d+(?:\.\d+|,\d{1,2}(?!\d))?)"
+)
+
+# Virgule inainte de } sau ] (JSON invalid, dar frecvent la modele mici)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class NutritionParseError(ValueError):
+    """Raspunsul modelului nu contine un JSON nutritional valid."""
+
+
+def extract_json_object(text: str) -> str:
+    """Primul obiect JSON echilibrat din text (ignora ```json, text inainte/dupa)."""
+    depth = 0
+    start = -1
+    in_string = False
+    escape = False
+    quote = ""
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                in_string = False
+        elif ch in "\"'" and depth:
+            in_string, quote = True, ch
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    raise NutritionParseError("Raspunsul nu contine un obiect JSON complet.")
+
+
+def _loads(raw: str) -> Any:
+    # JSON strict, apoi JSON fara virgule in plus, apoi dictionar Python (ghilimele simple)
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    cleaned = _TRAILING_COMMA.sub(r"\1", raw)
+    try:
+        return json.loads(cleaned)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(cleaned)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        raise NutritionParseError("Obiectul din raspuns nu este JSON valid.") from None
+
+
+def to_number(value: Any) -> Optional[float]:
+    """Converteste valori ca 250, "250", "250 kcal", "12,5 g", "1,234 kcal" in float; altfel None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER.search(value)
+        if match and match.group("grouped"):
+            return float(match.group("grouped").replace(",", ""))
+        if match:
+            return float(match.group("plain").replace(",", "."))
+    return None
+
+
+def normalize(data: Any) -> Dict[str, Any]:
+    """Valideaza si aduce un raspuns la schema nutritionala a aplicatiei.
+
+    Ingredientele fara nume sunt ignorate, valorile lipsa devin 0, iar
+    totalurile lipsa sunt calculate din ingrediente.
+    """
+    if not isinstance(data, dict):
+        raise NutritionParseError("Raspunsul nu este un obiect JSON.")
+    if "error" in data:
+        raise NutritionParseError(str(data["error"]))
+
+    ingredients: List[Dict[str, Any]] = []
+    raw_ingredients = data.get("ingredients") or []
+    if not isinstance(raw_ingredients, list):
+        raise NutritionParseError("Campul 'ingredients' trebuie sa fie o lista.")
+    for item in raw_ingredients:
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict) or not str(item.get("name") or "").strip():
+            continue
+        ingredient = dict(item)
+        ingredient["name"] = str(item["name"]).strip()
+        for field in INGREDIENT_FIELDS:
+            ingredient[field] = to_number(item.get(field)) or 0.0
+        ingredients.append(ingredient)
+
+    dish_name = str(data.get("dish_name") or "").strip()
+    if not dish_name and not ingredients:
+        raise NutritionParseError("Raspunsul nu contine nici preparat, nici ingrediente.")
+
+    result = dict(data)
+    result["dish_name"] = dish_name or "unknown dish"
+    result["ingredients"] = ingredients
+    for total, field in zip(TOTAL_FIELDS, INGREDIENT_FIELDS):
+        value = to_number(data.get(total))
+        if value is None:
+            value = sum((ing[field] for ing in ingredients), 0.0)
+        result[total] = value
+    return result
+
+
+def parse_nutrition(text: str) -> Dict[str, Any]:
+    """Extrage, parseaza si valideaza raspunsul text al modelului."""
+    return normalize(_loads(extract_json_object(text)))
+
+
+class ParseMetrics:
+    """Statistici de parsare per model: raspunsuri, esecuri, re-intrebari."""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, event: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(
+                model, {"parsed": 0, "failed": 0, "reasked": 0, "repaired": 0}
+            )
+            counts[event] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contoarele si rata de esec a parsarii pentru fiecare model."""
+        with self._lock:
+            out = {}
+            for model, counts in self._counts.items():
+                total = counts["parsed"] + counts["failed"]
+                out[model] = {
+                    **counts,
+                    "failure_rate": counts["failed"] / total if total else 0.0,
+                }
+            return out
+
+
+_metrics: Optional[ParseMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_parse_metrics() -> ParseMetrics:
+    """Statisticile de parsare, comune pentru tot procesul."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = ParseMetrics()
+    return _metrics
@@ -0,0 +1,134 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Serverele Ollama disponibile, separate prin virgula (ex. "http://a:11434,http://b:11434")
+OLLAMA_URLS = os.environ.get("OLLAMA_URLS", "http://localhost:11434")
+
+# Timeout-uri separate pentru conectare si pentru generarea raspunsului (secunde)
+CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "200"))
+
+# Reincercari pentru erori de conectare si raspunsuri 502/503/504
+MAX_RETRIES = int(os.environ.get("OLLAMA_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.environ.get("OLLAMA_BACKOFF_BASE", "0.5"))
+
+# Dupa cate erori consecutive scoatem un server din rotatie si pentru cat timp
+BREAKER_FAILURES = int(os.environ.get("OLLAMA_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.environ.get("OLLAMA_BREAKER_COOLDOWN", "30"))
+
+# Cate conexiuni keep-alive pastram deschise per server
+POOL_SIZE = int(os.environ.get("OLLAMA_POOL_SIZE", "10"))
+
+_RETRY_STATUS = {502, 503, 504}
+
+
+class OllamaUnavailableError(Exception):
+    """Niciun server Ollama nu poate primi cereri in acest moment."""
+
+
+class _Endpoint:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.failures = 0
+        self.open_until = 0.0
+
+    def available(self, now: float) -> bool:
+        # Circuitul deschis blocheaza serverul pana la expirarea pauzei
+        return now >= self.open_until
+
+
+class OllamaClient:
+    """Client HTTP reutilizabil pentru Ollama: conexiuni persistente, reincercari
+    cu jitter, circuit breaker si distribuirea cererilor pe mai multe servere."""
+
+    def __init__(
+        self,
+        urls: Optional[List[str]] = None,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        breaker_failures: int = BREAKER_FAILURES,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+    ):
+        urls = urls or [u.strip() for u in OLLAMA_URLS.split(",") if u.strip()]
+        self.endpoints = [_Endpoint(u) for u in urls]
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+        # O singura sesiune, cu un pool de conexiuni keep-alive per server
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _pick(self) -> _Endpoint:
+        # Round-robin printre serverele al caror circuit este inchis
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.endpoints)):
+                endpoint = self.endpoints[self._next % len(self.endpoints)]
+                self._next += 1
+                if endpoint.available(now):
+                    return endpoint
+        raise OllamaUnavailableError("Toate serverele Ollama sunt indisponibile.")
+
+    def _success(self, endpoint: _Endpoint) -> None:
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.open_until = 0.0
+
+    def _failure(self, endpoint: _Endpoint) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures >= self.breaker_failures:
+                endpoint.open_until = time.monotonic() + self.breaker_cooldown
+
+    def _backoff(self, attempt: int) -> None:
+        # "Full jitter": asteptam un timp aleator, ca reincercarile sa nu vina in rafala
+        time.sleep(random.uniform(0, self.backoff_base * (2 ** attempt)))
+
+    def post(self, path: str, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            endpoint = self._pick()
+            try:
+                response = self.session.post(
+                    endpoint.url + path, json=payload, timeout=self.timeout, stream=stream
+                )
+            except requests.ConnectionError as e:
+                # Serverul nu raspunde: incercam (eventual) alt server
+                self._failure(endpoint)
+                last_error = e
+            except requests.Timeout:
+                # Modelul a depasit timpul de generare; reincercarea ar dubla asteptarea
+                self._failure(endpoint)
+                raise
+            else:
+                if response.status_code not in _RETRY_STATUS:
+                    self._success(endpoint)
+                    return response
+                self._failure(endpoint)
+                response.close()
+                last_error = requests.HTTPError(
+                    f"{endpoint.url} a raspuns cu {response.status_code}", response=response
+                )
+
+            if attempt < self.max_retries:
+                self._backoff(attempt)
+
+        raise last_error
+
+    def chat(self, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        return self.post("/api/chat", payload, stream=stream)
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from core.ollama_client import OllamaClient
+
+# Modelul vizual folosit cand nu este setat un buget de latenta
+OLLAMA_MODEL = os.environ.get("VISION_OLLAMA_MODEL", "qwen3-vl:8b")
+
+# Variantele disponibile, de la cea mai rapida la cea mai precisa
+OLLAMA_MODELS = [
+    m.strip()
+    for m in os.environ.get("VISION_OLLAMA_MODELS", "qwen3-vl:2b,qwen3-vl:8b").split(",")
+    if m.strip()
+]
+
+# Bugetul de latenta (secunde) pentru o analiza; 0 = folosim mereu OLLAMA_MODEL
+LATENCY_BUDGET = float(os.environ.get("VISION_LATENCY_BUDGET", "0"))
+
+# Cat timp tine Ollama modelul in memorie dupa ultima cerere ("-1" = pentru totdeauna)
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# La cate secunde reimprospatam incarcarea (trebuie sa fie sub KEEP_ALIVE)
+KEEPALIVE_INTERVAL = float(os.environ.get("OLLAMA_KEEPALIVE_INTERVAL", "600"))
+
+# O cerere in care Ollama a incarcat modelul mai mult de atat este o pornire "la rece"
+COLD_LOAD_SECONDS = 1.0
+
+# Cate masuratori pastram per model si tip (rece / cald)
+LATENCY_SAMPLES = 200
+
+
+class LatencyStats:
+    """Latentele recente ale cererilor catre Ollama, separat la rece si la cald."""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self._latencies: Dict[str, Dict[str, deque]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float, cold: bool) -> None:
+        with self._lock:
+            by_kind = self._latencies.setdefault(
+                model, {"cold": deque(maxlen=self.samples), "warm": deque(maxlen=self.samples)}
+            )
+            by_kind["cold" if cold else "warm"].append(seconds)
+
+    def percentile(self, model: str, kind: str, q: float) -> Optional[float]:
+        with self._lock:
+            values = list(self._latencies.get(model, {}).get(kind, ()))
+        return float(np.percentile(values, q)) if values else None
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Numarul de cereri, p50 si p99 pentru fiecare model, la rece si la cald."""
+        with self._lock:
+            snapshot = {
+                model: {kind: list(values) for kind, values in by_kind.items()}
+                for model, by_kind in self._latencies.items()
+            }
+        return {
+            model: {
+                kind: {
+                    "count": len(values),
+                    "p50": float(np.percentile(values, 50)) if values else None,
+                    "p99": float(np.percentile(values, 99)) if values else None,
+                }
+                for kind, values in by_kind.items()
+            }
+            for model, by_kind in snapshot.items()
+        }
+
+
+class ModelWarmer:
+    """Tine modelele Ollama incarcate in memorie si alege varianta dupa bugetul de latenta.
+
+    La pornire, fiecare server primeste o cerere de incarcare (fara prompt) cu
+    `keep_alive`; un thread de fundal o repeta periodic, ca modelul sa nu fie
+    descarcat in perioadele fara utilizatori.
+    """
+
+    def __init__(
+        self,
+        client: Optional[OllamaClient] = None,
+        models: Optional[List[str]] = None,
+        keep_alive: str = KEEP_ALIVE,
+        interval: float = KEEPALIVE_INTERVAL,
+        budget: float = LATENCY_BUDGET,
+    ):
+        self.client = client or OllamaClient()
+        self.budget = budget
+        self.models = list(models or (OLLAMA_MODELS if budget > 0 else [OLLAMA_MODEL]))
+        # Modelele tinute incarcate (pot fi mai multe decat cele alese dupa buget)
+        self.loaded = list(self.models)
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.latency = LatencyStats()
+        self._thread: Optional[threading.Thread] = None
+        # Trezeste bucla de fundal cand apar modele noi de incarcat
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def warm(self, model: str) -> None:
+        # Cerere fara prompt: Ollama doar incarca modelul si il pastreaza `keep_alive`
+        payload = {"model": model, "keep_alive": self.keep_alive}
+        for endpoint in self.client.endpoints:
+            start = time.monotonic()
+            try:
+                response = self.client.session.post(
+                    endpoint.url + "/api/generate", json=payload, timeout=self.client.timeout
+                )
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️ Nu am putut incarca {model} pe {endpoint.url}: {e}")
+                continue
+            if "error" in data:
+                print(f"⚠️ Nu am putut incarca {model} pe {endpoint.url}: {data['error']}")
+                continue
+            # Anuntam doar incarcarile reale, nu si reimprospatarile unui model deja in memorie
+            if data.get("load_duration", 0) / 1e9 > COLD_LOAD_SECONDS:
+                seconds = time.monotonic() - start
+                print(f"Model {model} incarcat pe {endpoint.url} in {seconds:.1f}s")
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                models = list(self.loaded)
+            for model in models:
+                self.warm(model)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def keep_loaded(self, models: List[str]) -> None:
+        """Adauga modele la cele tinute incarcate in Ollama.
+
+        Modelele noi trec primele in lista si sunt incarcate imediat, fara sa
+        asteptam urmatoarea reimprospatare."""
+        with self._lock:
+            new = [m for m in dict.fromkeys(models) if m not in self.loaded]
+            self.loaded[:0] = new
+        if new:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Porneste (o singura data) incarcarea si reimprospatarea periodica in fundal."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def observe(self, model: str, final: Dict[str, Any], seconds: float) -> None:
+        """Inregistreaza latenta unei analize; `final` este ultimul mesaj primit de la Ollama."""
+        load = (final or {}).get("load_duration", 0) / 1e9
+        self.latency.record(model, seconds, cold=load > COLD_LOAD_SECONDS)
+
+    def choose(self) -> str:
+        """Cel mai precis model a carui latenta la cald (p90) incape in buget.
+
+        Un model inca nemasurat este incercat; daca se dovedeste prea lent,
+        urmatoarele cereri trec la varianta mai rapida.
+        """
+        if self.budget <= 0:
+            return self.models[-1]
+        for model in reversed(self.models):
+            p90 = self.latency.percentile(model, "warm", 90)
+            if p90 is None or p90 <= self.budget:
+                return model
+        return self.models[0]
+
+
+_warmer: Optional[ModelWarmer] = None
+_warmer_lock = threading.Lock()
+
+
+def get_model_warmer() -> ModelWarmer:
+    """Managerul de incarcare a modelelor, comun pentru tot procesul."""
+    global _warmer
+    if _warmer is None:
+        with _warmer_lock:
+            if _warmer is None:
+                _warmer = ModelWarmer()
+    return _warmer
@@ -0,0 +1,237 @@
+import base64
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+# Algoritmul pentru hash-urile noi: "scrypt" (implicit) sau "pbkdf2"
+PASSWORD_SCHEME = os.environ.get("PASSWORD_SCHEME", "scrypt")
+
+# Cat poate dura verificarea unei parole (milisecunde); parametrii se calibreaza la pornire
+PASSWORD_BUDGET_MS = float(os.environ.get("PASSWORD_BUDGET_MS", "100"))
+
+# Cate verificari ruleaza in paralel (hashlib elibereaza GIL-ul, deci un thread per nucleu)
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+
+# Memoria maxima (MB) folosita de o verificare scrypt; limiteaza N
+PASSWORD_MAX_MEMORY_MB = int(os.environ.get("PASSWORD_MAX_MEMORY_MB", "64"))
+
+# Limitele de jos, indiferent de cat de rapida este masina
+SCRYPT_MIN_N = 2**14
+PBKDF2_MIN_ITERATIONS = 100_000
+
+# Un hash este refacut doar daca este de atatea ori mai ieftin decat parametrii curenti,
+# ca micile diferente de calibrare intre reporniri sa nu refaca toate hash-urile
+REHASH_FACTOR = 2
+
+# Limitele de sus acceptate la verificare; un hash corupt nu poate cere minute de CPU sau GB de memorie
+SCRYPT_MAX_N = 2**20
+SCRYPT_MAX_RP = 64
+PBKDF2_MAX_ITERATIONS = 10_000_000
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+LEGACY = "sha256"
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem implicit din OpenSSL (32 MB) este prea mic pentru N mare
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2**20, dklen=KEY_BYTES
+    )
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, KEY_BYTES)
+
+
+def legacy_hash(password: str) -> str:
+    """Hash-ul vechi (SHA-256 fara sare), folosit doar pentru a verifica conturile vechi."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def scheme_of(stored: str) -> str:
+    """Algoritmul unui hash salvat; hash-urile fara prefix sunt SHA-256 vechi."""
+    return stored.split("$", 1)[0] if "$" in stored else LEGACY
+
+
+def _timed(fn, repeats: int = 3) -> float:
+    # Cea mai buna din cateva rulari, ca sa nu masuram zgomotul
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate(scheme: str = PASSWORD_SCHEME, budget_ms: float = PASSWORD_BUDGET_MS) -> Dict[str, int]:
+    """Parametrii cei mai puternici a caror verificare incape in buget pe masina curenta.
+
+    Costul ambelor algoritme creste liniar cu N / numarul de iteratii, deci
+    masuram un cost mic si extrapolam.
+    """
+    budget = budget_ms / 1000
+    salt = os.urandom(SALT_BYTES)
+
+    if scheme == "pbkdf2":
+        probe = 20_000
+        seconds = _timed(lambda: _pbkdf2("calibrare", salt, probe))
+        iterations = int(probe * budget / seconds)
+        # Verificam extrapolarea o data, pe parametrii alesi, si corectam in jos
+        actual = _timed(lambda: _pbkdf2("calibrare", salt, iterations), repeats=1)
+        if actual > budget:
+            iterations = int(iterations * budget / actual)
+        return {"iterations": max(PBKDF2_MIN_ITERATIONS, iterations // 1000 * 1000)}
+
+    probe = 2**12
+    seconds = _timed(lambda: _scrypt("calibrare", salt, probe, SCRYPT_R, SCRYPT_P))
+    # N trebuie sa fie putere a lui 2; memoria folosita este 128 * r * N octeti
+    n = 2 ** int(math.log2(max(1.0, probe * budget / seconds)))
+    max_n = 2 ** int(math.log2(PASSWORD_MAX_MEMORY_MB * 2**20 / (128 * SCRYPT_R)))
+    n = max(SCRYPT_MIN_N, min(n, max_n))
+    # Verificam extrapolarea o data si injumatatim N daca depaseste bugetul
+    if n > SCRYPT_MIN_N:
+        actual = _timed(lambda: _scrypt("calibrare", salt, n, SCRYPT_R, SCRYPT_P), repeats=1)
+        if actual > budget:
+            n //= 2
+    return {"n": n, "r": SCRYPT_R, "p": SCRYPT_P}
+
+
+class PasswordHasher:
+    """Hash-uri de parola versionate (`scrypt$...` sau `pbkdf2_sha256$...`).
+
+    Parametrii sunt calibrati o singura data, la prima folosire, dupa bugetul
+    de latenta. Verificarile ruleaza intr-un pool de thread-uri de marimea
+    numarului de nuclee, ca un val de login-uri sa nu supraincarce procesul.
+    """
+
+    def __init__(
+        self,
+        scheme: str = PASSWORD_SCHEME,
+        budget_ms: float = PASSWORD_BUDGET_MS,
+        workers: int = PASSWORD_WORKERS,
+        params: Optional[Dict[str, int]] = None,
+    ):
+        self.scheme = scheme
+        self.budget_ms = budget_ms
+        self._params = params
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._dummy: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def params(self) -> Dict[str, int]:
+        if self._params is None:
+            with self._lock:
+                if self._params is None:
+                    self._params = calibrate(self.scheme, self.budget_ms)
+        return self._params
+
+    @property
+    def dummy_hash(self) -> str:
+        """Hash cu parametrii curenti, verificat pentru utilizatorii inexistenti,
+        ca un login esuat sa dureze la fel indiferent daca username-ul exista."""
+        if self._dummy is None:
+            dummy = self.hash(os.urandom(16).hex())
+            with self._lock:
+                if self._dummy is None:
+                    self._dummy = dummy
+        return self._dummy
+
+    def _hash(self, password: str) -> str:
+        salt = os.urandom(SALT_BYTES)
+        params = self.params
+        if self.scheme == "pbkdf2":
+            key = _pbkdf2(password, salt, params["iterations"])
+            return f"{PBKDF2}${params['iterations']}${_b64(salt)}${_b64(key)}"
+        key = _scrypt(password, salt, params["n"], params["r"], params["p"])
+        return f"{SCRYPT}${params['n']}${params['r']}${params['p']}${_b64(salt)}${_b64(key)}"
+
+    def _verify(self, password: str, stored: str) -> bool:
+        # Fiecare hash se verifica cu parametrii cu care a fost creat
+        scheme = scheme_of(stored)
+        try:
+            if scheme == LEGACY:
+                return hmac.compare_digest(legacy_hash(password), stored)
+            if scheme == PBKDF2:
+                _, iterations, salt, key = stored.split("$")
+                if not 0 < int(iterations) <= PBKDF2_MAX_ITERATIONS:
+                    return False
+                expected = _pbkdf2(password, _unb64(salt), int(iterations))
+            elif scheme == SCRYPT:
+                _, n, r, p, salt, key = stored.split("$")
+                n, r, p = int(n), int(r), int(p)
+                if not (1 < n <= SCRYPT_MAX_N and 0 < r * p <= SCRYPT_MAX_RP):
+                    return False
+                expected = _scrypt(password, _unb64(salt), n, r, p)
+            else:
+                return False
+        except (ValueError, MemoryError):
+            # Hash salvat corupt
+            return False
+        return hmac.compare_digest(expected, _unb64(key))
+
+    def hash_async(self, password: str) -> "Future[str]":
+        """Porneste calculul unui hash nou in pool si intoarce un Future."""
+        return self._executor.submit(self._hash, password)
+
+    def hash(self, password: str) -> str:
+        """Hash nou, cu sare aleatoare si parametrii curenti, calculat in pool."""
+        return self.hash_async(password).result()
+
+    def verify_async(self, password: str, stored: str) -> "Future[bool]":
+        """Porneste verificarea in pool si intoarce un Future."""
+        return self._executor.submit(self._verify, password, stored)
+
+    def verify(self, password: str, stored: str) -> bool:
+        """Verifica parola in pool si asteapta rezultatul."""
+        return self.verify_async(password, stored).result()
+
+    def needs_rehash(self, stored: str) -> bool:
+        """True pentru hash-uri vechi sau create cu alt algoritm ori parametri mult mai slabi."""
+        scheme = scheme_of(stored)
+        params = self.params
+        try:
+            if self.scheme == "pbkdf2":
+                if scheme != PBKDF2:
+                    return True
+                return int(stored.split("$")[1]) * REHASH_FACTOR <= params["iterations"]
+            if scheme != SCRYPT:
+                return True
+            _, n, r, p, *_ = stored.split("$")
+            cost = int(n) * int(r) * int(p)
+            return cost * REHASH_FACTOR <= params["n"] * params["r"] * params["p"]
+        except (ValueError, IndexError):
+            return True
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Hasher-ul de parole comun pentru tot procesul."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
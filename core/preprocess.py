@@ -0,0 +1,70 @@
+import base64
+import io
+import os
+import time
+
+from PIL import Image, ImageOps
+
+# Latura maxima a imaginii trimise la detectorul YOLO
+DETECT_LONG_EDGE = int(os.environ.get("VISION_DETECT_LONG_EDGE", "1280"))
+
+# Latura maxima, formatul si calitatea imaginii trimise la modelul Ollama
+LLM_LONG_EDGE = int(os.environ.get("VISION_LLM_LONG_EDGE", "768"))
+LLM_FORMAT = os.environ.get("VISION_LLM_FORMAT", "JPEG").upper()
+LLM_QUALITY = int(os.environ.get("VISION_LLM_QUALITY", "85"))
+
+# Salvarea imaginilor intermediare pe disc, utila doar la depanare
+DEBUG_DUMPS = os.environ.get("VISION_DEBUG_DUMPS", "0") == "1"
+DEBUG_DIR = os.environ.get("VISION_DEBUG_DIR", "debug")
+
+
+def downscale(image: Image.Image, long_edge: int) -> Image.Image:
+    """Micsoreaza imaginea (pastrand proportiile) doar daca depaseste latura data."""
+    if max(image.size) <= long_edge:
+        return image
+    scale = long_edge / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+class ImagePreprocessor:
+    """Pregateste imaginile pentru detector si pentru modelul vizual."""
+
+    def __init__(
+        self,
+        detect_long_edge: int = DETECT_LONG_EDGE,
+        llm_long_edge: int = LLM_LONG_EDGE,
+        llm_format: str = LLM_FORMAT,
+        llm_quality: int = LLM_QUALITY,
+        debug_dumps: bool = DEBUG_DUMPS,
+        debug_dir: str = DEBUG_DIR,
+    ):
+        self.detect_long_edge = detect_long_edge
+        self.llm_long_edge = llm_long_edge
+        self.llm_format = llm_format
+        self.llm_quality = llm_quality
+        self.debug_dumps = debug_dumps
+        self.debug_dir = debug_dir
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        # Rotim dupa EXIF (pozele de pe telefon), convertim la RGB si micsoram pentru YOLO
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return downscale(image, self.detect_long_edge)
+
+    def encode_for_llm(self, image: Image.Image) -> str:
+        # Imaginea trimisa la Ollama: micsorata si comprimata, apoi in Base64
+        image = downscale(image, self.llm_long_edge)
+        buf = io.BytesIO()
+        image.save(buf, format=self.llm_format, quality=self.llm_quality)
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+    def dump(self, image: Image.Image, name: str) -> None:
+        # Salvam imaginea intermediara doar cand depanarea este activata
+        if not self.debug_dumps:
+            return
+        os.makedirs(self.debug_dir, exist_ok=True)
+        path = os.path.join(self.debug_dir, f"{int(time.time() * 1000)}_{name}.png")
+        image.save(path)
+        print(f"DEBUG: imagine salvata ca {path}")
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.history_store import get_store
+
+# Distanta Hamming maxima (din 64 de biti) la care doua poze sunt considerate aceeasi masa
+SIMILAR_MAX_DISTANCE = int(os.environ.get("SIMILAR_MAX_DISTANCE", "6"))
+
+# Cate mese tinem minte per utilizator si pentru cati utilizatori (cei mai recenti)
+SIMILAR_PER_USER = int(os.environ.get("SIMILAR_PER_USER", "200"))
+SIMILAR_MAX_USERS = int(os.environ.get("SIMILAR_MAX_USERS", "1000"))
+
+# Mesele salvate ale unui utilizator: (user, limita) -> [(dHash, rezultat, analizat la)], cele mai noi primele
+Loader = Callable[[str, int], List[Tuple[int, Dict[str, Any], float]]]
+
+# Campurile rezultatului unei analize care sunt salvate si in istoric
+_RESULT_FIELDS = ("dish_name", "total_calories", "total_protein", "total_carbs", "total_fat", "ingredients")
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """Hash perceptual (diferenta intre pixeli vecini) pe 64 de biti.
+
+    Doua poze ale aceleiasi mese, facute din unghiuri sau lumini putin
+    diferite, au hash-uri care difera in foarte putini biti.
+    """
+    small = np.asarray(
+        image.convert("L").resize((size + 1, size), Image.Resampling.BOX), dtype=np.int16
+    )
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def dhash_hex(image_hash: int) -> str:
+    """Forma salvata in istoric a unui dHash (16 cifre hex)."""
+    return f"{image_hash:016x}"
+
+
+def history_loader(user: str, limit: int, store=None) -> List[Tuple[int, Dict[str, Any], float]]:
+    """Ultimele mese din istoric care au dHash salvat, ca indexul sa supravietuiasca repornirilor."""
+    meals = []
+    for entry in (store or get_store()).recent_with_dhash(user, limit):
+        analyzed_at = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+        result = {field: entry[field] for field in _RESULT_FIELDS}
+        meals.append((int(entry["image_dhash"], 16), result, analyzed_at))
+    return meals
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    # numpy >= 2.0 are popcount nativ; altfel numaram bitii din octeti
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class _UserIndex:
+    def __init__(self, capacity: int):
+        self.hashes = np.zeros(capacity, dtype=np.uint64)
+        self.results: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.used = np.zeros(capacity, dtype=np.float64)  # ultima folosire, pentru eliminare
+        self.size = 0
+
+
+class SimilarMealIndex:
+    """Cauta, printre mesele analizate ale unui utilizator, una aproape identica.
+
+    Pentru fiecare utilizator tinem un tablou de hash-uri dHash; cautarea
+    calculeaza distanta Hamming fata de toate intr-o singura operatie NumPy.
+    Cand indexul unui utilizator este plin, masa folosita cel mai demult este
+    inlocuita; utilizatorii inactivi sunt uitati primii.
+
+    Cu un `loader`, indexul unui utilizator este populat la prima lui folosire
+    (si dupa ce a fost uitat) din mesele salvate, nu doar din cele analizate
+    de la pornirea procesului.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = SIMILAR_MAX_DISTANCE,
+        per_user: int = SIMILAR_PER_USER,
+        max_users: int = SIMILAR_MAX_USERS,
+        loader: Optional[Loader] = None,
+    ):
+        self.max_distance = max_distance
+        self.per_user = per_user
+        self.max_users = max_users
+        self.loader = loader
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        self._counts = {"lookups": 0, "hits": 0, "added": 0, "evicted": 0, "seeded": 0}
+        self._lock = threading.Lock()
+
+    def _new_index(self, user: str) -> _UserIndex:
+        # Sub lock: utilizatorul inactiv cel mai demult face loc celui nou
+        if len(self._users) >= self.max_users:
+            self._users.popitem(last=False)
+        index = self._users[user] = _UserIndex(self.per_user)
+        return index
+
+    def _seed(self, user: str) -> None:
+        # Citim istoricul in afara lock-ului, ca ceilalti utilizatori sa nu astepte baza de date
+        if self.loader is None:
+            return
+        with self._lock:
+            if user in self._users:
+                return
+        try:
+            meals = self.loader(user, self.per_user)
+        except Exception as e:
+            print(f"⚠️ Nu am putut incarca mesele salvate pentru {user}: {e}")
+            meals = []
+
+        with self._lock:
+            if user in self._users:
+                return
+            index = self._new_index(user)
+            # Cele mai vechi primele, ca in ordinea in care ar fi fost adaugate
+            for image_hash, result, analyzed_at in reversed(meals[: self.per_user]):
+                slot = index.size
+                index.hashes[slot] = image_hash
+                index.results[slot] = {"result": result, "analyzed_at": analyzed_at}
+                index.used[slot] = analyzed_at
+                index.size += 1
+            self._counts["seeded"] += index.size
+
+    def find(self, user: str, image_hash: int) -> Optional[Dict[str, Any]]:
+        """Cea mai apropiata masa a utilizatorului, daca este sub prag.
+
+        Intoarce {"result", "distance", "analyzed_at"} sau None."""
+        self._seed(user)
+        with self._lock:
+            self._counts["lookups"] += 1
+            index = self._users.get(user)
+            if index is None or index.size == 0:
+                return None
+            self._users.move_to_end(user)
+
+            distances = _popcount(
+                np.bitwise_xor(index.hashes[: index.size], np.uint64(image_hash))
+            )
+            best = int(distances.argmin())
+            if distances[best] > self.max_distance:
+                return None
+
+            self._counts["hits"] += 1
+            index.used[best] = time.time()
+            result = index.results[best]
+            return {
+                "result": result["result"],
+                "distance": int(distances[best]),
+                "analyzed_at": result["analyzed_at"],
+            }
+
+    def add(self, user: str, image_hash: int, result: Dict[str, Any]) -> None:
+        """Retine rezultatul unei analize reusite pentru poza data."""
+        self._seed(user)
+        now = time.time()
+        with self._lock:
+            index = self._users.get(user)
+            if index is None:
+                index = self._new_index(user)
+            self._users.move_to_end(user)
+
+            # Aceeasi poza (hash identic) doar isi actualizeaza rezultatul
+            same = np.flatnonzero(index.hashes[: index.size] == np.uint64(image_hash))
+            if len(same):
+                slot = int(same[0])
+            elif index.size < self.per_user:
+                slot = index.size
+                index.size += 1
+            else:
+                slot = int(index.used.argmin())
+                self._counts["evicted"] += 1
+
+            index.hashes[slot] = image_hash
+            index.results[slot] = {"result": result, "analyzed_at": now}
+            index.used[slot] = now
+            self._counts["added"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Contoarele indexului si rata de potriviri."""
+        with self._lock:
+            counts = dict(self._counts)
+            counts["users"] = len(self._users)
+            counts["entries"] = sum(index.size for index in self._users.values())
+        counts["hit_rate"] = counts["hits"] / counts["lookups"] if counts["lookups"] else 0.0
+        return counts
@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Any, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Coloanele cu valori nutritionale, pastrate ca float32 pentru a injumatati memoria
+MACRO_COLUMNS = ["calories", "protein", "carbs", "fat"]
+
+
+def _empty_frame() -> pd.DataFrame:
+    frame = pd.DataFrame(
+        {c: pd.Series(dtype="float32") for c in MACRO_COLUMNS}
+        | {"meals": pd.Series(dtype="int32")},
+        index=pd.DatetimeIndex([], name="date"),
+    )
+    return frame
+
+
+def build_daily_frame(daily_totals: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Cadru coloanar cu un rand per zi, indexat dupa data (datetime64)."""
+    frame = pd.DataFrame.from_records(
+        list(daily_totals), columns=["date", *MACRO_COLUMNS, "meals"]
+    )
+    if frame.empty:
+        return _empty_frame()
+
+    frame["date"] = pd.to_datetime(frame["date"], format="%Y-%m-%d", errors="coerce")
+    frame = frame.dropna(subset=["date"]).set_index("date").sort_index()
+    frame[MACRO_COLUMNS] = frame[MACRO_COLUMNS].astype("float32")
+    frame["meals"] = frame["meals"].astype("int32")
+    return frame
+
+
+def daily_frame_from_meals(meals: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Acelasi cadru, calculat direct din mese printr-un singur groupby.
+
+    Folosit doar de benchmarks/bench_stats.py (istoric generat, fara baza de date);
+    aplicatia citeste totalurile zilnice precalculate prin build_daily_frame.
+    """
+    raw = pd.DataFrame.from_records(
+        list(meals),
+        columns=["date", "total_calories", "total_protein", "total_carbs", "total_fat"],
+    )
+    if raw.empty:
+        return _empty_frame()
+
+    raw.columns = ["date", *MACRO_COLUMNS]
+    raw["date"] = pd.to_datetime(raw["date"], format="%Y-%m-%d", errors="coerce")
+    raw[MACRO_COLUMNS] = raw[MACRO_COLUMNS].apply(pd.to_numeric, errors="coerce").fillna(0)
+
+    grouped = raw.dropna(subset=["date"]).groupby("date")
+    frame = grouped[MACRO_COLUMNS].sum().astype("float32")
+    frame["meals"] = grouped.size().astype("int32")
+    return frame
+
+
+def days_range(frame: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+    """Zilele din intervalul [start, end], cu 0 pentru zilele fara mese."""
+    index = pd.date_range(start, end, freq="D", name="date")
+    return frame.reindex(index, fill_value=0)
+
+
+def week_summary(week: pd.DataFrame, min_daily: float, max_daily: float) -> Dict[str, Any]:
+    """Statisticile raportului saptamanal pentru cele 7 zile primite."""
+    calories = week["calories"].to_numpy()
+    return {
+        "total": float(calories.sum()),
+        "avg": float(calories.mean()) if len(calories) else 0.0,
+        "days_under": int(np.count_nonzero((calories > 0) & (calories < min_daily))),
+        "days_over": int(np.count_nonzero(calories > max_daily)),
+        "days_zero": int(np.count_nonzero(calories == 0)),
+    }
@@ -0,0 +1,304 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: ramane doar lock-ul din proces
+    fcntl = None
+
+# Unde sunt salvati utilizatorii: "sqlite" (implicit) sau "json" (formatul vechi)
+USER_BACKEND = os.environ.get("USER_BACKEND", "sqlite")
+
+# Baza de date SQLite cu utilizatorii
+USERS_DB = os.environ.get("USERS_DB", "users.db")
+
+# Fisierul JSON vechi; importat o singura data in SQLite sau folosit direct de backend-ul "json"
+USERS_FILE = os.environ.get("USERS_FILE", "users.json")
+
+# Cati utilizatori tinem in cache-ul de citire (LRU)
+USER_CACHE_ENTRIES = int(os.environ.get("USER_CACHE_ENTRIES", "10000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('users_version', 0);
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'users_version';
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'users_version';
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'users_version';
+END;
+"""
+
+
+class UserRepository(ABC):
+    """Interfata comuna pentru stocarea conturilor.
+
+    Un utilizator este un dictionar cu cel putin cheia "password_hash".
+    """
+
+    @abstractmethod
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """Utilizatorul cu acest nume sau None."""
+
+    @abstractmethod
+    def create(self, username: str, password_hash: str) -> bool:
+        """Adauga utilizatorul; False daca username-ul exista deja."""
+
+    @abstractmethod
+    def update_hash(self, username: str, password_hash: str) -> None:
+        """Inlocuieste hash-ul parolei (ex. la migrarea catre un algoritm nou)."""
+
+
+class _ReadCache:
+    # LRU mic pentru utilizatorii cititi recent; golit cand datele se schimba din afara
+    def __init__(self, entries: int):
+        self.entries = entries
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def validate(self, version) -> None:
+        # Un singur marcaj pentru tot procesul: orice scriere in baza il schimba
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+
+    def get(self, username: str):
+        with self._lock:
+            if username not in self._data:
+                return False, None
+            self._data.move_to_end(username)
+            return True, self._data[username]
+
+    def put(self, username: str, user: Dict[str, Any], version) -> None:
+        with self._lock:
+            # Un rand citit inainte de o scriere noua nu intra in cache-ul noii versiuni
+            if version != self._version:
+                return
+            self._data[username] = user
+            self._data.move_to_end(username)
+            while len(self._data) > self.entries:
+                self._data.popitem(last=False)
+
+
+class SqliteUserRepository(UserRepository):
+    """Utilizatori in SQLite: cheie primara pe username, inserari atomice.
+
+    Citirile trec printr-un cache in memorie. Trigger-ele pe tabelul `users`
+    incrementeaza `meta.users_version` la orice scriere (din orice proces sau
+    conexiune); fiecare `get` compara acest marcaj si goleste cache-ul daca s-a schimbat.
+    Utilizatorii inexistenti nu sunt tinuti in cache.
+    """
+
+    def __init__(self, path: str = USERS_DB, cache_entries: int = USER_CACHE_ENTRIES):
+        self.path = path
+        self._local = threading.local()
+        self._cache = _ReadCache(cache_entries)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # O conexiune per thread; Streamlit ruleaza fiecare sesiune pe alt thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _check_version(self, conn: sqlite3.Connection):
+        # O citire pe cheia primara din meta, la fiecare get
+        row = conn.execute("SELECT value FROM meta WHERE key = 'users_version'").fetchone()
+        version = row[0] if row else None
+        self._cache.validate(version)
+        return version
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        version = self._check_version(conn)
+        found, user = self._cache.get(username)
+        if found:
+            return user
+
+        row = conn.execute(
+            "SELECT username, password_hash, created FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+        if row is None:
+            # Nu tinem minte lipsa: contul poate fi creat oricand de alt proces
+            return None
+        user = dict(row)
+        self._cache.put(username, user, version)
+        return user
+
+    def create(self, username: str, password_hash: str) -> bool:
+        conn = self._connect()
+        created = datetime.now().isoformat(timespec="seconds")
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                    (username, password_hash, created),
+                )
+        except sqlite3.IntegrityError:
+            # Cheia primara garanteaza ca doua inregistrari simultane nu pot crea acelasi cont
+            return False
+        return True
+
+    def update_hash(self, username: str, password_hash: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE username = ?",
+                (password_hash, username),
+            )
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def migrate_from_json(self, path: str = USERS_FILE) -> int:
+        """Importa o singura data utilizatorii din fisierul users.json vechi."""
+        conn = self._connect()
+        done = conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done is not None or not os.path.exists(path):
+            return 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [
+            (username, data["password_hash"], now)
+            for username, data in legacy.items()
+            if isinstance(data, dict) and data.get("password_hash")
+        ]
+
+        # Importul si marcajul se fac in aceeasi tranzactie; conturile create deja in SQLite raman
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO users (username, password_hash, created) VALUES (?, ?, ?)",
+                    rows,
+                )
+                conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (now,))
+        except sqlite3.IntegrityError:
+            # Alt proces a migrat intre timp
+            return 0
+        return len(rows)
+
+
+class JsonUserRepository(UserRepository):
+    """Formatul vechi (users.json), pastrat pentru instalarile existente.
+
+    Fisierul este citit din nou doar cand i se schimba data modificarii sau
+    marimea; scrierea se face sub lock, intr-un fisier temporar mutat atomic.
+    """
+
+    def __init__(self, path: str = USERS_FILE):
+        self.path = path
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        # Recitim fisierul doar daca s-a schimbat de la ultima citire
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            if stamp is None:
+                self._users = {}
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._users = json.load(f)
+            self._stamp = stamp
+        return self._users
+
+    @contextmanager
+    def _file_lock(self):
+        # Lock intre procese (unde exista fcntl), pe un fisier separat
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, users: Dict[str, Dict[str, Any]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(users, f, indent=4)
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(username)
+
+    def create(self, username: str, password_hash: str) -> bool:
+        with self._lock, self._file_lock():
+            users = dict(self._load())
+            if username in users:
+                return False
+            users[username] = {"password_hash": password_hash}
+            self._save(users)
+            self._users = users
+            return True
+
+    def update_hash(self, username: str, password_hash: str) -> None:
+        with self._lock, self._file_lock():
+            users = dict(self._load())
+            if username in users:
+                users[username] = {**users[username], "password_hash": password_hash}
+                self._save(users)
+                self._users = users
+
+
+_repository: Optional[UserRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_user_repository() -> UserRepository:
+    """Depozitul de utilizatori configurat, creat (si migrat) la prima folosire."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                if USER_BACKEND == "json":
+                    repository = JsonUserRepository()
+                else:
+                    repository = SqliteUserRepository()
+                    repository.migrate_from_json()
+                _repository = repository
+    return _repository
@@ -1,10 +1,160 @@
-import io
-import base64
-from openai import OpenAI
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
 from PIL import Image
 import json
-from ultralytics import YOLO
-import requests
+
+from core.analysis_cache import AnalysisCache, image_key
+from core.crop_gate import (
+    EMPTY_MISSED,
+    FULL,
+    PROBE,
+    PROBE_CLOSEUP,
+    PROBE_FULL,
+    PROBE_SAMPLED,
+    PROBE_UNSURE,
+    WIDE,
+    CropGate,
+)
+from core.detectors import DETECTOR_BACKEND, DETECTOR_MODEL, DEFAULT_MODELS, create_detector
+from core.json_stream import IncrementalJsonParser
+from core.model_registry import registry
+from core.model_router import ROUTING, ModelRouter
+from core.nutrition_db import get_nutrition_table
+from core.nutrition_parser import (
+    TOTAL_FIELDS,
+    NutritionParseError,
+    get_parse_metrics,
+    normalize,
+    parse_nutrition,
+    to_number,
+)
+from core.ollama_client import OllamaClient
+from core.ollama_warmup import KEEP_ALIVE, get_model_warmer
+from core.preprocess import ImagePreprocessor
+from core.similar_meals import SimilarMealIndex, dhash, dhash_hex, history_loader
+
+
+# Raspunsul Ollama este citit token cu token (NDJSON), ca pagina sa arate rezultate partiale
+OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "1") != "0"
+
+# Cu tabelul nutritional local, modelul da doar ingredientele si gramajul (prompt scurt),
+# iar caloriile si macronutrientii se calculeaza din tabel
+NUTRITION_DB = os.environ.get("VISION_NUTRITION_DB", "1") != "0"
+COMPACT_NUM_PREDICT = int(os.environ.get("VISION_COMPACT_NUM_PREDICT", "120"))
+FULL_NUM_PREDICT = 150
+
+# Cate imagini sunt trimise simultan la Ollama dintr-un singur batch
+LLM_PARALLELISM = int(os.environ.get("VISION_LLM_PARALLELISM", "2"))
+
+# Clasele COCO pastrate la detectie: sticla, pahar de vin, cana, castron
+PLATE_CLASSES = [39, 40, 41, 45]
+
+# Cate farfurii analizam cel mult dintr-o poza si cat de mici pot fi (fata de poza)
+MAX_PLATES = int(os.environ.get("VISION_MAX_PLATES", "4"))
+MIN_PLATE_AREA = float(os.environ.get("VISION_MIN_PLATE_AREA", "0.02"))
+
+# Doua detectii care se suprapun mai mult de atat sunt considerate aceeasi farfurie
+MAX_PLATE_OVERLAP = float(os.environ.get("VISION_MAX_PLATE_OVERLAP", "0.5"))
+
+# La cate secunde scriem in log statisticile analizei (0 = niciodata)
+STATS_LOG_INTERVAL = float(os.environ.get("VISION_STATS_LOG_INTERVAL", "600"))
+
+# Numele sub care detectorul este tinut in registrul de modele
+DETECTOR_NAME = f"{DETECTOR_BACKEND}:{DETECTOR_MODEL or DEFAULT_MODELS.get(DETECTOR_BACKEND)}"
+
+
+def select_plates(
+    xyxy: np.ndarray,
+    image_area: float,
+    max_plates: int = MAX_PLATES,
+    min_area: float = MIN_PLATE_AREA,
+    max_overlap: float = MAX_PLATE_OVERLAP,
+) -> np.ndarray:
+    """Alege farfuriile distincte, de la cea mai mare la cea mai mica.
+
+    O detectie este pastrata doar daca nu se suprapune (raportat la cea mai
+    mica dintre cele doua) cu o farfurie deja aleasa.
+    """
+    if len(xyxy) == 0:
+        return xyxy.reshape(0, 4)
+
+    areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    order = np.argsort(-areas)
+    order = order[areas[order] >= min_area * image_area]
+
+    kept = []
+    for idx in order:
+        if kept:
+            others = xyxy[kept]
+            w = np.minimum(others[:, 2], xyxy[idx, 2]) - np.maximum(others[:, 0], xyxy[idx, 0])
+            h = np.minimum(others[:, 3], xyxy[idx, 3]) - np.maximum(others[:, 1], xyxy[idx, 1])
+            inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+            overlap = inter / np.minimum(areas[kept], areas[idx])
+            if (overlap > max_overlap).any():
+                continue
+        kept.append(idx)
+        if len(kept) == max_plates:
+            break
+    return xyxy[kept]
+
+
+def merge_plates(plates: List[dict]) -> dict:
+    """Combina rezultatele farfuriilor dintr-o poza intr-o singura masa."""
+    if len(plates) == 1:
+        return plates[0]
+
+    merged = {"ingredients": []}
+    names = []
+    for plate in plates:
+        name = plate.get("dish_name")
+        if name and name not in names:
+            names.append(name)
+        merged["ingredients"].extend(plate.get("ingredients") or [])
+        for field in TOTAL_FIELDS:
+            value = to_number(plate.get(field))
+            if value is not None:
+                merged[field] = merged.get(field, 0) + value
+        if plate.get("macros_incomplete"):
+            merged["macros_incomplete"] = True
+    if names:
+        merged["dish_name"] = " + ".join(names)
+
+    # Modelul care a analizat masa (sau modelele, daca farfuriile au mers pe niveluri diferite)
+    models = list(dict.fromkeys(plate["model"] for plate in plates if plate.get("model")))
+    if models:
+        merged["model"] = "+".join(models)
+    return merged
+
+
+def merge_answers(answers: List[dict]) -> dict:
+    """Combina rezultatele parsate ale farfuriilor aceleiasi poze.
+
+    Daca una dintre farfurii a esuat, toata poza esueaza: o masa cu o farfurie
+    lipsa ar fi salvata in cache si in istoric cu doar o parte din calorii."""
+    failed = [answer for answer in answers if "error" in answer]
+    if not failed:
+        return merge_plates(answers)
+    if len(answers) == 1:
+        return failed[0]
+
+    # Eroarea primei farfurii esuate; raspunsul brut (daca exista) ramane pentru afisare
+    error = dict(failed[0])
+    error["error"] = f"Analiza a esuat pentru {len(failed)} din {len(answers)} farfurii: {failed[0]['error']}"
+    return error
+
+
+def _load_detector():
+    # Backend-ul (PyTorch, ONNX Runtime, OpenVINO) se alege din configurare
+    return create_detector()
+
+
+def _warmup_detector(model):
+    # Rulam o inferenta pe o imagine goala pentru a initializa complet modelul
+    model([Image.new("RGB", (640, 640))])
 
 
 # class VisionAnalyzer:
@@ -101,13 +251,51 @@ import requests
 #             return f"Eroare la conectarea cu Ollama: {e}"
 
 class VisionAnalyzer:
-    def __init__(self):
-        # YOLO pentru detectarea farfuriei
-        self.detector = YOLO("yolov8s.pt")
+    def __init__(self, client: OllamaClient = None):
+        # Incarcarea modelelor Ollama in memorie si alegerea variantei (2b/8b) dupa buget
+        self.warmer = get_model_warmer()
+
+        # Modelul rapid raspunde intai; cel precis doar cand rezultatul este nesigur
+        self.router = ModelRouter(self.warmer) if ROUTING else None
+
+        # Client HTTP partajat: conexiuni keep-alive, reincercari, mai multe servere
+        self.client = client or OllamaClient()
+
+        # Orientare EXIF, micsorare si comprimare inainte de YOLO si Ollama
+        self.preprocessor = ImagePreprocessor()
+
+        # Cache pentru rezultate, ca reincarcarile aceleiasi poze sa nu refaca analiza
+        self.cache = AnalysisCache()
+
+        # Decide cand detectia completa YOLO merita rulata
+        self.gate = CropGate()
+
+        # Valorile nutritionale la 100 g, pentru recalcularea estimarilor modelului
+        self.nutrition = get_nutrition_table() if NUTRITION_DB else None
 
-        # Modelul Ollama (vizual + rapid pe CPU)
-        self.ollama_model = "qwen3-vl:8b"
-        self.ollama_url = "http://localhost:11434/api/chat"
+        # Mesele deja analizate ale fiecarui utilizator, pentru pozele aproape identice;
+        # indexul fiecarui utilizator este populat la prima folosire din istoricul salvat
+        self.similar = SimilarMealIndex(loader=history_loader)
+
+        # Statisticile de mai sus ajung periodic in log
+        if STATS_LOG_INTERVAL > 0:
+            threading.Thread(target=self._log_stats, daemon=True).start()
+
+    @property
+    def ollama_model(self) -> str:
+        # Modelul Ollama (vizual + rapid pe CPU), ales dupa bugetul de latenta;
+        # folosit doar cu rutarea oprita (altfel router-ul tine cont de buget)
+        return self.warmer.choose()
+
+    @property
+    def detector(self):
+        # Detectorul de farfurii, incarcat o singura data per proces
+        return registry.get(DETECTOR_NAME, _load_detector, _warmup_detector)
+
+    def preload(self):
+        """Porneste in fundal incarcarea detectorului si a modelului Ollama, daca nu sunt incarcate."""
+        registry.preload(DETECTOR_NAME, _load_detector, _warmup_detector)
+        self.warmer.start()
 
     def _prompt(self):
         """Prompt optimizat pentru viteză și acuratețe."""
@@ -118,93 +306,360 @@ class VisionAnalyzer:
             "{'food': '', 'ingredients': [], 'calories': 0}."
         )
 
-    def _crop_plate(self, image: Image.Image):
-        results = self.detector(image)
-        boxes = results[0].boxes
-
-        if len(boxes) == 0:
-            return None
-
-        PLATE_CLASSES = [41, 45]  # bowl, plate
+    @staticmethod
+    def _plate_boxes(img: Image.Image, det: np.ndarray) -> np.ndarray:
+        # Filtrare vectorizata pe tabloul de detectii (x1, y1, x2, y2, incredere, clasa)
+        mask = np.isin(det[:, 5].astype(int), PLATE_CLASSES)
+        return select_plates(det[mask, :4], img.width * img.height)
 
-        # Filtrăm doar farfuriile
-        plate_boxes = [
-            b for b in boxes
-            if int(b.cls[0]) in PLATE_CLASSES
+    @staticmethod
+    def _plate_score(det: np.ndarray) -> float:
+        # Increderea celei mai sigure detectii de farfurie (0 daca nu exista niciuna)
+        mask = np.isin(det[:, 5].astype(int), PLATE_CLASSES)
+        return float(det[mask, 4].max()) if mask.any() else 0.0
+
+    def _crop_plates(self, images: List[Image.Image]):
+        """Detecteaza farfuriile pentru toate imaginile, in batch-uri YOLO.
+
+        Poarta decide pentru fiecare poza daca ajunge o trecere rapida la rezolutie
+        mica sau este nevoie de detectia completa. Intoarce, pentru fiecare imagine,
+        lista farfuriilor decupate (poate fi goala)."""
+        paths = [self.gate.classify(img) for img in images]
+        crops = [[] for _ in images]
+
+        # Trecerea rapida, la rezolutie mica, pentru toate pozele care o cer
+        probe = [n for n, path in enumerate(paths) if path == PROBE]
+        if probe:
+            detections = self.detector([images[n] for n in probe], imgsz=self.gate.probe_size)
+            for n, det in zip(probe, detections):
+                paths[n], box = self.gate.after_probe(
+                    images[n], self._plate_boxes(images[n], det), self._plate_score(det)
+                )
+                if paths[n] == PROBE_CLOSEUP:
+                    crops[n] = [images[n].crop(box)]
+
+        # Detectia completa doar pentru pozele cu mai multe farfurii (sau farfurii mici),
+        # cu detectii nesigure la trecerea rapida si pentru esantionul de poze goale
+        full = [
+            n
+            for n, path in enumerate(paths)
+            if path in (FULL, WIDE, PROBE_FULL, PROBE_UNSURE, PROBE_SAMPLED)
         ]
+        if full:
+            detections = self.detector([images[n] for n in full])
+            for n, det in zip(full, detections):
+                plates = self._plate_boxes(images[n], det)
+                crops[n] = [images[n].crop(tuple(box)) for box in plates.tolist()]
+                # Farfurii pe care trecerea rapida le-ar fi ratat
+                if paths[n] == PROBE_SAMPLED and len(plates):
+                    self.gate.record(EMPTY_MISSED)
 
-        if len(plate_boxes) == 0:
-            return None
+        for path in paths:
+            self.gate.record(path)
+        return crops
 
-        # Alegem farfuria cu aria cea mai mare
-        def area(b):
-            x1, y1, x2, y2 = b.xyxy[0].tolist()
-            return (x2 - x1) * (y2 - y1)
+    def _ask_ollama(self, cropped_image: Image.Image, on_progress=None, model: str = None) -> dict:
+        """Trimite farfuria decupată la Ollama pentru analiză.
 
-        best = max(plate_boxes, key=area)
+        Intoarce rezultatul validat sau un dictionar cu cheia "error"."""
 
-        x1, y1, x2, y2 = best.xyxy[0].tolist()
-        return image.crop((x1, y1, x2, y2))
+        # Convertim imaginea în base64 (micsorata si comprimata)
+        img_b64 = self.preprocessor.encode_for_llm(cropped_image)
 
-    def _ask_ollama(self, cropped_image: Image.Image):
-        """Trimite farfuria decupată la Ollama pentru analiză."""
+        # Streaming doar daca cineva asteapta rezultatele partiale
+        stream = OLLAMA_STREAM and on_progress is not None
 
-        # Convertim imaginea în base64
-        cropped_image.save("debug_plate.png")
-        print("DEBUG: imagine trimisă la Ollama salvată ca debug_plate.png")
-        buf = io.BytesIO()
-        cropped_image.save(buf, format="PNG")
-        img_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+        # Si rezultatele partiale primesc valorile din tabelul nutritional
+        if stream and self.nutrition is not None:
+            forward = on_progress
 
+            def on_progress(update):
+                forward({"partial": self.nutrition.reconcile(update["partial"])})
+
+        # Modelul este ales o singura data per cerere (daca nu il alege router-ul)
+        model = model or self.ollama_model
+        compact = self.nutrition is not None
         payload = {
-            "model": self.ollama_model,
-            "stream": False,
+            "model": model,
+            "stream": stream,
+            "keep_alive": KEEP_ALIVE,
             "messages": [
                 {
                     "role": "user",
-                    "content": self._prompt(),
+                    "content": self._compact_prompt() if compact else self._prompt(),
                     "images": [img_b64]
                 }
             ],
             "options": {
                 "temperature": 0.2,
-                "num_predict": 150
+                "num_predict": COMPACT_NUM_PREDICT if compact else FULL_NUM_PREDICT
             }
         }
 
+        start = time.monotonic()
         try:
-            response = requests.post(self.ollama_url, json=payload, timeout=200)
-            data = response.json()
+            response = self.client.chat(payload, stream=stream)
+            if stream:
+                text, data = self._read_stream(response, on_progress)
+            else:
+                data = response.json()
+                if "error" in data:
+                    return {"error": data["error"]}
+
+                # Extragem textul generat
+                text = data.get("message", {}).get("content")
+                if not text:
+                    return {"error": "Invalid response from Ollama"}
 
-            # Extragem textul generat
-            if "message" in data and "content" in data["message"]:
-                return data["message"]["content"]
+        except Exception as e:
+            return {"error": str(e)}
 
-            return json.dumps({"error": "Invalid response from Ollama"})
+        # Latenta cererii, separat pentru modelul incarcat la rece sau deja in memorie
+        self.warmer.observe(model, data, time.monotonic() - start)
 
-        except Exception as e:
-            return json.dumps({"error": str(e)})
+        result = self._parse(text, model)
+        if "error" not in result:
+            if self.nutrition is not None:
+                result = self.nutrition.reconcile(result)
+            result["model"] = model
+        return result
+
+    def _analyze_plate(self, crop: Image.Image, on_progress=None, accurate: bool = False) -> dict:
+        """O farfurie, trimisa prin router (model rapid, apoi precis daca e nevoie)."""
+        if self.router is None:
+            return self._ask_ollama(crop, on_progress)
+        return self.router.route(
+            lambda model: self._ask_ollama(crop, on_progress, model), force_accurate=accurate
+        )
+
+    @staticmethod
+    def _read_stream(response, on_progress):
+        """Citeste raspunsul NDJSON si raporteaza ce se poate parsa pe parcurs.
+
+        Intoarce textul generat si ultimul mesaj (cu duratele raportate de Ollama)."""
+        parser = IncrementalJsonParser()
+        chunk = {}
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+
+            content = chunk.get("message", {}).get("content", "")
+            if content and parser.feed(content):
+                on_progress({"partial": parser.partial()})
+
+            if chunk.get("done"):
+                break
+
+        if not parser.text:
+            raise RuntimeError("Invalid response from Ollama")
+        return parser.text, chunk
+
+    def _parse(self, text: str, model: str) -> dict:
+        """Parseaza raspunsul modelului; la esec, o singura re-intrebare doar text."""
+        metrics = get_parse_metrics()
+        try:
+            result = parse_nutrition(text)
+        except NutritionParseError as e:
+            metrics.record(model, "failed")
+            error = e
+        else:
+            metrics.record(model, "parsed")
+            return result
+
+        # Re-intrebarea nu mai trimite imaginea: modelul doar reformateaza propriul raspuns
+        metrics.record(model, "reasked")
+        try:
+            result = parse_nutrition(self._reask(text, model))
+        except Exception:
+            return {"error": f"AI a returnat un format invalid: {error}", "raw": text}
+        metrics.record(model, "repaired")
+        return result
 
-    def analyze(self, image: Image.Image):
-        """Pipeline complet: YOLO detect → crop → fallback → Ollama → JSON final."""
+    def _reask(self, text: str, model: str) -> str:
+        # Cerere scurta, fara imagine, cu iesirea fortata la JSON de catre Ollama
+        payload = {
+            "model": model,
+            "stream": False,
+            "keep_alive": KEEP_ALIVE,
+            "format": "json",
+            "messages": [
+                {"role": "user", "content": self._repair_prompt(text, self.nutrition is not None)}
+            ],
+            "options": {"temperature": 0, "num_predict": 300},
+        }
+        data = self.client.chat(payload).json()
+        return data.get("message", {}).get("content", "")
 
-        # 1️⃣ detectăm farfuria principală
-        cropped = self._crop_plate(image)
+    def cached(self, key: str, accurate: bool = False):
+        """Rezultatul salvat pentru imagine, daca exista (fara sa porneasca analiza).
 
-        # 2️⃣ fallback: dacă YOLO nu găsește farfuria, trimitem întreaga imagine
-        if cropped is None:
-            print("⚠️ YOLO nu a detectat farfuria — trimit întreaga imagine la Ollama")
-            cropped = image
+        Pentru `accurate`, conteaza doar rezultatele date de modelul precis."""
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        if accurate and self.router is not None and cached.get("model") != self.router.accurate_model:
+            return None
+        try:
+            return normalize(cached)
+        except NutritionParseError:
+            # Intrare veche care nu respecta schema: o analizam din nou
+            return None
 
-        # 3️⃣ salvăm imaginea trimisă la Ollama pentru debug
-        cropped.save("debug_plate.png")
-        print("DEBUG: imagine trimisă la Ollama salvată ca debug_plate.png")
+    def find_similar(self, user: str, image: Image.Image):
+        """O masa a utilizatorului aproape identica cu poza, daca exista (vezi SimilarMealIndex)."""
+        return self.similar.find(user, dhash(image))
 
-        # 4️⃣ trimitem farfuria la Ollama
-        result = self._ask_ollama(cropped)
+    def remember_similar(self, user: str, image: Image.Image, result: dict):
+        """Adauga o analiza reusita in indexul meselor utilizatorului.
 
-        # 5️⃣ returnăm JSON-ul final
-        return result
+        Intoarce dHash-ul pozei (hex), de salvat in istoric impreuna cu masa."""
+        if "error" in result:
+            return None
+        image_hash = dhash(image)
+        self.similar.add(user, image_hash, result)
+        return dhash_hex(image_hash)
+
+    def stats(self) -> dict:
+        """Statisticile componentelor analizei, de la pornirea procesului."""
+        return {
+            "similar": self.similar.stats(),
+            "crop_gate": self.gate.stats(),
+            "parse": get_parse_metrics().stats(),
+            "latency": self.warmer.latency.summary(),
+            "router": self.router.stats() if self.router is not None else None,
+        }
+
+    def _log_stats(self) -> None:
+        # O linie in log la fiecare interval, ca sa putem urmari cache-urile, rutarea si latenta
+        while True:
+            time.sleep(STATS_LOG_INTERVAL)
+            try:
+                print(f"Statistici analiza: {json.dumps(self.stats(), default=str)}")
+            except Exception as e:
+                print(f"⚠️ Nu am putut calcula statisticile analizei: {e}")
+
+    def _remember(self, key: str, result: dict) -> None:
+        # Salvam in cache doar rezultatele valide, fara eroare
+        if "error" not in result:
+            self.cache.put(key, result)
+
+    def analyze(self, image: Image.Image, key: str = None, on_progress=None, accurate: bool = False):
+        """Analiza unei singure imagini (vezi analyze_batch)."""
+        return self.analyze_batch([image], [key or image_key(image)], on_progress, accurate)[0]
+
+    def analyze_batch(
+        self,
+        images: List[Image.Image],
+        keys: List[str] = None,
+        on_progress=None,
+        accurate: bool = False,
+    ):
+        """Pipeline complet pentru mai multe poze: cache → YOLO batch → crop → fallback
+        → Ollama in paralel → rezultat validat (dict), cate unul per imagine, in ordine.
+
+        Cu `accurate`, toate farfuriile merg direct la modelul precis."""
+
+        # Raportam etapele catre coada de joburi (daca analiza ruleaza in fundal)
+        report = on_progress or (lambda partial: None)
+
+        # 0️⃣ imaginile deja analizate iau rezultatul din cache
+        keys = keys or [image_key(img) for img in images]
+        results = [self.cached(key, accurate) for key in keys]
+        todo = [i for i, result in enumerate(results) if result is None]
+        if not todo:
+            return results
+
+        # 1️⃣ corectam orientarea si micsoram imaginile pentru detector
+        prepared = [self.preprocessor.prepare(images[i]) for i in todo]
+
+        # 2️⃣ detectăm farfuriile (toate din imagine), toate imaginile intr-un singur pas YOLO
+        report({"stage": "Detectez farfuriile..."})
+        plates = self._crop_plates(prepared)
+
+        # 3️⃣ fallback: dacă YOLO nu găsește nicio farfurie, trimitem întreaga imagine
+        tasks = []
+        for n, i in enumerate(todo):
+            if not plates[n]:
+                print("⚠️ YOLO nu a detectat farfuria — trimit întreaga imagine la Ollama")
+                plates[n] = [prepared[n]]
+            for p, crop in enumerate(plates[n]):
+                # 4️⃣ salvăm imaginea trimisă la Ollama doar daca depanarea este activata
+                self.preprocessor.dump(crop, f"plate{p}")
+                tasks.append((i, p, crop))
+
+        # 5️⃣ trimitem toate farfuriile la Ollama, cu un numar limitat de cereri simultane
+        report({"stage": "Modelul AI analizeaza imaginea..."})
+        partials = {}
+        partials_lock = threading.Lock()
+
+        def progress_for(index, plate):
+            # Rezultatele partiale ale farfuriilor sunt combinate separat pentru fiecare imagine
+            if on_progress is None:
+                return None
+
+            def on_partial(update):
+                with partials_lock:
+                    partials.setdefault(index, {})[plate] = update["partial"]
+                    report(
+                        {
+                            "partials": {
+                                i: merge_plates(list(by_plate.values()))
+                                for i, by_plate in partials.items()
+                            }
+                        }
+                    )
+
+            return on_partial
+
+        workers = max(1, min(LLM_PARALLELISM, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._analyze_plate, crop, progress_for(i, p), accurate)
+                for i, p, crop in tasks
+            ]
+            answers = {}
+            for (i, p, _), future in zip(tasks, futures):
+                answers.setdefault(i, []).append(future.result())
+
+        # Farfuriile aceleiasi imagini devin o singura masa
+        for i in todo:
+            results[i] = merge_answers(answers[i])
+            self._remember(keys[i], results[i])
+
+        # 6️⃣ returnăm rezultatul validat pentru fiecare imagine
+        return results
+
+    @staticmethod
+    def _repair_prompt(text: str, compact: bool = False) -> str:
+        """Prompt pentru reformatarea unui raspuns care nu a putut fi parsat."""
+        if compact:
+            keys = "\"dish_name\", \"ingredients\" (a list of objects with \"name\", \"grams\", \"kcal\")"
+        else:
+            keys = (
+                "\"dish_name\", \"ingredients\" (a list of objects with \"name\", \"calories\", "
+                "\"protein\", \"carbs\", \"fat\"), \"total_calories\", \"total_protein\", "
+                "\"total_carbs\", \"total_fat\""
+            )
+        return (
+            f"Rewrite the following answer as ONLY a valid JSON object with the keys {keys}. "
+            "Numbers must be plain numbers.\n"
+            "Answer:\n" + text[:4000]
+        )
+
+    @staticmethod
+    def _compact_prompt() -> str:
+        """Prompt scurt: doar ingredientele si gramajul, valorile vin din tabelul local."""
+        return (
+            "List the food in the image as ONLY minified JSON, no other text:\n"
+            "{\"dish_name\":\"general category\",\"ingredients\":"
+            "[{\"name\":\"simple ingredient name\",\"grams\":estimated_grams,\"kcal\":estimated_kcal}],"
+            "\"confidence\":0_to_1}\n"
+            "At most 5 main ingredients. Use common English ingredient names."
+        )
 
     @staticmethod
     def _prompt() -> str:
@@ -217,6 +672,7 @@ class VisionAnalyzer:
             "- No text outside JSON.\n"
             "Return exactly this structure:\n"
             "{\n"
+            "  \"dish_name\": \"general category\",\n"
             "  \"ingredients\": [\n"
             "      {\n"
             "          \"name\": \"ingredient_name\",\n"
@@ -226,11 +682,11 @@ class VisionAnalyzer:
             "          \"fat\": grams_of_fat\n"
             "      }\n"
             "  ],\n"
-            "  \"dish_name\": \"general category\",\n"
             "  \"total_calories\": total_kcal,\n"
             "  \"total_protein\": total_protein_grams,\n"
             "  \"total_carbs\": total_carbs_grams,\n"
-            "  \"total_fat\": total_fat_grams\n"
+            "  \"total_fat\": total_fat_grams,\n"
+            "  \"confidence\": how_sure_you_are_0_to_1\n"
             "}\n"
             "Be realistic with estimates. Output ONLY the JSON."
         )
\ No newline at end of file
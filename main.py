@@ -1,14 +1,16 @@
+import threading
+from typing import TYPE_CHECKING
+
 import streamlit as st
 
 from core.auth_manager import AuthManager
 from core.calorie_settings import CalorieSettings
 from core.history_manager import HistoryManager
-from core.vision import VisionAnalyzer
 
-from app_pages.home_page import HomePage
-from app_pages.history_page import HistoryPage
-from app_pages.stats_page import StatsPage
-from app_pages.profil_page import ProfilePage
+# Analizorul vizual si paginile se importa doar cand sunt folosite (vezi main),
+# ca bara de autentificare sa apara fara sa asteptam numpy, pandas, plotly sau Ollama
+if TYPE_CHECKING:
+    from core.vision import VisionAnalyzer
 
 
 def get_api_key():
@@ -21,6 +23,31 @@ def get_api_key():
         return OPENAI_API_KEY
 
 
+@st.cache_resource
+def get_vision() -> "VisionAnalyzer":
+    # Un singur analizor per proces, partajat de toate sesiunile
+    from core.vision import VisionAnalyzer
+
+    return VisionAnalyzer()
+
+
+@st.cache_resource
+def start_model_warmer():
+    # Modelul Ollama se incarca la prima deschidere a paginii Home, nu la prima analiza;
+    # si importul managerului (requests, numpy) se face pe thread-ul de fundal
+    def run():
+        from core.model_router import ACCURATE_MODEL, FAST_MODEL, ROUTING
+        from core.ollama_warmup import get_model_warmer
+
+        # Cu rutarea pornita, modelul rapid raspunde primul, deci trebuie incarcat de la inceput
+        warmer = get_model_warmer()
+        if ROUTING:
+            warmer.keep_loaded([FAST_MODEL, ACCURATE_MODEL])
+        warmer.start()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
 def main():
         # Sectiunea din sidebar pentru autentificare
         st.sidebar.title("Autentificare")
@@ -65,21 +92,34 @@ def main():
 
         # Meniu de navigare in sidebar
         st.sidebar.markdown("---")
-        page = st.sidebar.radio("Navigare", ["Home", "Istoric", "Statistici", "Profil"])
+        page = st.sidebar.radio("Navigare", ["Home", "Istoric", "Statistici", "Profil"], key="page")
 
-        # Initializam obiectele necesare pentru pagini
-        settings = CalorieSettings(st.session_state)
-        vision = VisionAnalyzer()
+        # Initializam obiectele necesare pentru pagini; setarile calorice se incarca
+        # din baza de date o singura data per sesiune
+        settings = CalorieSettings(st.session_state, current_user)
         history = HistoryManager(current_user)
 
-        # Navigare intre pagini
+        # Navigare intre pagini; fiecare pagina (si dependentele ei) se importa la prima folosire
         if page == "Home":
-            HomePage(vision, history).render()
+            from app_pages.home_page import HomePage
+
+            # Incarcarea modelelor Ollama (si importul requests/numpy pentru ea) porneste,
+            # o singura data per proces, doar cand pagina care le foloseste este deschisa
+            start_model_warmer()
+
+            # Analizorul vizual este necesar doar pe pagina Home
+            HomePage(get_vision(), history).render()
         elif page == "Istoric":
+            from app_pages.history_page import HistoryPage
+
             HistoryPage(history).render()
         elif page == "Statistici":
+            from app_pages.stats_page import StatsPage
+
             StatsPage(history, settings).render()
         elif page == "Profil":
+            from app_pages.profil_page import ProfilePage
+
             ProfilePage(settings, current_user).render()
 
 
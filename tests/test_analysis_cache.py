@@ -0,0 +1,41 @@
+import os
+
+from core.analysis_cache import AnalysisCache
+
+
+def _files(directory):
+    return sorted(n for n in os.listdir(directory) if n.endswith(".json"))
+
+
+def test_put_survives_disk_errors(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path), memory_entries=10)
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr("core.analysis_cache.os.replace", full_disk)
+    cache.put("a", {"dish_name": "Supa"})
+
+    # Rezultatul ramane in memorie, iar fisierul temporar este sters
+    assert cache.get("a") == {"dish_name": "Supa"}
+    assert os.listdir(tmp_path) == []
+
+
+def test_disk_is_scanned_only_when_over_the_limit(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path), memory_entries=1, disk_max_bytes=10**6)
+    scans = []
+    evict = cache._evict_disk
+    monkeypatch.setattr(cache, "_evict_disk", lambda: scans.append(1) or evict())
+
+    for n in range(20):
+        cache.put(f"k{n}", {"n": n})
+    # Doar prima scriere scaneaza directorul; restul aduna marimea incremental
+    assert len(scans) == 1
+    assert cache._disk_bytes == sum(os.path.getsize(tmp_path / n) for n in _files(tmp_path))
+
+    # Peste limita, cele mai vechi fisiere sunt sterse
+    cache.disk_max_bytes = cache._disk_bytes - 1
+    cache.put("k0", {"n": 0})
+    assert len(scans) == 2
+    assert cache._disk_bytes <= cache.disk_max_bytes
+    assert len(_files(tmp_path)) < 20
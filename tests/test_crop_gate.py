@@ -0,0 +1,33 @@
+import numpy as np
+from PIL import Image
+
+from core.crop_gate import PROBE_CLOSEUP, PROBE_EMPTY, PROBE_SAMPLED, PROBE_UNSURE, CropGate
+
+NO_PLATES = np.zeros((0, 4))
+
+
+def test_weak_probe_detection_is_not_empty():
+    gate = CropGate(empty_max_score=0.35, empty_sample=0)
+    image = Image.new("RGB", (1000, 800))
+
+    assert gate.after_probe(image, NO_PLATES, top_score=0.0) == (PROBE_EMPTY, None)
+    # O farfurie mica sau indepartata, prea nesigura la rezolutie mica
+    assert gate.after_probe(image, NO_PLATES, top_score=0.4) == (PROBE_UNSURE, None)
+
+
+def test_fraction_of_empty_probes_is_sampled():
+    gate = CropGate(empty_sample=0.25)
+    image = Image.new("RGB", (1000, 800))
+
+    paths = [gate.after_probe(image, NO_PLATES)[0] for _ in range(8)]
+    assert paths.count(PROBE_SAMPLED) == 2
+    assert paths.count(PROBE_EMPTY) == 6
+
+
+def test_single_large_plate_is_cropped_with_margin():
+    gate = CropGate(closeup_area=0.5, probe_margin=0.1)
+    image = Image.new("RGB", (1000, 800))
+
+    path, box = gate.after_probe(image, np.array([[100.0, 100.0, 900.0, 700.0]]))
+    assert path == PROBE_CLOSEUP
+    assert box == (20, 40, 981, 761)
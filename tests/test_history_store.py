@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from core.history_store import HistoryStore
+
+
+def _add(store, user, name, kcal, day="2026-01-05"):
+    return store.add(
+        user, name, kcal, 10, 20, 5, None, [{"name": name}],
+        timestamp=datetime.strptime(day + " 12:00", "%Y-%m-%d %H:%M"),
+    )
+
+
+def test_update_meal_replaces_entry_and_day_totals(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    meal_id = _add(store, "ana", "Supa", 300)
+    _add(store, "ana", "Paine", 100)
+
+    assert store.update_meal("ana", meal_id, "Ciorba", 450, 20, 30, 10, [{"name": "ciorba"}])
+    # Masa altui utilizator nu poate fi inlocuita
+    assert not store.update_meal("bob", meal_id, "Ciorba", 1, 1, 1, 1, [])
+
+    entries = store.get_user_history("ana")
+    assert [e["dish_name"] for e in entries] == ["Ciorba", "Paine"]
+    assert entries[0]["ingredients"] == [{"name": "ciorba"}]
+    day = store.get_daily_totals("ana")[0]
+    assert (day["calories"], day["protein"], day["fat"], day["meals"]) == (550, 30, 15, 2)
+
+
+def test_name_filter_ignores_case_beyond_ascii(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    _add(store, "ana", "CIORBĂ DE BURTĂ", 300)
+    _add(store, "ana", "Ciorbă de perișoare", 250)
+    _add(store, "ana", "100% suc", 80)
+
+    found = store.query_user_history("ana", name="ciorbă")
+    assert sorted(e["dish_name"] for e in found) == ["CIORBĂ DE BURTĂ", "Ciorbă de perișoare"]
+    assert store.count_user_history("ana", name="burtă") == 1
+    # Caracterele speciale din LIKE se cauta literal
+    assert store.count_user_history("ana", name="0%") == 1
+    assert store.count_user_history("ana", name="_") == 0
@@ -0,0 +1,74 @@
+import json
+import random
+
+import pytest
+
+from core.json_stream import IncrementalJsonParser
+
+ANSWER = (
+    'Iata:\n```json\n{"dish_name": "Ciorb\\u0103 \\"de\\" {burta}\\\\", '
+    '"ingredients": [{"name": "burta", "grams": 150, "kcal": 210.5}, '
+    '{"name": "sm\\u00e2nt\\u00e2n\\u0103 [20%]", "grams": 30, "kcal": -1}], '
+    '"total_calories": 1234.5, "total_protein": 40,\n"total_carbs": 12, "total_fat": 9}\n```'
+)
+EXPECTED = json.loads(ANSWER[ANSWER.index("{"): ANSWER.rindex("}") + 1])
+
+
+def _feed(chunks):
+    parser = IncrementalJsonParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def _check(parser):
+    partial = parser.partial()
+    assert partial["dish_name"] == EXPECTED["dish_name"]
+    assert partial["ingredients"] == EXPECTED["ingredients"]
+    for field in ("total_calories", "total_protein", "total_carbs", "total_fat"):
+        assert partial[field] == EXPECTED[field]
+    assert parser.text == ANSWER
+
+
+def test_one_character_at_a_time():
+    _check(_feed(ANSWER))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(ANSWER)), 15))
+    _check(_feed(ANSWER[a:b] for a, b in zip([0, *cuts], [*cuts, len(ANSWER)])))
+
+
+def test_every_single_split_point():
+    for cut in range(1, len(ANSWER)):
+        _check(_feed([ANSWER[:cut], ANSWER[cut:]]))
+
+
+def test_number_is_reported_only_when_complete():
+    parser = IncrementalJsonParser()
+    parser.feed('{"dish_name": "x", "total_calories": 12')
+    assert "total_calories" not in parser.fields
+    parser.feed("34")
+    assert "total_calories" not in parser.fields
+    assert parser.feed(", ")
+    assert parser.fields["total_calories"] == 1234
+
+
+def test_string_split_inside_escape():
+    parser = IncrementalJsonParser()
+    parser.feed('{"dish_name": "a\\')
+    assert "dish_name" not in parser.fields
+    parser.feed('"b')
+    assert "dish_name" not in parser.fields
+    parser.feed('", "ingredients": []}')
+    assert parser.fields["dish_name"] == 'a"b'
+
+
+def test_item_is_added_when_its_object_closes():
+    parser = IncrementalJsonParser()
+    assert not parser.feed('{"ingredients": [{"name": "a}b", "kcal": 1')
+    assert parser.ingredients == []
+    assert parser.feed("}")
+    assert parser.ingredients == [{"name": "a}b", "kcal": 1}]
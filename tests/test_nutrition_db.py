@@ -0,0 +1,62 @@
+import pytest
+
+from core.nutrition_db import get_nutrition_table
+from core.nutrition_parser import normalize
+
+
+def _reconcile(*ingredients):
+    # Acelasi drum ca in VisionAnalyzer: raspunsul scurt, normalizat, apoi reconciliat cu tabelul
+    meal = normalize({"dish_name": "masa", "ingredients": [dict(i) for i in ingredients]})
+    return get_nutrition_table().reconcile(meal)
+
+
+def test_table_values_replace_model_estimates():
+    meal = _reconcile({"name": "grilled chicken breast", "grams": 150, "kcal": 250})
+    chicken = meal["ingredients"][0]
+    assert chicken["match"] == "chicken breast"
+    assert chicken["protein"] > 40
+    assert "macros_incomplete" not in meal
+
+
+def test_unknown_ingredient_marks_macros_unknown():
+    meal = _reconcile(
+        {"name": "dragonfruit", "grams": 200, "kcal": 120},
+        {"name": "rice", "grams": 200, "kcal": 260},
+    )
+    dragonfruit, rice = meal["ingredients"]
+    assert dragonfruit["calories"] == 120
+    assert dragonfruit["macros_unknown"] is True
+    assert "macros_unknown" not in rice
+    assert meal["macros_incomplete"] is True
+    assert meal["total_calories"] == pytest.approx(120 + rice["calories"])
+    assert meal["total_carbs"] == pytest.approx(rice["carbs"])
+
+
+def test_model_macros_are_kept_for_unknown_ingredients():
+    meal = _reconcile({"name": "dragonfruit", "grams": 200, "kcal": 120, "carbs": 26, "protein": 2})
+    assert "macros_unknown" not in meal["ingredients"][0]
+    assert "macros_incomplete" not in meal
+    assert meal["total_carbs"] == 26
+
+
+@pytest.mark.parametrize("name, grams, kcal", [
+    ("black pepper", 5, 13),
+    ("almond milk", 250, 40),
+    ("mozzarella cheese", 100, 280),
+])
+def test_loose_partial_matches_are_not_applied(name, grams, kcal):
+    ingredient = _reconcile({"name": name, "grams": grams, "kcal": kcal})["ingredients"][0]
+    assert "match" not in ingredient
+    assert ingredient["calories"] == kcal
+
+
+def test_partial_match_without_estimate_is_not_applied():
+    ingredient = _reconcile({"name": "almond milk", "grams": 250})["ingredients"][0]
+    assert "match" not in ingredient
+
+
+def test_partial_match_close_to_estimate_is_applied():
+    ingredient = _reconcile({"name": "chocolate cake", "grams": 100, "kcal": 390})["ingredients"][0]
+    assert ingredient["match"] == "cake"
+    assert ingredient["partial"] is True
+    assert ingredient["calories"] == 371
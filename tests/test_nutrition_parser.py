@@ -0,0 +1,90 @@
+import pytest
+
+from core.nutrition_parser import (
+    NutritionParseError,
+    extract_json_object,
+    normalize,
+    parse_nutrition,
+    to_number,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (250, 250.0),
+    (12.5, 12.5),
+    ("250", 250.0),
+    ("250 kcal", 250.0),
+    ("12,5 g", 12.5),
+    ("12,75g", 12.75),
+    ("12.5 g", 12.5),
+    ("1,234 kcal", 1234.0),
+    ("1,234,567", 1234567.0),
+    ("1,234.5 kcal", 1234.5),
+    ("-3", -3.0),
+    ("aprox. 300-400 kcal", 300.0),
+    ("12,3456", 12.0),
+])
+def test_to_number(value, expected):
+    assert to_number(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, True, "", "multe", [], {}])
+def test_to_number_rejects_non_numbers(value):
+    assert to_number(value) is None
+
+
+def test_extract_json_object_skips_fences_and_text():
+    text = 'Iata rezultatul:\n```json\n{"dish_name": "Supa", "ingredients": []}\n```\nPofta buna!'
+    assert extract_json_object(text) == '{"dish_name": "Supa", "ingredients": []}'
+
+
+def test_extract_json_object_ignores_braces_in_strings():
+    text = '{"dish_name": "Tort {special}", "note": "a \\"}\\" b", "x": {"y": 1}} rest }'
+    assert extract_json_object(text) == '{"dish_name": "Tort {special}", "note": "a \\"}\\" b", "x": {"y": 1}}'
+
+
+def test_extract_json_object_requires_complete_object():
+    with pytest.raises(NutritionParseError):
+        extract_json_object('{"dish_name": "Supa", "ingredients": [')
+    with pytest.raises(NutritionParseError):
+        extract_json_object("fara json")
+
+
+def test_normalize_fills_missing_values_and_totals():
+    result = normalize({
+        "dish_name": " Pizza ",
+        "ingredients": [
+            {"name": "aluat", "calories": "1,050 kcal", "protein": "30g", "carbs": "200", "fat": "10,5"},
+            {"name": "sos", "calories": 50},
+            "oregano",
+            {"name": "  "},
+            42,
+        ],
+    })
+    assert result["dish_name"] == "Pizza"
+    assert [i["name"] for i in result["ingredients"]] == ["aluat", "sos", "oregano"]
+    assert result["ingredients"][1]["protein"] == 0.0
+    assert result["total_calories"] == 1100.0
+    assert result["total_fat"] == 10.5
+
+
+def test_normalize_keeps_given_totals():
+    result = normalize({"dish_name": "Supa", "total_calories": "1,234 kcal", "ingredients": []})
+    assert result["total_calories"] == 1234.0
+    assert result["total_protein"] == 0.0
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"error": "nu vad mancare"},
+    {"dish_name": "", "ingredients": []},
+    {"dish_name": "Supa", "ingredients": "apa"},
+])
+def test_normalize_rejects_invalid_answers(data):
+    with pytest.raises(NutritionParseError):
+        normalize(data)
+
+
+def test_parse_nutrition_accepts_trailing_commas_and_single_quotes():
+    assert parse_nutrition('{"dish_name": "Supa", "ingredients": [],}')["dish_name"] == "Supa"
+    assert parse_nutrition("{'dish_name': 'Supa', 'total_calories': 200}")["total_calories"] == 200.0
@@ -0,0 +1,173 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.ollama_client import OllamaClient, OllamaUnavailableError
+
+
+class _Stub:
+    """Server Ollama fals pe localhost: raspunde cu statusurile din `replies`, apoi 200."""
+
+    def __init__(self, replies=(), delay=0.0):
+        self.replies = list(replies)
+        self.delay = delay
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                status = stub.replies.pop(0) if stub.replies else 200
+                time.sleep(stub.delay)
+                body = json.dumps({"message": {"content": "{}"}}).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clientul a renuntat (timeout de citire)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(*args, **kwargs):
+        stub = _Stub(*args, **kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def _dead_url():
+    # Un port pe care nu asculta nimeni: conexiunea este refuzata imediat
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def _client(urls, **kwargs):
+    kwargs.setdefault("backoff_base", 0)
+    return OllamaClient(urls, **kwargs)
+
+
+def test_retries_retryable_status_then_succeeds(stubs):
+    stub = stubs(replies=[503, 502])
+    response = _client([stub.url], max_retries=2).chat({"model": "m"})
+    assert response.status_code == 200
+    assert stub.hits == 3
+
+
+def test_gives_up_after_max_retries(stubs):
+    stub = stubs(replies=[503, 503, 503, 503])
+    with pytest.raises(requests.HTTPError):
+        _client([stub.url], max_retries=1).chat({"model": "m"})
+    assert stub.hits == 2
+
+
+def test_other_errors_are_not_retried(stubs):
+    stub = stubs(replies=[404])
+    assert _client([stub.url], max_retries=2).chat({"model": "m"}).status_code == 404
+    assert stub.hits == 1
+
+
+def test_round_robin_spreads_requests(stubs):
+    a, b = stubs(), stubs()
+    client = _client([a.url, b.url])
+    for _ in range(4):
+        client.chat({"model": "m"})
+    assert (a.hits, b.hits) == (2, 2)
+
+
+def test_fails_over_to_the_next_server(stubs):
+    live = stubs()
+    client = _client([_dead_url(), live.url], max_retries=1)
+    assert client.chat({"model": "m"}).status_code == 200
+    assert live.hits == 1
+    assert client.endpoints[0].failures == 1
+
+
+def test_circuit_breaker_skips_a_failing_server(stubs):
+    live = stubs()
+    client = _client([_dead_url(), live.url], max_retries=1, breaker_failures=1, breaker_cooldown=60)
+    client.chat({"model": "m"})
+    assert not client.endpoints[0].available(time.monotonic())
+
+    # Cat timp circuitul este deschis, toate cererile merg la serverul sanatos, fara reincercari
+    for _ in range(3):
+        client.chat({"model": "m"})
+    assert live.hits == 4
+    assert client.endpoints[0].failures == 1
+
+
+def test_circuit_breaker_closes_after_cooldown(stubs):
+    flaky = stubs(replies=[503])
+    client = _client([flaky.url], max_retries=0, breaker_failures=1, breaker_cooldown=0.2)
+    with pytest.raises(requests.HTTPError):
+        client.chat({"model": "m"})
+    with pytest.raises(OllamaUnavailableError):
+        client.chat({"model": "m"})
+
+    time.sleep(0.25)
+    assert client.chat({"model": "m"}).status_code == 200
+    assert client.endpoints[0].failures == 0
+
+
+def test_read_timeout_is_not_retried(stubs):
+    slow = stubs(delay=0.5)
+    client = _client([slow.url], max_retries=2, read_timeout=0.1)
+    with pytest.raises(requests.ReadTimeout):
+        client.chat({"model": "m"})
+    assert slow.hits == 1
+    assert client.endpoints[0].failures == 1
+
+
+def test_connect_timeout_is_retried_on_another_server(stubs):
+    # Un socket care asculta, dar nu accepta: dupa ce coada lui se umple, conectarea expira
+    blackhole = socket.socket()
+    blackhole.bind(("127.0.0.1", 0))
+    blackhole.listen(0)
+    fillers = []
+    try:
+        for _ in range(4):
+            s = socket.socket()
+            s.setblocking(False)
+            s.connect_ex(blackhole.getsockname())
+            fillers.append(s)
+
+        live = stubs()
+        url = "http://127.0.0.1:%d" % blackhole.getsockname()[1]
+        client = _client([url, live.url], max_retries=1, connect_timeout=0.2)
+        start = time.monotonic()
+        assert client.chat({"model": "m"}).status_code == 200
+        assert time.monotonic() - start < 2
+        assert live.hits == 1
+        assert client.endpoints[0].failures == 1
+    finally:
+        for s in fillers:
+            s.close()
+        blackhole.close()
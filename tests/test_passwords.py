@@ -0,0 +1,99 @@
+import pytest
+
+from core.auth_manager import AuthManager
+from core.passwords import PasswordHasher, legacy_hash, scheme_of
+from core.user_store import SqliteUserRepository
+
+# Parametri mici, ca testele sa nu depinda de calibrarea pe masina curenta
+SCRYPT_PARAMS = {"n": 2**10, "r": 8, "p": 1}
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher("scrypt", workers=2, params=SCRYPT_PARAMS)
+
+
+@pytest.fixture
+def auth(tmp_path, hasher):
+    return AuthManager(SqliteUserRepository(str(tmp_path / "users.db")), hasher)
+
+
+def test_legacy_sha256_verifies(hasher):
+    stored = legacy_hash("parola")
+    assert scheme_of(stored) == "sha256"
+    assert hasher.verify("parola", stored)
+    assert not hasher.verify("alta", stored)
+    assert hasher.needs_rehash(stored)
+
+
+def test_new_hashes_round_trip(hasher):
+    stored = hasher.hash("parola")
+    assert stored.startswith("scrypt$1024$8$1$")
+    assert hasher.verify("parola", stored)
+    assert not hasher.verify("alta", stored)
+    assert not hasher.needs_rehash(stored)
+
+    pbkdf2 = PasswordHasher("pbkdf2", workers=1, params={"iterations": 1000})
+    stored = pbkdf2.hash("parola")
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert pbkdf2.verify("parola", stored)
+    assert not pbkdf2.verify("alta", stored)
+
+
+def test_login_rehashes_legacy_and_weak_hashes(auth, hasher):
+    auth.users.create("ana", legacy_hash("parola"))
+    assert auth.login("ana", "gresita") is None
+    assert auth.users.get("ana")["password_hash"] == legacy_hash("parola")
+
+    assert auth.login("ana", "parola") == "ana"
+    upgraded = auth.users.get("ana")["password_hash"]
+    assert upgraded.startswith("scrypt$")
+    assert auth.login("ana", "parola") == "ana"
+    # Un hash deja la zi nu se reface la fiecare login
+    assert auth.users.get("ana")["password_hash"] == upgraded
+
+    weak = PasswordHasher("scrypt", workers=1, params={"n": 2**8, "r": 8, "p": 1})
+    auth.users.create("bob", weak.hash("parola"))
+    assert auth.login("bob", "parola") == "bob"
+    assert auth.users.get("bob")["password_hash"].startswith("scrypt$1024$")
+
+
+@pytest.mark.parametrize("stored", [
+    "",
+    "scrypt$",
+    "scrypt$abc$8$1$c2FsdA$a2V5",
+    "scrypt$1$8$1$c2FsdA$a2V5",
+    "scrypt$1024$8$1$c2FsdA$!!!",
+    "scrypt$1073741824$8$1$c2FsdA$a2V5",
+    "pbkdf2_sha256$-5$c2FsdA$a2V5",
+    "pbkdf2_sha256$999999999999$c2FsdA$a2V5",
+    "bcrypt$12$whatever",
+])
+def test_corrupt_hashes_fail_closed(auth, hasher, stored):
+    assert hasher.verify("parola", stored) is False
+    auth.users.create("ana", stored)
+    assert auth.login("ana", "parola") is None
+
+
+def test_unknown_user_still_verifies_a_hash(auth, hasher, monkeypatch):
+    calls = []
+    verify = hasher._verify
+    monkeypatch.setattr(hasher, "_verify", lambda p, s: calls.append(s) or verify(p, s))
+
+    assert auth.login("nimeni", "parola") is None
+    # Acelasi cost ca pentru un cont existent: un hash cu parametrii curenti
+    assert calls == [hasher.dummy_hash]
+    assert calls[0].startswith("scrypt$1024$8$1$")
+
+
+def test_register_hashes_in_the_pool(auth, hasher, monkeypatch):
+    import threading
+
+    threads = []
+    hash_ = hasher._hash
+    monkeypatch.setattr(hasher, "_hash", lambda p: threads.append(threading.current_thread().name) or hash_(p))
+
+    assert auth.register("ana", "parola")
+    assert not auth.register("ana", "alta")
+    assert threads and all(name.startswith("password") for name in threads)
+    assert auth.login("ana", "parola") == "ana"
@@ -0,0 +1,62 @@
+from functools import partial
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.history_journal import JournalHistoryStore
+from core.history_store import HistoryStore
+from core.similar_meals import SimilarMealIndex, dhash, dhash_hex, history_loader
+
+
+def _photo(seed, noise=0):
+    # O "poza" determinista; cu zgomot mic ramane aceeasi masa pentru dHash
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (64, 64, 3)).astype(np.int16)
+    if noise:
+        pixels += np.random.default_rng(seed + 1000).integers(-noise, noise + 1, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+@pytest.fixture(params=["sqlite", "journal"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        yield HistoryStore(str(tmp_path / "history.db"))
+    else:
+        store = JournalHistoryStore(str(tmp_path / "journal"))
+        yield store
+        store.close()
+
+
+def _save(store, user, name, image):
+    store.add(user, name, 500, 20, 60, 15, None, [{"name": name}], image_dhash=dhash_hex(dhash(image)))
+
+
+def test_index_is_seeded_from_saved_meals(store):
+    _save(store, "ana", "Pizza", _photo(1))
+    _save(store, "ana", "Supa", _photo(2))
+    _save(store, "bob", "Salata", _photo(3))
+    store.add("ana", "Fara poza", 100, 0, 0, 0, None, [])
+
+    # Un index nou (ca dupa o repornire) gaseste mesele salvate inainte
+    index = SimilarMealIndex(loader=partial(history_loader, store=store))
+    match = index.find("ana", dhash(_photo(1, noise=4)))
+    assert match is not None
+    assert match["result"]["dish_name"] == "Pizza"
+    assert match["result"]["ingredients"] == [{"name": "Pizza"}]
+    assert index.find("ana", dhash(_photo(3))) is None
+    assert index.stats()["seeded"] == 2
+
+
+def test_seeding_keeps_the_most_recent_meals(store):
+    for n in range(5):
+        _save(store, "ana", f"Masa {n}", _photo(n))
+
+    index = SimilarMealIndex(per_user=3, loader=partial(history_loader, store=store))
+    assert index.find("ana", dhash(_photo(0))) is None
+    assert index.find("ana", dhash(_photo(4)))["result"]["dish_name"] == "Masa 4"
+
+    # O masa noua se adauga peste cele incarcate, fara o noua citire din istoric
+    index.add("ana", dhash(_photo(9)), {"dish_name": "Noua"})
+    assert index.find("ana", dhash(_photo(9)))["result"]["dish_name"] == "Noua"
+    assert index.stats()["seeded"] == 3
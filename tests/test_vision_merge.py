@@ -0,0 +1,25 @@
+from core.vision import merge_answers
+
+
+def test_plates_are_summed():
+    merged = merge_answers([
+        {"dish_name": "Supa", "total_calories": 200, "ingredients": [{"name": "supa"}], "model": "fast"},
+        {"dish_name": "Paine", "total_calories": 150, "ingredients": [{"name": "paine"}], "model": "fast"},
+    ])
+    assert merged["dish_name"] == "Supa + Paine"
+    assert merged["total_calories"] == 350
+    assert len(merged["ingredients"]) == 2
+
+
+def test_one_failed_plate_fails_the_image():
+    merged = merge_answers([
+        {"dish_name": "Supa", "total_calories": 200, "ingredients": []},
+        {"error": "timeout", "raw": "{"},
+    ])
+    assert merged["error"] == "Analiza a esuat pentru 1 din 2 farfurii: timeout"
+    assert merged["raw"] == "{"
+    assert "total_calories" not in merged
+
+
+def test_single_failed_plate_keeps_its_error():
+    assert merge_answers([{"error": "timeout"}]) == {"error": "timeout"}